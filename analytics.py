@@ -0,0 +1,280 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# 운동 기록 분석 (단위 환산 + 연속 기록 + 주/월 운동량 + 부하 비율 + 추세)
+# =========================
+# 운동마다 단위가 달라서 (팔굽혀펴기 회, 달리기 분, 플랭크 초) 양을 그냥 더하면 의미가 없다.
+# 운동량은 운동별 원래 단위로 따로 보고, 운동끼리 더할 때는 "운동 시간(분) 환산 부하" 로 바꾼다.
+#
+# 계산은 전부 NumPy 배열 위에서 한 번에 한다. 한 사용자 화면용이든 전체 사용자 야간 집계든
+# 같은 함수를 쓴다 (사용자는 정수 코드, 날짜는 1970-01-01 부터의 일수).
+# 입력은 (사용자, 날짜, 운동, 양) 행이면 되고 같은 키가 여러 번 나오면 더한다
+# (보통은 db.get_daily_exercise_totals 의 daily_rollup 행).
+
+# 운동 → (단위, 1단위당 운동 시간(분)). 반복 운동은 한 번에 걸리는 시간으로 환산
+EXERCISE_UNITS = {
+    "팔굽혀펴기": ("회", 3 / 60),
+    "윗몸일으키기": ("회", 3 / 60),
+    "스쿼트": ("회", 3 / 60),
+    "턱걸이": ("회", 5 / 60),
+    "달리기(분)": ("분", 1.0),
+    "플랭크(초)": ("초", 1 / 60),
+}
+# 단위를 모르는 운동("기타", 가져온 기록의 다른 이름)은 운동한 날로는 세지만 부하에는 넣지 않는다
+UNKNOWN_UNIT = ("", np.nan)
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+# 운동한 날 / 가장 많이 한 운동을 세는 기간 (인사말의 "최근 30일")
+ACTIVE_DAYS = 30
+TREND_WEEKS = 8
+
+
+def day_number(value) -> int:
+    # date / "YYYY-MM-DD" → 1970-01-01 부터의 일수
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+
+def day_date(day: int) -> date:
+    return np.datetime64(int(day), "D").astype(object)
+
+
+def exercise_unit(exercise: str):
+    return EXERCISE_UNITS.get(exercise, UNKNOWN_UNIT)
+
+
+# -------------------------
+# 입력 정리
+# -------------------------
+def build_training_data(user, day, exercise, amount, users, exercises) -> dict:
+    """정수 코드 배열 → 분석용 dict. (사용자, 날짜, 운동) 로 합치고 사용자 → 날짜 순으로 정렬한다.
+
+    user / exercise: users / exercises 안의 위치, day: 1970-01-01 부터의 일수
+    반환 dict: users, exercises, units, user, day, exercise, amount, load (배열은 전부 같은 길이)
+    """
+    user = np.asarray(user, dtype=np.int64)
+    day = np.asarray(day, dtype=np.int64)
+    exercise = np.asarray(exercise, dtype=np.int64)
+    amount = np.asarray(amount, dtype=np.float64)
+    n_ex = max(len(exercises), 1)
+    if len(day):
+        first = day.min()
+        span = int(day.max() - first) + 1
+        key = (user * span + (day - first)) * n_ex + exercise
+        keys, inverse = np.unique(key, return_inverse=True)
+        amount = np.bincount(inverse, weights=amount, minlength=len(keys))
+        exercise = keys % n_ex
+        day = (keys // n_ex) % span + first
+        user = keys // n_ex // span
+
+    units = [exercise_unit(name) for name in exercises]
+    minutes_per_unit = np.array([m for _, m in units], dtype=np.float64)
+    load = amount * minutes_per_unit[exercise] if len(exercises) else np.zeros(len(amount))
+    return {
+        "users": list(users),
+        "exercises": list(exercises),
+        "units": [u for u, _ in units],
+        "user": user,
+        "day": day,
+        "exercise": exercise,
+        "amount": amount,
+        "load": np.nan_to_num(load),
+    }
+
+
+def training_data_from_rows(rows) -> dict:
+    # (username, log_date, exercise, amount) 행 목록 → build_training_data
+    if len(rows) == 0:
+        return build_training_data([], [], [], [], [], [])
+    usernames, log_dates, exercises, amounts = zip(*rows)
+    user, users = pd.factorize(pd.Series(usernames, dtype=object), sort=True)
+    exercise, exercise_names = pd.factorize(pd.Series(exercises, dtype=object), sort=True)
+    day = np.array(log_dates, dtype="datetime64[D]").astype(np.int64)
+    return build_training_data(user, day, exercise, amounts, users, exercise_names)
+
+
+def _n_users(data) -> int:
+    return len(data["users"])
+
+
+def _user_sum(data, mask, values) -> np.ndarray:
+    return np.bincount(data["user"][mask], weights=values[mask], minlength=_n_users(data))
+
+
+# -------------------------
+# 지표 (전부 사용자별 배열)
+# -------------------------
+def streaks(data, today: int):
+    """(현재 연속 운동일, 최장 연속 운동일). 오늘이나 어제 운동했으면 현재 연속이 이어진 것으로 본다."""
+    n = _n_users(data)
+    current = np.zeros(n, dtype=np.int64)
+    longest = np.zeros(n, dtype=np.int64)
+    if not len(data["day"]):
+        return current, longest
+    # 사용자별 운동한 날 (정렬돼 있으므로 이웃끼리 비교)
+    user, day = data["user"], data["day"]
+    first_of_day = np.ones(len(day), dtype=bool)
+    first_of_day[1:] = (user[1:] != user[:-1]) | (day[1:] != day[:-1])
+    user, day = user[first_of_day], day[first_of_day]
+
+    # 사용자가 바뀌거나 하루 이상 비면 새 연속 구간
+    run_start = np.ones(len(day), dtype=bool)
+    run_start[1:] = (user[1:] != user[:-1]) | (day[1:] != day[:-1] + 1)
+    starts = np.flatnonzero(run_start)
+    lengths = np.diff(np.append(starts, len(day)))
+    run_user = user[starts]
+    run_end = day[starts + lengths - 1]
+
+    np.maximum.at(longest, run_user, lengths)
+    # 사용자마다 마지막 구간 (다음 구간의 사용자가 다르거나 맨 끝)
+    last = np.ones(len(starts), dtype=bool)
+    last[:-1] = run_user[1:] != run_user[:-1]
+    alive = last & (run_end >= today - 1) & (run_end <= today)
+    current[run_user[alive]] = lengths[alive]
+    return current, longest
+
+
+def active_days(data, today: int, days: int) -> np.ndarray:
+    # 최근 days 일 (오늘 포함) 중 운동한 날 수
+    mask = (data["day"] > today - days) & (data["day"] <= today)
+    user, day = data["user"][mask], data["day"][mask]
+    first_of_day = np.ones(len(day), dtype=bool)
+    first_of_day[1:] = (user[1:] != user[:-1]) | (day[1:] != day[:-1])
+    return np.bincount(user[first_of_day], minlength=_n_users(data))
+
+
+def load_ratio(data, today: int) -> dict:
+    """최근 7일 부하 / 최근 28일 주 평균 부하 (acute:chronic). 28일 기록이 없으면 ratio 는 NaN."""
+    day, load = data["day"], data["load"]
+    acute = _user_sum(data, (day > today - ACUTE_DAYS) & (day <= today), load)
+    chronic_total = _user_sum(data, (day > today - CHRONIC_DAYS) & (day <= today), load)
+    chronic = chronic_total * ACUTE_DAYS / CHRONIC_DAYS
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(chronic > 0, acute / chronic, np.nan)
+    return {"acute": acute, "chronic": chronic, "ratio": ratio}
+
+
+def trend_slopes(data, today: int, weeks: int = TREND_WEEKS) -> dict:
+    """운동별 주간 운동량의 최소제곱 기울기 (원래 단위 / 주). 배열 모양은 (사용자 수, 운동 수).
+
+    최근 weeks*7 일을 오늘 기준 7일씩 자른 구간 x = 0..weeks-1 에서 y = 그 구간 운동량.
+    sum(x - x̄) = 0 이라 기울기 = Σ (x - x̄) y / Σ (x - x̄)² 이고, 기록이 없는 주(y = 0)는
+    더할 것이 없으므로 행마다 (x - x̄) * 양 을 더하기만 하면 된다.
+    mean 은 같은 구간의 주 평균 운동량.
+    """
+    n_users, n_ex = _n_users(data), max(len(data["exercises"]), 1)
+    start = today - weeks * 7 + 1
+    mask = (data["day"] >= start) & (data["day"] <= today)
+    x = (data["day"][mask] - start) // 7
+    x_centered = x - (weeks - 1) / 2
+    sxx = (weeks ** 3 - weeks) / 12
+    cell = data["user"][mask] * n_ex + data["exercise"][mask]
+    amount = data["amount"][mask]
+    size = n_users * n_ex
+    slope = np.bincount(cell, weights=x_centered * amount, minlength=size) / sxx if sxx else np.zeros(size)
+    mean = np.bincount(cell, weights=amount, minlength=size) / weeks
+    return {"slope": slope.reshape(n_users, n_ex), "mean": mean.reshape(n_users, n_ex)}
+
+
+def period_volume(data, period: str = "week") -> pd.DataFrame:
+    """사용자 / 기간 / 운동별 운동량(원래 단위)과 부하(분).
+
+    period: "week" (월요일 시작) 또는 "month". 열: user, period_start, exercise, unit, amount, load
+    """
+    if period == "week":
+        # 1970-01-01 은 목요일 → 3일 당기면 월요일 시작 주
+        bucket = (data["day"] + 3) // 7
+        bucket_start = bucket * 7 - 3
+    elif period == "month":
+        bucket = data["day"].astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        bucket_start = bucket.astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    else:
+        raise ValueError(f"period 는 week / month: {period!r}")
+    n_ex = max(len(data["exercises"]), 1)
+    key = (data["user"] * (bucket.max() + 1 if len(bucket) else 1) + bucket) * n_ex + data["exercise"]
+    keys, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+    exercise = data["exercise"][first]
+    # 이름 열은 코드 그대로 Categorical 로 (수백만 행에 문자열을 만들지 않는다)
+    unit_names, unit_codes = np.unique(np.asarray(data["units"] or [""], dtype=object), return_inverse=True)
+    return pd.DataFrame({
+        "user": pd.Categorical.from_codes(data["user"][first], categories=data["users"] or [""]),
+        "period_start": bucket_start[first].astype("datetime64[D]"),
+        "exercise": pd.Categorical.from_codes(exercise, categories=data["exercises"] or [""]),
+        "unit": pd.Categorical.from_codes(unit_codes[exercise], categories=unit_names),
+        "amount": np.bincount(inverse, weights=data["amount"], minlength=len(keys)),
+        "load": np.bincount(inverse, weights=data["load"], minlength=len(keys)),
+    })
+
+
+def summarize(data, today: int) -> pd.DataFrame:
+    """사용자별 한 줄 요약 (야간 집계용). index = 사용자 이름.
+
+    열: current_streak, longest_streak, active_days_30, load_7, load_28, load_ratio, history_days, top_exercise
+    (history_days = 첫 기록부터 오늘까지 일수. 28일이 안 되면 load_ratio 는 아직 믿기 어렵다.
+     top_exercise = active_days_30 과 같은 최근 30일 동안 부하가 가장 큰 운동, 부하가 없으면 운동한 날이
+     가장 많은 운동. 그 기간에 기록이 없으면 None)
+    """
+    n_users, n_ex = _n_users(data), max(len(data["exercises"]), 1)
+    current, longest = streaks(data, today)
+    ratio = load_ratio(data, today)
+    mask = (data["day"] > today - ACTIVE_DAYS) & (data["day"] <= today)
+    cell = data["user"][mask] * n_ex + data["exercise"][mask]
+    per_ex_load = np.bincount(cell, weights=data["load"][mask], minlength=n_users * n_ex).reshape(n_users, n_ex)
+    per_ex_days = np.bincount(cell, minlength=n_users * n_ex).reshape(n_users, n_ex)
+    # 부하가 같으면(0 포함) 운동한 날이 많은 쪽
+    top = np.lexsort((per_ex_days, per_ex_load), axis=-1)[:, -1] if n_users else np.zeros(0, dtype=int)
+    has_any = per_ex_days.sum(axis=1) > 0
+    names = np.asarray(data["exercises"] or [None], dtype=object)
+    # 사용자별 첫 행 = 가장 이른 날 (사용자 → 날짜 순으로 정렬돼 있다)
+    history_days = np.zeros(n_users, dtype=np.int64)
+    if len(data["user"]):
+        first = np.flatnonzero(np.r_[True, data["user"][1:] != data["user"][:-1]])
+        history_days[data["user"][first]] = today - data["day"][first] + 1
+    return pd.DataFrame(
+        {
+            "current_streak": current,
+            "longest_streak": longest,
+            "active_days_30": active_days(data, today, ACTIVE_DAYS),
+            "load_7": ratio["acute"],
+            "load_28": ratio["chronic"] * CHRONIC_DAYS / ACUTE_DAYS,
+            "load_ratio": ratio["ratio"],
+            "history_days": history_days,
+            "top_exercise": np.where(has_any, names[top], None),
+        },
+        index=pd.Index(data["users"], name="username"),
+    )
+
+
+# -------------------------
+# 한 사용자 화면용
+# -------------------------
+def user_report(rows, today=None) -> dict:
+    """한 사용자의 (log_date, exercise, amount) 행 → 인사말 / 요약 탭에서 쓰는 dict.
+
+    summary: summarize 한 줄(dict), weekly: 최근 TREND_WEEKS 주의 주별 운동량 DataFrame,
+    exercises: 운동별 최근 28일 양 / 단위 / 주간 추세 DataFrame
+    """
+    today = day_number(today or date.today())
+    data = training_data_from_rows([("", d, e, a) for d, e, a in rows])
+    if not data["users"]:
+        return {"summary": None, "weekly": None, "exercises": None}
+
+    summary = summarize(data, today).iloc[0].to_dict()
+    weekly = period_volume(data, "week")
+    weekly = weekly[weekly["period_start"] > np.datetime64(day_date(today - TREND_WEEKS * 7), "D")]
+
+    trend = trend_slopes(data, today)
+    recent = (data["day"] > today - CHRONIC_DAYS) & (data["day"] <= today)
+    amount_28 = np.bincount(data["exercise"][recent], weights=data["amount"][recent],
+                            minlength=len(data["exercises"]))
+    exercises = pd.DataFrame({
+        "exercise": data["exercises"],
+        "unit": data["units"],
+        "amount_28": amount_28,
+        "weekly_mean": trend["mean"][0],
+        "weekly_slope": trend["slope"][0],
+    })
+    return {"summary": summary, "weekly": weekly.drop(columns="user"), "exercises": exercises}
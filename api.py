@@ -0,0 +1,268 @@
+import base64
+import binascii
+import contextlib
+import hmac
+import json
+import os
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+import db
+import jobqueue
+import metrics
+import service
+
+# =========================
+# 코치 HTTP API (ASGI, Streamlit 없이)
+# =========================
+# 상태는 전부 db(SQLite WAL)에 있으므로 워커를 여러 개 띄워도 된다:
+#
+#     python -m api --workers 4 --port 8000
+#     uvicorn api:app --workers 4 --port 8000
+#     FITNESS_API_URL=http://127.0.0.1:8000 streamlit run app.py   # 화면은 이 API 만 부른다
+#
+# 인증은 HTTP Basic (닉네임 / 비밀번호, 화면 로그인과 같은 users 테이블).
+#   POST /api/signup                      {"username", "password"} → 201 / 409
+#   POST /api/login                       → {"profile"} / 401 {"error": "no_user" | "bad_password"}
+#   POST /api/chat/start                  → {"messages"} (첫 인사만 있는 새 대화)
+#   GET  /api/chat                        → {"messages"}
+#   POST /api/chat                        {"message"} → {"reply", "fallback", "profile", ...} / 409 동시 턴
+#   POST /api/chat/jobs                   {"message"} → 202 {"id"} (작업 큐에 넣고 바로 돌아온다, jobqueue.py)
+#   GET  /api/chat/jobs                   → {"jobs"} 아직 끝나지 않은 턴
+#   GET  /api/chat/jobs/{id}              → 작업 (status / partial / result / error / ahead)
+#   DELETE /api/chat/jobs/{id}            → {"cancelled"}
+#   POST /api/logs                        {"log_date", "exercise", "amount"} → 201
+#   POST /api/logs/import?filename=       본문 = CSV / JSONL 파일 → log_import 결과
+#   GET  /api/logs?page_size&after&exercise&since&until → {"rows", "next_cursor", "total"}
+#   GET  /api/summary                     → {"summary", "weekly", "exercises"}
+#   GET  /api/rank?window&exercise        → service.rank_info
+#   GET  /metrics                         Prometheus 텍스트 (metrics.py)
+# 워커(프로세스)마다 LLM 속도 제한(FITNESS_LLM_RPM / TPM)을 따로 지키므로 워커 수로 나눠서 준다.
+# 순위표는 워커마다 따로 들고 있다. 다른 워커의 기록은 FITNESS_LEADERBOARD_SYNC_SEC(기본 1초)마다 logs 에서
+# 따라잡고, 프로필(연령대 / 성별) 변경은 FITNESS_LEADERBOARD_MAX_AGE_SEC 마다 다시 만들 때 반영된다.
+# 대화 턴 작업 워커도 워커마다 FITNESS_CHAT_WORKERS 개씩 뜬다 (0 이면 python -m jobqueue 로 따로).
+API_HOST = os.environ.get("FITNESS_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("FITNESS_API_PORT", "8000"))
+MAX_PAGE_SIZE = 200
+MAX_IMPORT_BYTES = 20 * 1024 * 1024
+
+
+def error(status: int, message: str, **extra) -> JSONResponse:
+    return JSONResponse({"error": message, **extra}, status_code=status)
+
+
+def _credentials(request):
+    header = request.headers.get("authorization", "")
+    if not header.lower().startswith("basic "):
+        return None, None
+    try:
+        username, _, password = base64.b64decode(header[6:]).decode("utf-8").partition(":")
+    except (binascii.Error, UnicodeDecodeError):
+        return None, None
+    return username, password
+
+
+def authenticated(handler):
+    # HTTP Basic 확인 후 handler(request, username). 실패하면 401
+    async def wrapper(request):
+        username, password = _credentials(request)
+        if not username:
+            return error(401, "unauthorized")
+        row = await run_in_threadpool(db.get_user, username)
+        if row is None or not hmac.compare_digest(row[1].encode(), password.encode()):
+            return error(401, "unauthorized")
+        return await handler(request, username)
+
+    return wrapper
+
+
+async def _json_body(request) -> dict:
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise ValueError("JSON 본문이 필요해")
+    if not isinstance(body, dict):
+        raise ValueError("JSON 객체가 필요해")
+    return body
+
+
+def report_to_json(report: dict) -> dict:
+    # analytics.user_report 의 DataFrame 들 → JSON (NaN 은 null)
+    if report["summary"] is None:
+        return {"summary": None, "weekly": [], "exercises": []}
+    import pandas as pd
+
+    return {
+        "summary": json.loads(pd.Series(report["summary"], dtype=object).to_json()),
+        "weekly": json.loads(report["weekly"].to_json(orient="records", date_format="iso")),
+        "exercises": json.loads(report["exercises"].to_json(orient="records")),
+    }
+
+
+# =========================
+# 엔드포인트
+# =========================
+async def health(request):
+    return JSONResponse({"ok": True, "pid": os.getpid()})
+
+
+async def prometheus(request):
+    return PlainTextResponse(metrics.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+
+async def signup(request):
+    body = await _json_body(request)
+    username, password = str(body.get("username", "")).strip(), str(body.get("password", ""))
+    if not username or not password:
+        return error(400, "username / password 가 필요해")
+    if not await run_in_threadpool(service.signup, username, password):
+        return error(409, "이미 존재하는 닉네임")
+    return JSONResponse({"username": username}, status_code=201)
+
+
+async def login(request):
+    username, password = _credentials(request)
+    if not username:
+        return error(401, "unauthorized")
+    status, profile = await run_in_threadpool(service.login, username, password)
+    if status != "ok":
+        return error(401, status)
+    return JSONResponse({"profile": profile})
+
+
+@authenticated
+async def chat_start(request, username):
+    return JSONResponse({"messages": await run_in_threadpool(service.start_chat, username)})
+
+
+@authenticated
+async def chat(request, username):
+    if request.method == "GET":
+        return JSONResponse({"messages": await run_in_threadpool(service.get_chat, username)})
+    body = await _json_body(request)
+    try:
+        result = await run_in_threadpool(service.chat_turn, username, str(body.get("message", "")))
+    except service.ChatConflict:
+        return error(409, "같은 사용자의 다른 메시지를 처리하는 중이야. 잠시 후 다시 보내줘")
+    return JSONResponse(result)
+
+
+@authenticated
+async def chat_jobs(request, username):
+    if request.method == "GET":
+        return JSONResponse({"jobs": await run_in_threadpool(service.pending_turns, username)})
+    body = await _json_body(request)
+    job_id = await run_in_threadpool(service.enqueue_turn, username, str(body.get("message", "")))
+    return JSONResponse({"id": job_id}, status_code=202)
+
+
+@authenticated
+async def chat_job(request, username):
+    job_id = request.path_params["job_id"]
+    if request.method == "DELETE":
+        return JSONResponse({"cancelled": await run_in_threadpool(service.cancel_turn, username, job_id)})
+    job = await run_in_threadpool(service.get_turn, username, job_id)
+    if job is None:
+        return error(404, "not found")
+    return JSONResponse(job)
+
+
+@authenticated
+async def logs(request, username):
+    if request.method == "POST":
+        body = await _json_body(request)
+        await run_in_threadpool(
+            service.add_log, username, str(body.get("log_date", "")), body.get("exercise"), body.get("amount")
+        )
+        return JSONResponse({"ok": True}, status_code=201)
+    q = request.query_params
+    page_size = min(MAX_PAGE_SIZE, max(1, int(q.get("page_size", 50))))
+    rows, next_cursor, total = await run_in_threadpool(
+        service.history_page, username, page_size, service.decode_cursor(q.get("after")),
+        q.get("exercise") or None, q.get("since") or None, q.get("until") or None,
+    )
+    return JSONResponse({
+        "rows": [
+            {"id": r[0], "log_date": r[1], "exercise": r[2], "amount": r[3], "created_at": r[4]} for r in rows
+        ],
+        "next_cursor": service.encode_cursor(next_cursor),
+        "total": total,
+    })
+
+
+@authenticated
+async def logs_import(request, username):
+    import io
+
+    body = await request.body()
+    if len(body) > MAX_IMPORT_BYTES:
+        return error(413, "파일이 너무 커")
+    report = await run_in_threadpool(
+        service.import_logs, username, io.BytesIO(body), request.query_params.get("filename")
+    )
+    return JSONResponse(report)
+
+
+@authenticated
+async def summary(request, username):
+    report = await run_in_threadpool(service.training_report, username)
+    return JSONResponse(report_to_json(report))
+
+
+@authenticated
+async def rank(request, username):
+    q = request.query_params
+    window = q.get("window", "week")
+    if window not in ("week", "month"):
+        return error(400, "window 는 week / month")
+    return JSONResponse(await run_in_threadpool(service.rank_info, username, window, q.get("exercise")))
+
+
+async def bad_request(request, exc):
+    return error(400, str(exc))
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    db.ensure_schema()
+    metrics.start_exporters()
+    jobqueue.start_workers()
+    yield
+    jobqueue.stop_workers()
+
+
+app = Starlette(
+    routes=[
+        Route("/healthz", health),
+        Route("/metrics", prometheus),
+        Route("/api/signup", signup, methods=["POST"]),
+        Route("/api/login", login, methods=["POST"]),
+        Route("/api/chat/start", chat_start, methods=["POST"]),
+        Route("/api/chat", chat, methods=["GET", "POST"]),
+        Route("/api/chat/jobs", chat_jobs, methods=["GET", "POST"]),
+        Route("/api/chat/jobs/{job_id:int}", chat_job, methods=["GET", "DELETE"]),
+        Route("/api/logs", logs, methods=["GET", "POST"]),
+        Route("/api/logs/import", logs_import, methods=["POST"]),
+        Route("/api/summary", summary),
+        Route("/api/rank", rank),
+    ],
+    exception_handlers={ValueError: bad_request},
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="코치 HTTP API")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    # 워커가 여러 개면 uvicorn 이 "api:app" 을 워커마다 import 한다
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers, log_level="warning")
@@ -0,0 +1,105 @@
+import requests
+
+import service
+
+# =========================
+# HTTP API 클라이언트 (api.py)
+# =========================
+# service 모듈과 같은 이름 / 같은 반환 모양의 메서드라서 ui 는 둘 중 무엇이든 backend() 로 받아 쓴다.
+# 로그인 / 가입에 쓴 닉네임 / 비밀번호를 들고 있다가 요청마다 HTTP Basic 으로 보낸다.
+# 스트리밍(on_text)과 api_key 는 받기만 하고 쓰지 않는다 (답은 한 번에 받고, 키는 서버 쪽 설정).
+# 화면의 secrets.toml OPENAI_API_KEY 도 API 서버로 가지 않으므로 키는 API 서버의 OPENAI_API_KEY 로 준다.
+TIMEOUT_SEC = 120
+
+
+class CoachAPI:
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        self.http = requests.Session()
+
+    def _request(self, method: str, path: str, **kwargs):
+        resp = self.http.request(method, self.base_url + path, timeout=TIMEOUT_SEC, **kwargs)
+        if resp.status_code == 400:
+            raise ValueError(resp.json().get("error"))
+        if resp.status_code == 409 and path == "/api/chat":
+            raise service.ChatConflict(resp.json().get("error"))
+        resp.raise_for_status()
+        return resp.json()
+
+    # ----- 계정 -----
+    def signup(self, username: str, password: str) -> bool:
+        resp = self.http.post(
+            self.base_url + "/api/signup", json={"username": username, "password": password}, timeout=TIMEOUT_SEC
+        )
+        if resp.status_code == 409:
+            return False
+        resp.raise_for_status()
+        self.http.auth = (username, password)
+        return True
+
+    def login(self, username: str, password: str):
+        resp = self.http.post(self.base_url + "/api/login", auth=(username, password), timeout=TIMEOUT_SEC)
+        if resp.status_code == 401:
+            return resp.json().get("error", "bad_password"), None
+        resp.raise_for_status()
+        self.http.auth = (username, password)
+        return "ok", resp.json()["profile"]
+
+    # ----- 대화 -----
+    def start_chat(self, username: str) -> list:
+        return self._request("POST", "/api/chat/start")["messages"]
+
+    def get_chat(self, username: str) -> list:
+        return self._request("GET", "/api/chat")["messages"]
+
+    def chat_turn(self, username: str, text: str, on_text=None, api_key: str = None) -> dict:
+        # on_text / api_key 는 service.chat_turn 과 모양을 맞추려고 받을 뿐 무시한다 (위 설명)
+        return self._request("POST", "/api/chat", json={"message": text})
+
+    def enqueue_turn(self, username: str, text: str) -> int:
+        return self._request("POST", "/api/chat/jobs", json={"message": text})["id"]
+
+    def get_turn(self, username: str, job_id: int):
+        resp = self.http.get(f"{self.base_url}/api/chat/jobs/{job_id}", timeout=TIMEOUT_SEC)
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        return resp.json()
+
+    def pending_turns(self, username: str) -> list:
+        return self._request("GET", "/api/chat/jobs")["jobs"]
+
+    def cancel_turn(self, username: str, job_id: int) -> bool:
+        return self._request("DELETE", f"/api/chat/jobs/{job_id}")["cancelled"]
+
+    # ----- 기록 -----
+    def add_log(self, username: str, log_date: str, exercise: str, amount: int):
+        self._request("POST", "/api/logs", json={"log_date": log_date, "exercise": exercise, "amount": amount})
+
+    def import_logs(self, username: str, fileobj, filename: str = None) -> dict:
+        return self._request("POST", "/api/logs/import", params={"filename": filename or ""}, data=fileobj.read())
+
+    def history_page(self, username: str, page_size: int = 50, after=None, exercise=None, since=None, until=None):
+        params = {"page_size": page_size, "after": service.encode_cursor(after),
+                  "exercise": exercise, "since": since, "until": until}
+        body = self._request("GET", "/api/logs", params={k: v for k, v in params.items() if v is not None})
+        rows = [(r["id"], r["log_date"], r["exercise"], r["amount"], r["created_at"]) for r in body["rows"]]
+        return rows, service.decode_cursor(body["next_cursor"]), body["total"]
+
+    def training_report(self, username: str) -> dict:
+        # JSON → analytics.user_report 와 같은 모양 (summary dict + weekly / exercises DataFrame)
+        import pandas as pd
+
+        body = self._request("GET", "/api/summary")
+        if body["summary"] is None:
+            return {"summary": None, "weekly": None, "exercises": None}
+        weekly = pd.DataFrame(body["weekly"])
+        if not weekly.empty:
+            weekly["period_start"] = pd.to_datetime(weekly["period_start"])
+        return {"summary": body["summary"], "weekly": weekly, "exercises": pd.DataFrame(body["exercises"])}
+
+    def rank_info(self, username: str, window: str = "week", exercise: str = None) -> dict:
+        params = {"window": window}
+        if exercise:
+            params["exercise"] = exercise
+        return self._request("GET", "/api/rank", params=params)
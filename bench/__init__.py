@@ -0,0 +1 @@
+# 벤치마크 스크립트 모음. 저장소 루트에서 `python -m bench.<이름>` 으로 실행한다.
@@ -0,0 +1,113 @@
+"""운동 기록 분석(analytics.py): 전체 사용자 한 번에 (야간 집계) — 합성 1000만 행.
+
+    python -m bench.analytics --rows 10000000 --users 100000
+
+먼저 작은 데이터로 사용자별 파이썬 / pandas 계산과 결과가 같은지 확인하고,
+그다음 큰 데이터에서 단계별 시간을 잰다.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import analytics
+from bench.synthetic import LOG_EXERCISES, synthetic_training_logs
+
+
+def build(user, day, exercise, amount, n_users):
+    return analytics.build_training_data(
+        user, day, exercise, amount, [f"user{i}" for i in range(n_users)], LOG_EXERCISES
+    )
+
+
+# -------------------------
+# 비교 기준: 사용자마다 따로 (느리지만 뻔한 방식)
+# -------------------------
+def naive_streaks(days, today):
+    days = sorted(set(days))
+    longest = run = 0
+    prev = None
+    for d in days:
+        run = run + 1 if prev is not None and d == prev + 1 else 1
+        longest = max(longest, run)
+        prev = d
+    current = run if days and today - 1 <= days[-1] <= today else 0
+    return current, longest
+
+
+def check(n_rows, n_users, today):
+    user, day, exercise, amount = synthetic_training_logs(n_rows, n_users, days=200, seed=1, end_day=today)
+    data = build(user, day, exercise, amount, n_users)
+    current, longest = analytics.streaks(data, today)
+    ratio = analytics.load_ratio(data, today)
+    trend = analytics.trend_slopes(data, today)
+    summary = analytics.summarize(data, today)
+
+    df = pd.DataFrame({"user": user, "day": day, "exercise": exercise, "amount": amount.astype(float)})
+    minutes = np.array([analytics.exercise_unit(e)[1] for e in LOG_EXERCISES])
+    df["load"] = np.nan_to_num(df["amount"] * minutes[df["exercise"]])
+    for u, g in df.groupby("user"):
+        assert (current[u], longest[u]) == naive_streaks(g["day"].tolist(), today), u
+        acute = g.loc[g["day"] > today - 7, "load"].sum()
+        chronic = g.loc[g["day"] > today - 28, "load"].sum() / 4
+        assert np.isclose(ratio["acute"][u], acute) and np.isclose(ratio["chronic"][u], chronic), u
+        assert summary["active_days_30"].iloc[u] == g.loc[g["day"] > today - 30, "day"].nunique()
+        load_30 = g[g["day"] > today - 30].groupby("exercise")["load"].sum()
+        if len(load_30) and load_30.max() > 0:
+            # 부하가 같은 운동끼리는 운동한 날 수로 고르므로 그중 하나면 된다
+            tied = load_30.index[np.isclose(load_30, load_30.max())]
+            assert summary["top_exercise"].iloc[u] in [LOG_EXERCISES[e] for e in tied], u
+        # 주별 운동량 8개(빈 주는 0)에 np.polyfit
+        recent = g[g["day"] > today - 56]
+        for e, ge in recent.groupby("exercise"):
+            weekly = np.bincount((ge["day"] - (today - 55)) // 7, weights=ge["amount"], minlength=8)
+            slope = np.polyfit(np.arange(8), weekly, 1)[0]
+            assert np.isclose(trend["slope"][u, e], slope), (u, e)
+
+    weekly = analytics.period_volume(data, "week")
+    monday = pd.to_datetime(df["day"], unit="D").dt.to_period("W-SUN").dt.start_time
+    expected = df.assign(week=monday).groupby(["user", "week", "exercise"])["amount"].sum()
+    assert len(weekly) == len(expected) and np.isclose(weekly["amount"].sum(), expected.sum())
+    got = weekly.set_index([weekly["user"].cat.codes, "period_start", weekly["exercise"].cat.codes])["amount"]
+    assert np.allclose(got.sort_index().to_numpy(), expected.sort_index().to_numpy())
+    print(f"check: {n_rows} rows / {n_users} users match per-user pandas / python")
+
+
+def timed(label, fn, rows):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:7.2f} s  {rows / elapsed / 1e6:7.1f} M rows/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--check-rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    today = analytics.day_number(np.datetime64("today", "D"))
+    check(args.check_rows, 2000, today)
+
+    start = time.perf_counter()
+    user, day, exercise, amount = synthetic_training_logs(args.rows, args.users, args.days, end_day=today)
+    print(f"generated {args.rows} log rows for {args.users} users in {time.perf_counter() - start:.1f} s")
+
+    data = timed("aggregate (user, day, ex)", lambda: build(user, day, exercise, amount, args.users), args.rows)
+    n = len(data["day"])
+    print(f"  -> {n} (user, day, exercise) rows")
+    timed("streaks", lambda: analytics.streaks(data, today), n)
+    timed("load ratio 7/28", lambda: analytics.load_ratio(data, today), n)
+    timed("trend slopes (8 weeks)", lambda: analytics.trend_slopes(data, today), n)
+    timed("weekly volume", lambda: analytics.period_volume(data, "week"), n)
+    timed("monthly volume", lambda: analytics.period_volume(data, "month"), n)
+    summary = timed("summarize (all users)", lambda: analytics.summarize(data, today), n)
+    print(summary.describe().loc[["mean", "50%", "max"]].round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""HTTP API(api.py) 처리량: uvicorn 워커 수별 req/s 와 엔드포인트별 p50 / p95.
+
+    python -m bench.api_throughput --workers 1,4,8 --duration 20 --concurrency 32
+
+- 임시 DB 에 사용자 / 기록을 만들어 두고, 워커 수마다 `python -m api --workers N` 을 새로 띄운다.
+  워커마다 처음 한 번 드는 비용(import, 순위표 만들기)은 --warmup 초 동안 같은 부하를 보내 빼고 잰다
+- LLM 은 로컬 mock OpenAI 서버 (bench.mock_openai, 부하 스레드와 GIL 을 나누지 않게 별도 프로세스),
+  답 캐시는 끔 (FITNESS_LLM_CACHE=0)
+- 부하: 클라이언트 스레드마다 자기 사용자들만 맡아서 (같은 사용자 턴이 겹쳐 409 가 나지 않게)
+  chat / log / history / summary / rank 를 --mix 비율로 섞어 보낸다
+주의:
+- 워커는 프로세스라서 CPU 수 이상으로는 CPU 쓰는 부분(프롬프트 조립, 요약 계산, JSON)이 늘지 않는다.
+  1 vCPU 에서는 워커를 늘려도 LLM 을 기다리는 시간이 겹치는 만큼만 빨라진다
+- LLM 속도 제한은 워커마다 따로라서 FITNESS_LLM_RPM / TPM 을 워커 수로 나눠 준다 (--llm-rpm / --llm-tpm 이 전체 한도).
+  기본 TPM(200k)이면 한 워커가 초당 3~4턴에서 막히므로 여기서는 넉넉히 준다
+- 부하 클라이언트도 같은 기계에서 돌기 때문에 CPU 가 적으면 클라이언트 몫만큼 서버가 덜 받는다
+- 순위표는 워커마다 따로 들고 있어 다른 워커의 기록은 FITNESS_LEADERBOARD_SYNC_SEC 마다 따라잡는다
+"""
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import requests
+
+from bench.synthetic import synthetic_users
+
+ENDPOINTS = ("chat", "log", "history", "summary", "rank")
+CHAT_TEXTS = ["24살 남자야, 스쿼트 30개 했어", "오늘 뭐하지", "하체 루틴 짜줘", "달리기 20분 했어", "무릎이 좀 아파"]
+EXERCISES = ["팔굽혀펴기", "스쿼트", "달리기(분)", "플랭크(초)"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def seed_db(path, users, days):
+    import db
+    import service
+
+    db.configure(path=path)
+    db.init_db()
+    people = synthetic_users(users, seed=7)
+    today = date.today()
+    rng = random.Random(7)
+    for person in people:
+        service.signup(person["username"], person["password"])
+        db.update_user_profile(person["username"], person["profile"])
+        db.bulk_insert_logs(person["username"], [
+            ((today - timedelta(days=d)).isoformat(), rng.choice(EXERCISES), rng.randint(5, 60))
+            for d in range(days) if rng.random() < 0.6
+        ])
+    return people
+
+
+def start_process(args, ready_url, env=None):
+    # 서버 프로세스를 띄우고 ready_url 이 응답할 때까지 기다린다 (응답 코드는 상관없음)
+    proc = subprocess.Popen(args, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            requests.get(ready_url, timeout=1)
+            return proc
+        except requests.ConnectionError:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"서버가 뜨지 않았어: {' '.join(args)}")
+
+
+def stop_process(proc):
+    proc.terminate()
+    proc.wait(timeout=30)
+
+
+def client_loop(base_url, people, mix, stop_at, samples, statuses, lock, seed):
+    rng = random.Random(seed)
+    names, weights = zip(*mix.items())
+    http = requests.Session()
+    while time.monotonic() < stop_at:
+        person = rng.choice(people)
+        auth = (person["username"], person["password"])
+        op = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        if op == "chat":
+            resp = http.post(f"{base_url}/api/chat", auth=auth, json={"message": rng.choice(CHAT_TEXTS)})
+        elif op == "log":
+            resp = http.post(f"{base_url}/api/logs", auth=auth, json={
+                "log_date": date.today().isoformat(), "exercise": rng.choice(EXERCISES), "amount": rng.randint(5, 60),
+            })
+        elif op == "history":
+            resp = http.get(f"{base_url}/api/logs", auth=auth, params={"page_size": 50})
+        elif op == "summary":
+            resp = http.get(f"{base_url}/api/summary", auth=auth)
+        else:
+            resp = http.get(f"{base_url}/api/rank", auth=auth, params={"window": rng.choice(["week", "month"])})
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            samples[op].append(elapsed)
+            statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+
+def run_load(base_url, people, mix, concurrency, duration):
+    samples = {op: [] for op in ENDPOINTS}
+    statuses = {}
+    lock = threading.Lock()
+    # 클라이언트마다 겹치지 않는 사용자 묶음
+    groups = [people[i::concurrency] for i in range(concurrency)]
+    stop_at = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=client_loop, args=(base_url, group, mix, stop_at, samples, statuses, lock, i))
+        for i, group in enumerate(groups) if group
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, statuses, time.perf_counter() - start
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise SystemExit(f"알 수 없는 엔드포인트: {name} ({', '.join(ENDPOINTS)})")
+        mix[name] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default="1,4,8", help="쉼표로 구분한 uvicorn 워커 수")
+    parser.add_argument("--duration", type=float, default=20, help="워커 수마다 부하 시간 (초)")
+    parser.add_argument("--warmup", type=float, default=5, help="재기 전에 버리는 부하 시간 (초)")
+    parser.add_argument("--concurrency", type=int, default=32, help="동시 클라이언트 수")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--days", type=int, default=90, help="사용자마다 미리 넣어 둘 기록 기간")
+    parser.add_argument("--mix", default="chat=1,log=3,history=3,summary=2,rank=1")
+    parser.add_argument("--latency-ms", type=float, default=300, help="mock LLM 첫 응답 지연")
+    parser.add_argument("--token-ms", type=float, default=5)
+    parser.add_argument("--llm-rpm", type=float, default=6000, help="전체 LLM 분당 요청 한도 (워커 수로 나눔)")
+    parser.add_argument("--llm-tpm", type=float, default=10_000_000, help="전체 LLM 분당 토큰 한도 (워커 수로 나눔)")
+    parser.add_argument("--leaderboard-sync", type=float, default=1, help="FITNESS_LEADERBOARD_SYNC_SEC")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    mock_port = free_port()
+    mock_url = f"http://127.0.0.1:{mock_port}/v1"
+    mock = start_process(
+        [sys.executable, "-m", "bench.mock_openai", "--port", str(mock_port),
+         "--latency-ms", str(args.latency_ms), "--token-ms", str(args.token_ms)],
+        mock_url,
+    )
+    try:
+        results = run_all(args, mix, mock_url)
+    finally:
+        stop_process(mock)
+
+    header = f"{'workers':>7} {'req/s':>8}" + "".join(f" {op + ' p50/p95 ms':>22}" for op in ENDPOINTS)
+    print(header)
+    for workers, rps, samples, statuses in results:
+        line = f"{workers:>7} {rps:8.1f}"
+        for op in ENDPOINTS:
+            if samples[op]:
+                p50, p95 = np.percentile(samples[op], [50, 95])
+                line += f" {f'{p50:.0f} / {p95:.0f} (n={len(samples[op])})':>22}"
+            else:
+                line += f" {'-':>22}"
+        print(line + f"  status={dict(sorted(statuses.items()))}")
+
+
+def run_all(args, mix, mock_url):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "api_bench.db")
+        people = seed_db(db_path, args.users, args.days)
+        print(f"seeded {len(people)} users, cpu={os.cpu_count()}, mix={mix}")
+
+        results = []
+        for workers in [int(w) for w in args.workers.split(",")]:
+            env = dict(
+                os.environ,
+                FITNESS_DB_PATH=db_path,
+                FITNESS_LLM_CACHE="0",
+                OPENAI_API_KEY="sk-bench",
+                OPENAI_BASE_URL=mock_url,
+                FITNESS_LLM_RPM=str(args.llm_rpm / workers),
+                FITNESS_LLM_TPM=str(args.llm_tpm / workers),
+                FITNESS_LEADERBOARD_SYNC_SEC=str(args.leaderboard_sync),
+            )
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            proc = start_process(
+                [sys.executable, "-m", "api", "--port", str(port), "--workers", str(workers)],
+                f"{base_url}/healthz", env=env,
+            )
+            try:
+                if args.warmup:
+                    run_load(base_url, people, mix, args.concurrency, args.warmup)
+                samples, statuses, elapsed = run_load(base_url, people, mix, args.concurrency, args.duration)
+            finally:
+                stop_process(proc)
+            total = sum(len(v) for v in samples.values())
+            results.append((workers, total / elapsed, samples, statuses))
+            print(f"workers={workers}: {total / elapsed:.1f} req/s", flush=True)
+        return results
+
+
+if __name__ == "__main__":
+    main()
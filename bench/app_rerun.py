@@ -0,0 +1,124 @@
+"""Streamlit 화면: 첫 화면까지 / rerun 한 번 / 채팅 한 턴 시간 (streamlit.testing AppTest, 새 프로세스).
+
+    python -m bench.app_rerun --rows 200000
+    python -m bench.app_rerun --app /tmp/old/app.py     # 다른 체크아웃의 app.py 와 비교
+
+자식 프로세스마다 임시 폴더(합성 시설 CSV, 기준표 CSV, 빈 DB)에서 app.py 를 돌린다.
+  - first paint: 새 프로세스에서 첫 실행 (로그인 화면, 모듈 import 포함)
+  - rerun: 로그인한 뒤 아무 입력 없이 다시 실행한 시간의 중앙값
+  - chat: 지역 없는 메시지 / 지역 있는 메시지 한 턴 (mock OpenAI 서버 상대로)
+그리고 각 시점에 시설 표가 로드돼 있었는지 같이 찍는다.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from bench.synthetic import synthetic_facility_table
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, os, statistics, sys, time
+from bench.mock_openai import start_mock_server
+server, _, base_url = start_mock_server(rpm=0, latency_ms=0, token_ms=0)
+os.environ["OPENAI_BASE_URL"] = base_url
+from streamlit.testing.v1 import AppTest
+
+app_path, reruns = sys.argv[1], int(sys.argv[2])
+result = {}
+
+
+def timed(name, fn):
+    start = time.perf_counter()
+    fn()
+    result[name] = (time.perf_counter() - start) * 1000
+    assert not at.exception, at.exception
+
+
+def facility_loaded():
+    module = sys.modules.get("facilities")
+    return bool(module is not None and module._default_index)
+
+
+at = AppTest.from_file(app_path, default_timeout=120)
+at.secrets["OPENAI_API_KEY"] = "sk-test"
+timed("first_paint_ms", at.run)
+result["facility_after_first_paint"] = facility_loaded()
+
+at.sidebar.radio[0].set_value("회원가입").run()
+at.sidebar.text_input[0].input("bench"); at.sidebar.text_input[1].input("pw")
+at.sidebar.button[0].click().run()
+at.sidebar.radio[0].set_value("로그인").run()
+timed("login_ms", at.sidebar.button[0].click().run)
+
+times = []
+for _ in range(reruns):
+    start = time.perf_counter()
+    at.run()
+    times.append((time.perf_counter() - start) * 1000)
+result["rerun_ms"] = statistics.median(times)
+
+timed("chat_no_location_ms", at.chat_input[0].set_value("오늘 스쿼트 20개 했어").run)
+result["facility_after_chat_no_location"] = facility_loaded()
+timed("chat_location_ms", at.chat_input[0].set_value("마포구 대흥동 살아").run)
+result["facility_after_chat_location"] = facility_loaded()
+print(json.dumps(result))
+server.shutdown()
+"""
+
+
+def run_child(app_path, workdir, reruns):
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join([os.path.dirname(os.path.abspath(app_path)), REPO]),
+        FITNESS_DB_PATH=os.path.join(workdir, "fitness.db"),
+        FITNESS_LLM_CACHE_PATH=os.path.join(workdir, "llm_cache.db"),
+        FITNESS_DATA_CACHE_DIR=os.path.join(workdir, "cache"),
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, os.path.abspath(app_path), str(reruns)],
+        env=env, cwd=workdir, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app", default=os.path.join(REPO, "app.py"))
+    parser.add_argument("--rows", type=int, default=200_000, help="합성 시설 표 행 수")
+    parser.add_argument("--runs", type=int, default=3, help="새 프로세스 반복 횟수 (중앙값)")
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic_facility_table(args.rows, coords=True).to_csv(
+            os.path.join(tmp, "전국체육시설_전체데이터.csv"), index=False
+        )
+        shutil.copy(os.path.join(REPO, "norm_table_202505_all_filtered.csv"), tmp)
+
+        results = []
+        # 첫 번째 자식은 데이터 캐시(.datacache)를 만드는 몫이라 버린다
+        for i in range(args.runs + 1):
+            for name in ("fitness.db", "fitness.db-wal", "fitness.db-shm", "llm_cache.db"):
+                path = os.path.join(tmp, name)
+                if os.path.exists(path):
+                    os.remove(path)
+            result = run_child(args.app, tmp, args.reruns)
+            if i:
+                results.append(result)
+
+    print(f"{args.app} ({args.rows} facility rows, median of {args.runs} processes)")
+    for key in results[0]:
+        values = [r[key] for r in results]
+        if isinstance(values[0], bool):
+            print(f"{key:<34} {values[0]}")
+        else:
+            print(f"{key:<34} {sorted(values)[len(values) // 2]:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
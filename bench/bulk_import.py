@@ -0,0 +1,108 @@
+"""기록 쓰기 처리량: 한 건씩 커밋 vs 파일 일괄 가져오기 vs 묶음 커밋(group commit).
+
+    python -m bench.bulk_import --rows 1 10000 1000000
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import db
+from log_import import import_logs
+
+EXERCISES = ["팔굽혀펴기", "윗몸일으키기", "스쿼트", "달리기(분)", "턱걸이", "플랭크(초)"]
+# 한 건씩 커밋하는 경로는 이 이상이면 너무 오래 걸려서 건너뛴다
+SINGLE_INSERT_LIMIT = 20000
+
+
+def synthetic_rows(n):
+    today = date.today()
+    for i in range(n):
+        yield (today - timedelta(days=i % 3650)).isoformat(), EXERCISES[i % 6], 1 + i % 100
+
+
+def write_csv(path, n):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("log_date,exercise,amount\n")
+        for row in synthetic_rows(n):
+            f.write("%s,%s,%d\n" % row)
+
+
+def fresh_db(tmp, name):
+    db.configure(path=os.path.join(tmp, name))
+    db.init_db()
+
+
+def bench_single(n):
+    start = time.perf_counter()
+    for log_date, exercise, amount in synthetic_rows(n):
+        db.insert_log("single", log_date, exercise, amount)
+    return n / (time.perf_counter() - start)
+
+
+def bench_import(path, n):
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        report = import_logs("bulk", f, fmt="csv")
+    assert report["inserted"] == n, report
+    return n / (time.perf_counter() - start)
+
+
+def bench_concurrent(n, threads, group_commit):
+    # 여러 세션이 동시에 insert_log 를 부르는 상황
+    db.set_group_commit(group_commit)
+    rows = list(synthetic_rows(n))
+    chunks = [rows[t::threads] for t in range(threads)]
+
+    def worker(tid):
+        for log_date, exercise, amount in chunks[tid]:
+            db.insert_log(f"user{tid}", log_date, exercise, amount)
+
+    ts = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    elapsed = time.perf_counter() - start
+    db.set_group_commit(False)
+    return n / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 10000, 1000000])
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.rows:
+            csv_path = os.path.join(tmp, f"rows_{n}.csv")
+            write_csv(csv_path, n)
+
+            fresh_db(tmp, f"import_{n}.db")
+            imported = bench_import(csv_path, n)
+
+            if n <= SINGLE_INSERT_LIMIT:
+                fresh_db(tmp, f"single_{n}.db")
+                single = f"{bench_single(n):10.0f}"
+                fresh_db(tmp, f"conc_{n}.db")
+                conc = f"{bench_concurrent(n, args.threads, False):10.0f}"
+                fresh_db(tmp, f"group_{n}.db")
+                group = f"{bench_concurrent(n, args.threads, True):10.0f}"
+            else:
+                single = conc = group = f"{'skipped':>10}"
+
+            print(
+                f"rows={n:<8} insert_log {single} rows/s | "
+                f"{args.threads} threads {conc} rows/s | "
+                f"+group commit {group} rows/s | "
+                f"import_logs {imported:10.0f} rows/s"
+            )
+        db.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""채팅 한 턴 전체 파이프라인 부하 테스트 (Streamlit 없이, 로컬 mock OpenAI 서버 상대로).
+
+N 명이 동시에 여러 턴씩 대화한다. 한 턴 = 프로필 추출 → 기준표 분석 → 시설 힌트 →
+프롬프트 조립 → LLM 호출(스트리밍). 단계별 p50 / p95 / p99 와 처리량을 출력한다.
+
+    python -m bench.chat_pipeline --users 50 --turns 5 --rpm 3000 --error-rate 0.02
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from bench.mock_openai import start_mock_server
+from bench.synthetic import synthetic_facility_table
+from coach import TURN_STAGES, prepare_turn, simple_fallback_reply
+from conversation import ConversationContext, new_context_state
+from facilities import FacilityIndex
+from llm_cache import is_rate_limit_error, stream_chat_completion
+from llm_client import LLMService
+from norms import get_norm_index
+
+STAGES = TURN_STAGES + ("llm", "total")
+
+USER_SCRIPTS = [
+    ["나는 35살 남자야", "서울 마포구 대흥동 살아", "윗몸일으키기 30개 했어", "오늘 뭐하지", "하체 루틴 짜줘"],
+    ["저는 17살 여자입니다", "체력은 중간 정도예요", "강남구 근처에서 운동하고 싶어요", "윗몸 25개 했어요",
+     "내일은 뭐 할까요"],
+    ["70살 남성", "초보라서 걷기부터 하고 싶어", "서울 종로구", "윗몸일으키기 10개", "무릎이 좀 아파"],
+]
+
+
+def simulate_user(i, turns, service, norm_index, facility_index, context, samples, outcomes, lock):
+    script = USER_SCRIPTS[i % len(USER_SCRIPTS)]
+    profile = {"name": f"user{i}"}
+    messages = [{"role": "assistant", "content": f"user{i}님, 안녕하세요!"}]
+    context_state = new_context_state()
+    for t in range(turns):
+        user_text = script[t % len(script)]
+        messages.append({"role": "user", "content": user_text})
+        timings = {}
+        start = time.perf_counter()
+        turn = prepare_turn(profile, user_text, messages, context_state, context,
+                            norm_index=norm_index, facility_index=facility_index, timings=timings)
+        profile = turn["profile"]
+
+        llm_start = time.perf_counter()
+        try:
+            reply = "".join(stream_chat_completion(
+                service, "mock", turn["system_prompt"], turn["request_messages"],
+                bypass=True, max_tokens=700, temperature=0.7,
+            ))
+            outcome = "ok"
+        except Exception as e:
+            reply = simple_fallback_reply(user_text, turn["scan"])
+            outcome = "fallback" if is_rate_limit_error(e) else "error"
+        end = time.perf_counter()
+        timings["llm"] = (end - llm_start) * 1000
+        timings["total"] = (end - start) * 1000
+        messages.append({"role": "assistant", "content": reply})
+        with lock:
+            for name in STAGES:
+                samples[name].append(timings.get(name, 0.0))
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--facility-rows", type=int, default=100_000)
+    parser.add_argument("--rpm", type=float, default=3000, help="mock 서버 분당 요청 한도 (0 = 무제한)")
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--token-ms", type=float, default=5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--midstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--tpm", type=float, default=10_000_000, help="LLMService 분당 토큰 한도")
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    norm_index = get_norm_index()
+    start = time.perf_counter()
+    facility_index = FacilityIndex(synthetic_facility_table(args.facility_rows, coords=True))
+    print(f"facility index: {args.facility_rows} rows in {time.perf_counter() - start:.2f} s, "
+          f"norm index {'loaded' if norm_index is not None else 'missing'}")
+
+    server, state, base_url = start_mock_server(
+        rpm=args.rpm, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, token_ms=args.token_ms,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        midstream_error_rate=args.midstream_error_rate, seed=0,
+    )
+    service = LLMService(api_key="mock", base_url=base_url, rpm=args.rpm or 1e9, tpm=args.tpm,
+                         concurrency=args.concurrency, retry_deadline_sec=60)
+    context = ConversationContext()
+
+    samples = {name: [] for name in STAGES}
+    outcomes = {}
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=simulate_user, args=(i, args.turns, service, norm_index, facility_index,
+                                                    context, samples, outcomes, lock))
+        for i in range(args.users)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    n = len(samples["total"])
+    print(f"{args.users} users x {args.turns} turns = {n} turns in {elapsed:.2f} s "
+          f"({n / elapsed:.1f} turns/s), outcomes {outcomes}")
+    print(f"{'stage':<10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10} {'ops/s':>12}")
+    for name in STAGES:
+        lat = np.array(samples[name])
+        # 단계 혼자 한 스레드에서 돌 때의 처리량 (1 / 평균)
+        ops = 1000 / lat.mean() if lat.mean() > 0 else float("inf")
+        print(f"{name:<10} {np.percentile(lat, 50):10.3f} {np.percentile(lat, 95):10.3f} "
+              f"{np.percentile(lat, 99):10.3f} {lat.max():10.3f} {ops:12.0f}")
+    print(f"mock server {state.counts}, service {service.stats()}")
+    service.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""대화 턴 작업 큐(jobqueue.py): 화면이 기다리는 시간, 워커 처리량, 재시작 뒤 유실 / 순서.
+
+    python -m bench.chat_queue --users 40 --turns 5 --threads 8 --kill-after 5
+
+- 화면 쪽: service.enqueue_turn 한 번 (rerun 이 기다리는 시간) vs service.chat_turn 한 번 (예전처럼 바로 처리)
+- 워커 쪽: `python -m jobqueue --threads N` 을 띄워 사용자 U 명 x 턴 T 개를 처리한다.
+  --kill-after 초 뒤에 kill -9 로 죽이고 새 워커 프로세스를 띄워 남은 작업을 마저 처리한다
+  (처리 중이던 작업은 lease 가 지나면 다시 가져간다. 여기서는 --lease-sec 로 짧게)
+- 끝나면 작업 상태별 수, 넣은 때 → 끝난 때 p50 / p95, 사용자마다 대화에 저장된 메시지가
+  넣은 순서 그대로인지 (빠지거나 두 번 들어간 턴이 없는지) 확인한다
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from bench.api_throughput import free_port, start_process, stop_process
+
+
+def percentiles(values):
+    p50, p95 = np.percentile(values, [50, 95])
+    return f"p50 {p50:8.1f}  p95 {p95:8.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=8, help="워커 프로세스의 스레드 수")
+    parser.add_argument("--kill-after", type=float, default=5, help="첫 워커를 kill -9 하는 시점 (초, 0 = 안 죽임)")
+    parser.add_argument("--lease-sec", type=float, default=3)
+    parser.add_argument("--latency-ms", type=float, default=800, help="mock LLM 첫 응답 지연")
+    parser.add_argument("--token-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    mock_port = free_port()
+    mock_url = f"http://127.0.0.1:{mock_port}/v1"
+    mock = start_process(
+        [sys.executable, "-m", "bench.mock_openai", "--port", str(mock_port),
+         "--latency-ms", str(args.latency_ms), "--token-ms", str(args.token_ms)],
+        mock_url,
+    )
+    tmp = tempfile.TemporaryDirectory()
+    env = dict(
+        os.environ,
+        FITNESS_DB_PATH=os.path.join(tmp.name, "queue_bench.db"),
+        FITNESS_LLM_CACHE="0",
+        FITNESS_LLM_RPM="100000",
+        FITNESS_LLM_TPM="100000000",
+        FITNESS_CHAT_JOB_LEASE_SEC=str(args.lease_sec),
+        OPENAI_API_KEY="sk-bench",
+        OPENAI_BASE_URL=mock_url,
+    )
+    # 이 프로세스도 같은 설정으로 service 를 쓴다 (워커는 띄우지 않는다)
+    os.environ.update(env, FITNESS_CHAT_WORKERS="0")
+    import db
+    import service
+
+    db.configure(path=env["FITNESS_DB_PATH"])
+    db.init_db()
+    users = [f"user{i}" for i in range(args.users)]
+    for name in users:
+        service.signup(name, "pw")
+        service.start_chat(name)
+
+    # 1) 화면이 기다리는 시간: 큐에 넣기 vs 바로 처리
+    sync_ms = []
+    for i in range(5):
+        start = time.perf_counter()
+        service.chat_turn(users[0], f"바로 처리 {i}")
+        sync_ms.append((time.perf_counter() - start) * 1000)
+    service.start_chat(users[0])
+
+    enqueue_us = []
+    expected = {name: [] for name in users}
+    for t in range(args.turns):
+        for name in users:
+            text = f"{name} 턴 {t}"
+            start = time.perf_counter()
+            service.enqueue_turn(name, text)
+            enqueue_us.append((time.perf_counter() - start) * 1e6)
+            expected[name].append(text)
+    total = args.users * args.turns
+    print(f"chat_turn (바로 처리) ms  {percentiles(sync_ms)}")
+    print(f"enqueue_turn us           {percentiles(enqueue_us)}")
+
+    # 2) 워커 프로세스 (중간에 kill -9 → 새로 띄움)
+    def counts():
+        with db.get_pool().connection() as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM chat_jobs GROUP BY status").fetchall())
+
+    def spawn():
+        return subprocess.Popen(
+            [sys.executable, "-m", "jobqueue", "--threads", str(args.threads)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+    started = time.perf_counter()
+    worker = spawn()
+    if args.kill_after:
+        time.sleep(args.kill_after)
+        worker.send_signal(signal.SIGKILL)
+        worker.wait()
+        print(f"kill -9 after {args.kill_after:.0f}s: {counts()}")
+        worker = spawn()
+    while True:
+        c = counts()
+        if not c.get("queued") and not c.get("running"):
+            break
+        time.sleep(0.2)
+    elapsed = time.perf_counter() - started
+    worker.send_signal(signal.SIGINT)
+    worker.wait(timeout=30)
+    stop_process(mock)
+
+    with db.get_pool().connection() as conn:
+        rows = conn.execute(
+            "SELECT created_at, finished_at, attempts FROM chat_jobs WHERE status = 'done'"
+        ).fetchall()
+    latency = [
+        (datetime.fromisoformat(f) - datetime.fromisoformat(c)).total_seconds() * 1000 for c, f, _ in rows
+    ]
+    print(f"jobs: {counts()}  ({total} enqueued, {len(rows) / elapsed:.1f} turns/s, {elapsed:.1f}s)")
+    print(f"enqueue → done ms         {percentiles(latency)}")
+    print(f"re-claimed after crash: {sum(1 for *_, a in rows if a > 1)}")
+
+    bad = 0
+    for name in users:
+        got = [m["content"] for m in service.get_chat(name) if m["role"] == "user"]
+        if got != expected[name]:
+            bad += 1
+            print(f"  {name}: expected {expected[name]} got {got}")
+    print(f"users with lost / duplicated / reordered turns: {bad} / {len(users)}")
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""콜드 스타트: CSV 파싱 + 색인 vs 캐시된 색인(datacache) — 새 프로세스에서 시간 / 최대 RSS 측정.
+
+    python -m bench.cold_start --rows 500000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from bench.synthetic import synthetic_facility_table
+
+# 자식 프로세스에서 실행할 코드. 모듈 import 시간은 빼고 "시설 힌트를 줄 수 있을 때까지"를 잰다
+CHILD = r"""
+import sys, time
+import pandas as pd
+from facilities import FacilityIndex, build_facility_hint
+path, mode = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+if mode == "csv":
+    index = FacilityIndex(pd.read_csv(path))
+else:
+    index = FacilityIndex.from_csv(path)
+ready = time.perf_counter() - start
+build_facility_hint("마포구 대흥동", index)
+# ru_maxrss 는 fork 한 부모의 값이 남아 있을 수 있어서 /proc 의 VmHWM(최대 RSS)을 쓴다
+with open("/proc/self/status") as f:
+    hwm_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+print(f"{ready:.3f} {hwm_kb / 1024:.0f}")
+"""
+
+
+def run_child(path, mode, cache_dir):
+    env = dict(os.environ, FITNESS_DATA_CACHE_DIR=cache_dir, PYTHONPATH=os.getcwd())
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, path, mode],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout.split()
+    return float(out[0]), float(out[1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "facilities.csv")
+        synthetic_facility_table(args.rows).to_csv(csv_path, index=False)
+        cache_dir = os.path.join(tmp, "cache")
+        csv_mb = os.path.getsize(csv_path) / 1e6
+
+        rows = [("read_csv + index", run_child(csv_path, "csv", cache_dir))]
+        rows.append(("cache (first run, builds)", run_child(csv_path, "cache", cache_dir)))
+        rows.append(("cache (warm, mmap)", run_child(csv_path, "cache", cache_dir)))
+
+        cache_mb = sum(
+            os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(cache_dir) for f in fs
+        ) / 1e6
+        print(f"{args.rows} rows, CSV {csv_mb:.1f} MB, cache {cache_mb:.1f} MB")
+        for label, (ready, rss) in rows:
+            print(f"{label:<26} ready in {ready * 1000:8.1f} ms | max RSS {rss:6.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""대화 100턴 시뮬레이션: 턴별 입력 토큰 (전체 대화 전송 vs ConversationContext).
+
+    python -m bench.context_budget --turns 100
+"""
+import argparse
+import time
+
+import numpy as np
+
+from conversation import ConversationContext, count_message_tokens, new_context_state
+
+USER_LINES = [
+    "오늘은 하체 위주로 하고 싶어",
+    "어제 스쿼트 50개 했는데 허벅지가 좀 당겨",
+    "퇴근하고 30분 정도밖에 시간이 없어",
+    "마포구 근처에 러닝하기 좋은 곳 있어?",
+    "플랭크는 1분 버티는 게 한계야",
+    "이번 주에 달리기 총 40분 채워볼게",
+]
+COACH_SENTENCES = [
+    "좋아, 지금 페이스면 충분히 잘하고 있어!",
+    "오늘은 스쿼트 4세트 x 15회, 세트 사이 60초 휴식으로 가보자.",
+    "런지는 양쪽 10회씩 3세트, 무릎이 발끝을 넘지 않게 천천히 내려가.",
+    "마무리로 플랭크 40초 x 3세트 하고 스트레칭 5분 해줘.",
+    "장소는 망원한강공원 러닝 코스가 평평해서 딱이야.",
+    "대안으로 효창운동장 트랙도 괜찮아.",
+    "운동 끝나면 '📝 오늘 운동 기록' 탭에 꼭 저장해줘!",
+    "오늘은 이 루틴으로 가볼까?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--budget", type=int, default=2000)
+    # app.py 의 기본 시스템 프롬프트 + 프로필 / 시설 힌트 정도 (count_tokens 기준)
+    parser.add_argument("--system-tokens", type=int, default=1100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    ctx = ConversationContext(budget_tokens=args.budget)
+    state = new_context_state()
+    messages = [{"role": "assistant", "content": "오! tester 다시 왔네 😄 오늘은 어떤 느낌이야?"}]
+
+    before, after = [], []
+    build_us = []
+    for _ in range(args.turns):
+        messages.append({"role": "user", "content": USER_LINES[rng.integers(len(USER_LINES))]})
+        before.append(args.system_tokens + count_message_tokens(messages))
+
+        start = time.perf_counter()
+        sent = ctx.build(messages, state)
+        build_us.append((time.perf_counter() - start) * 1e6)
+        after.append(args.system_tokens + count_message_tokens(sent))
+
+        # 코치 답: 6~10문장 (≈ 300~500 토큰)
+        reply = "\n".join(rng.choice(COACH_SENTENCES, rng.integers(6, 11)))
+        messages.append({"role": "assistant", "content": reply})
+
+    print(f"{'turn':>5} {'full history':>13} {'budgeted':>9}")
+    for t in (1, 5, 10, 25, 50, 75, 100):
+        if t <= args.turns:
+            print(f"{t:>5} {before[t - 1]:>13} {after[t - 1]:>9}")
+    print(f"total input tokens: {sum(before)} → {sum(after)} ({sum(after) / sum(before):.1%}), "
+          f"compactions {state['compactions']}, build p50 {np.median(build_us):.0f} us")
+
+
+if __name__ == "__main__":
+    main()
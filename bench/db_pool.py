@@ -0,0 +1,171 @@
+"""풀링된 커넥션(WAL) vs 예전의 호출마다 열고 닫는 방식 비교.
+
+    python -m bench.db_pool --ops 2000 --threads 1 4 8
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import db
+
+# =========================
+# 예전 방식 (호출마다 connect/close, 기본 rollback 저널)
+# =========================
+_legacy_path = None
+
+
+def legacy_get_connection():
+    return sqlite3.connect(_legacy_path, check_same_thread=False)
+
+
+def legacy_insert_log(username, log_date, exercise, amount):
+    conn = legacy_get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        INSERT INTO logs (username, log_date, exercise, amount, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (username, log_date, exercise, amount, datetime.now().isoformat()),
+    )
+    conn.commit()
+    conn.close()
+
+
+def legacy_get_logs(username):
+    conn = legacy_get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT log_date, exercise, amount, created_at
+        FROM logs
+        WHERE username = ?
+        ORDER BY log_date DESC, created_at DESC
+        """,
+        (username,),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
+
+def legacy_get_user(username):
+    conn = legacy_get_connection()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT username, password, age, sex, run_level, squat_level, location
+        FROM users
+        WHERE username = ?
+        """,
+        (username,),
+    )
+    row = cur.fetchone()
+    conn.close()
+    return row
+
+
+# =========================
+# 워크로드
+# =========================
+def seed(n_users: int, logs_per_user: int):
+    db.init_db()
+    today = date.today()
+    with db.get_pool().connection() as conn, conn:
+        conn.executemany(
+            "INSERT INTO users (username, password) VALUES (?, ?)",
+            [(f"user{i}", "pw") for i in range(n_users)],
+        )
+        conn.executemany(
+            """
+            INSERT INTO logs (username, log_date, exercise, amount, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    f"user{i}",
+                    (today - timedelta(days=j % 60)).isoformat(),
+                    "스쿼트",
+                    20,
+                    datetime.now().isoformat(),
+                )
+                for i in range(n_users)
+                for j in range(logs_per_user)
+            ],
+        )
+
+
+def run_mixed(ops, n_threads, n_users, insert_log, get_logs, get_user):
+    # 한 세션의 전형적인 rerun: 사용자 조회 2번 + 기록 조회 1번 + 가끔 쓰기
+    per_thread = ops // n_threads
+    errors = []
+
+    def worker(tid):
+        try:
+            for i in range(per_thread):
+                name = f"user{(tid * 7919 + i) % n_users}"
+                get_user(name)
+                get_logs(name)
+                get_user(name)
+                if i % 10 == 0:
+                    insert_log(name, date.today().isoformat(), "스쿼트", 10)
+        except Exception as e:  # 잠금 타임아웃 등은 결과에 같이 보고
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(n_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return per_thread * n_threads / elapsed, len(errors)
+
+
+def main():
+    global _legacy_path
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--logs-per-user", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_threads in args.threads:
+            path = os.path.join(tmp, f"bench_{n_threads}.db")
+            db.configure(path=path, pool_size=max(n_threads, 1))
+            seed(args.users, args.logs_per_user)
+            db.get_pool().close()
+
+            # WAL 은 파일에 남으므로 예전 방식 측정 전에 기본 저널로 되돌린다
+            conn = sqlite3.connect(path)
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.close()
+            _legacy_path = path
+
+            legacy_ops, legacy_err = run_mixed(
+                args.ops, n_threads, args.users,
+                legacy_insert_log, legacy_get_logs, legacy_get_user,
+            )
+            db.configure(path=path, pool_size=max(n_threads, 1))
+            pooled_ops, pooled_err = run_mixed(
+                args.ops, n_threads, args.users,
+                db.insert_log, db.get_logs, db.get_user,
+            )
+            db.get_pool().close()
+
+            print(
+                f"threads={n_threads:<2}  open-per-call {legacy_ops:9.1f} ops/s"
+                f" (errors {legacy_err})  |  pooled+WAL {pooled_ops:9.1f} ops/s"
+                f" (errors {pooled_err})  x{pooled_ops / legacy_ops:.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""메시지 추출: 예전 함수들(프로필 정규식 + fallback 키워드 + 윗몸 정규식) vs extraction.scan_message.
+
+    python -m bench.extraction                  # golden corpus 확인 + 무작위 비교 + 100만 건 처리량
+    python -m bench.extraction --write-golden   # 예전 함수 결과로 golden corpus 다시 만들기
+
+golden corpus(bench/extraction_golden.jsonl)는 예전 함수 결과를 그대로 적어 둔 것이다.
+추출 규칙을 일부러 바꾸는 경우에만 다시 만든다.
+"""
+import argparse
+import json
+import os
+import re
+import time
+
+from bench.synthetic import synthetic_chat_messages
+from coach import simple_fallback_reply
+from extraction import scan_message, scan_messages
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "extraction_golden.jsonl")
+
+# 경계 사례: 우선순위, 띄어 쓴 성별, 숫자 없는 키워드, 한 메시지에 여러 값
+EDGE_CASES = [
+    "", "   ", "안녕", "나이는 35 그리고 40살", "40살인데 나이 35", "나이35", "35 살", "살 빼고 싶어",
+    "나 남 이야", " 남 ", "남", "여 남 둘 다", "남자 여자", "여성이고 남편이랑 운동해", "남 여",
+    "스쿼트", "스쿼트 했고 20번", "스쿼트 30 개, 스쿼트 50개", "12 스쿼트", "스쿼트는 오늘 못했어 내일 15개",
+    "윗몸일으키기 40개", "윗몸 30 개 하고 스쿼트 20개", "윗몸일으키기 했는데 10", "윗몸일으키기10개 윗몸 20개",
+    "달리기 5km", "조깅", "뛰어야지", "마포구 대흥동", "서울시 마포구 대흥동 살아", "서울시마포구대흥동",
+    "강남구", "친구랑", "운동기구 추천해줘", "구로구 구로동에서 뛰었어", "마포구에서 대흥동으로 이사",
+    "운동 안 했어", "오늘 안했어", "못했어 윗몸", "윗몸 하고 달리기", "달리기 못했음",
+    "나이는 24 남자 윗몸일으키기 30개 마포구 대흥동", "24살 남자, 윗몸일으키기 30개, 마포구 대흥동",
+    "  17살 여자 달리기 초보  ", "Hello 123 coach", "스쿼트 ３０개", "나이 ２５",
+]
+
+
+# -------------------------
+# 예전 구현 (비교 기준, app.py 에 있던 그대로)
+# -------------------------
+_LEGACY_SITUP_RE = re.compile(r"(윗몸일으키기|윗몸)\D*(\d+)\s*개")
+
+
+def legacy_extract_profile_from_text(text: str) -> dict:
+    text = text.strip()
+    result = {}
+
+    age_match = re.search(r"나이(?:는)?\s*(\d+)", text)
+    if not age_match:
+        age_match = re.search(r"(\d+)\s*살", text)
+    if age_match:
+        try:
+            result["age"] = int(age_match.group(1))
+        except ValueError:
+            pass
+
+    if any(k in text for k in ["남자", "남성", " 남 "]):
+        result["sex"] = "남"
+    elif any(k in text for k in ["여자", "여성", " 여 "]):
+        result["sex"] = "여"
+
+    if "달리기" in text or "조깅" in text or "뛰" in text:
+        result.setdefault("run_level", text)
+
+    squat_match = re.search(r"스쿼트[^0-9]*(\d+)\s*(개|번)?", text)
+    if squat_match:
+        result["squat_level"] = squat_match.group(1)
+
+    loc_match = re.search(r"([가-힣]+시\s*)?[가-힣]+구\s*[가-힣0-9]+동", text)
+    if not loc_match:
+        loc_match = re.search(r"[가-힣]+구", text)
+
+    if loc_match:
+        result["location"] = loc_match.group(0)
+
+    return result
+
+
+def legacy_intent(user_input: str):
+    # 예전 simple_fallback_reply 의 분기 순서
+    text = user_input.lower()
+    if "못했" in text or "안 했" in text or "안했" in text or "운동 안" in text:
+        return "not_done"
+    if "윗몸" in text:
+        return "situp"
+    if "달리기" in text or "조깅" in text or "뛰" in text:
+        return "run"
+    return None
+
+
+def legacy_situp_count(text: str):
+    m = _LEGACY_SITUP_RE.search(text)
+    return float(m.group(2)) if m else None
+
+
+def legacy_scan(text: str) -> dict:
+    return {
+        "profile": legacy_extract_profile_from_text(text),
+        "situp_count": legacy_situp_count(text),
+        "intent": legacy_intent(text),
+    }
+
+
+# -------------------------
+# 확인
+# -------------------------
+def write_golden(n_synthetic: int):
+    texts = EDGE_CASES + synthetic_chat_messages(n_synthetic, seed=7)
+    with open(GOLDEN_PATH, "w", encoding="utf-8") as f:
+        for text in texts:
+            f.write(json.dumps({"text": text, **legacy_scan(text)}, ensure_ascii=False) + "\n")
+    print(f"wrote {len(texts)} cases to {GOLDEN_PATH}")
+
+
+def check_golden():
+    with open(GOLDEN_PATH, encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f]
+    for case in cases:
+        expected = {k: case[k] for k in ("profile", "situp_count", "intent")}
+        got = scan_message(case["text"])
+        assert got == expected, (case["text"], got, expected)
+    print(f"golden corpus: {len(cases)} cases match")
+
+
+def check_random(messages):
+    for text in messages:
+        expected = legacy_scan(text)
+        assert scan_message(text) == expected, (text, scan_message(text), expected)
+        assert simple_fallback_reply(text) == simple_fallback_reply(text, expected), text
+    print(f"random messages: {len(messages)} match the old functions")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--check", type=int, default=100_000, help="예전 함수와 비교할 무작위 메시지 수")
+    parser.add_argument("--write-golden", action="store_true")
+    parser.add_argument("--golden-synthetic", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.write_golden:
+        write_golden(args.golden_synthetic)
+        return
+
+    check_golden()
+    start = time.perf_counter()
+    messages = synthetic_chat_messages(args.messages, seed=0)
+    print(f"generated {len(messages)} messages in {time.perf_counter() - start:.1f} s "
+          f"(avg {sum(map(len, messages)) / len(messages):.0f} chars)")
+    check_random(messages[:args.check])
+
+    # 예전: 한 턴에 프로필 추출 + 윗몸 정규식 (+ fallback 때 키워드 다시)
+    start = time.perf_counter()
+    for text in messages:
+        legacy_extract_profile_from_text(text)
+        legacy_situp_count(text)
+        legacy_intent(text)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scan_messages(messages)
+    new = time.perf_counter() - start
+
+    n = len(messages)
+    print(f"old functions  {legacy:6.2f} s  {n / legacy / 1000:7.0f} k msg/s")
+    print(f"scan_message   {new:6.2f} s  {n / new / 1000:7.0f} k msg/s  ({legacy / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
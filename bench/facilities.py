@@ -0,0 +1,60 @@
+"""시설 힌트: 예전 copy + str.contains 방식 vs FacilityIndex (합성 50만 행).
+
+    python -m bench.facilities --rows 500000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from bench.synthetic import synthetic_facility_table
+from facilities import FacilityIndex, build_facility_hint
+
+QUERIES = ["마포구 대흥동", "마포구", "서울 강남구", "대흥동", "없는구"]
+
+
+def legacy_build_facility_hint(facility_df, location):
+    df = facility_df.copy()
+    cols = df.columns
+    addr_cols = [c for c in cols if "addr" in c.lower() or "주소" in c]
+    name_col = next((c for c in ["faci_nm", "시설명", "FACI_NM"] if c in cols), None)
+    type_col = next((c for c in ["ftype_nm", "fcob_nm", "시설유형"] if c in cols), None)
+    mask = False
+    for ac in addr_cols:
+        mask = mask | df[ac].astype(str).str.contains(location, na=False)
+    sub = df[mask].head(5)
+    lines = []
+    for _, row in sub.iterrows():
+        line = f"- 시설명: {row[name_col]}"
+        if type_col and pd.notna(row[type_col]):
+            line += f" / 유형: {row[type_col]}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    df = synthetic_facility_table(args.rows)
+
+    start = time.perf_counter()
+    index = FacilityIndex(df)
+    print(f"index build: {time.perf_counter() - start:.2f} s for {args.rows} rows")
+
+    for q in QUERIES:
+        start = time.perf_counter()
+        legacy_build_facility_hint(df, q)
+        legacy_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            build_facility_hint(q, index)
+        new_us = (time.perf_counter() - start) / args.repeat * 1e6
+        print(f"{q:<10} legacy {legacy_ms:8.1f} ms  |  index {new_us:8.1f} us  ({len(index.search(q))} hits)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""가까운 시설 찾기: 전체 거리 계산(brute force) vs GridIndex (합성 50만 행).
+
+    python -m bench.geo --rows 500000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from bench.synthetic import synthetic_facility_table
+from facilities import FacilityIndex, build_facility_hint
+from geo import haversine_km
+
+QUERIES = ["마포구 대흥동", "서울 마포구", "서울", "강남구", "없는구"]
+
+
+def brute_knn(lat, lon, qlat, qlon, k):
+    d = haversine_km(qlat, qlon, lat, lon)
+    d = np.where(np.isnan(d), np.inf, d)
+    part = np.argpartition(d, k)[:k]
+    return part[np.argsort(d[part])], np.sort(d[part])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    df = synthetic_facility_table(args.rows, coords=True)
+
+    start = time.perf_counter()
+    index = FacilityIndex(df)
+    print(f"index build: {time.perf_counter() - start:.2f} s for {args.rows} rows "
+          f"({len(index.gazetteer)} regions, {len(index.grid)} points)")
+
+    grid = index.grid
+    rng = np.random.default_rng(1)
+    # 실제 시설 근처 임의 지점 (경계 / 빈 칸 포함)
+    probe = rng.choice(len(grid), 200)
+    qlat = grid.lat[grid.order[probe]] + rng.normal(0, 0.05, probe.size)
+    qlon = grid.lon[grid.order[probe]] + rng.normal(0, 0.05, probe.size)
+
+    # 정확도: 격자 kNN 의 거리 == 전체 계산 거리
+    for la, lo in zip(qlat, qlon):
+        _, d_grid = grid.knn(la, lo, args.k)
+        _, d_brute = brute_knn(grid.lat, grid.lon, la, lo, args.k)
+        assert np.allclose(d_grid, d_brute), (la, lo, d_grid, d_brute)
+    print(f"knn matches brute force on {probe.size} probes")
+
+    def per_query(fn, n):
+        start = time.perf_counter()
+        for i in range(n):
+            fn(i % probe.size)
+        return (time.perf_counter() - start) / n * 1e6
+
+    n = args.repeat
+    brute_us = per_query(lambda i: brute_knn(grid.lat, grid.lon, qlat[i], qlon[i], args.k), max(n // 10, 10))
+    knn_us = per_query(lambda i: grid.knn(qlat[i], qlon[i], args.k), n)
+    within_us = per_query(lambda i: grid.within(qlat[i], qlon[i], 2.0, limit=args.k), n)
+    print(f"knn k={args.k}: brute {brute_us:9.1f} us  |  grid {knn_us:7.1f} us")
+    print(f"within 2km:           grid {within_us:7.1f} us")
+
+    for q in QUERIES:
+        start = time.perf_counter()
+        for _ in range(n):
+            hint = build_facility_hint(q, index)
+        us = (time.perf_counter() - start) / n * 1e6
+        mode = "nearest" if "가까운 순" in hint else ("token" if hint else "none")
+        print(f"hint {q:<10} {us:8.1f} us  ({mode})")
+
+
+if __name__ == "__main__":
+    main()
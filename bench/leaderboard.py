@@ -0,0 +1,121 @@
+"""운동 순위표(leaderboard.py): 사용자 100만 명, 순위 조회 / insert_log 반영 시간.
+
+    python -m bench.leaderboard --users 1000000 --queries 20000 --writes 20000
+
+비교 기준은 쓰기마다 합계 배열을 다시 정렬하고 np.searchsorted 로 순위를 찾는 방식.
+먼저 표본 사용자들의 순위 / 백분위를 전체 합계로 직접 센 값과 맞춰 본다
+(EXACT_BINS 아래 합계는 정확히 같아야 한다).
+"""
+import argparse
+import random
+import time
+from datetime import date
+
+import numpy as np
+
+import leaderboard
+
+EXERCISE = "스쿼트"
+
+
+def synthetic_totals(n_users, seed=0):
+    # 대부분은 수십~수백, 꼬리가 긴 분포 (EXACT_BINS 를 넘는 사람도 조금 있다)
+    rng = np.random.default_rng(seed)
+    totals = np.maximum(1, rng.lognormal(4.5, 1.0, n_users)).astype(np.int64)
+    ages = rng.integers(15, 75, n_users)
+    sexes = rng.choice(["남", "여"], n_users)
+    names = [f"user{i}" for i in range(n_users)]
+    cohorts = {u: leaderboard.cohort_of(int(a), s) for u, a, s in zip(names, ages, sexes)}
+    return names, totals, cohorts
+
+
+def brute_rank(values, total):
+    # 정확한 순위: 나보다 합계가 큰 사람 수 + 1
+    return int((values > total).sum()) + 1
+
+
+def check(board, names, totals, cohorts, today, samples=200):
+    rng = random.Random(1)
+    cohort_arr = np.array([cohorts[u] for u in names], dtype=object)
+    exact = 0
+    for i in rng.sample(range(len(names)), samples):
+        r = board.rank(names[i], EXERCISE, "week", today)
+        assert r["total"] == totals[i]
+        for key, values in (("all", totals), ("cohort", totals[cohort_arr == cohorts[names[i]]])):
+            expected = brute_rank(values, totals[i])
+            assert r[key]["size"] == len(values)
+            if totals[i] < leaderboard.EXACT_BINS:
+                # 구간이 1 단위라 큰 쪽 사람 수가 정확히 같다
+                assert r[key]["rank"] == expected, (names[i], key, r[key]["rank"], expected)
+                exact += 1
+            else:
+                # 같은 구간(BIN_GROWTH 배 이내)에 있는 사람만큼 순위가 앞설 수 있다
+                assert r[key]["rank"] <= expected
+                assert r[key]["rank"] >= brute_rank(values, totals[i] * leaderboard.BIN_GROWTH)
+    top = board.top(EXERCISE, "week", k=10, today=today)
+    order = np.argsort(-totals, kind="stable")[:10]
+    assert [t for _, t in top] == totals[order].tolist()
+    print(f"check: {samples} sampled users match brute-force ranks ({exact} cohort / 전체 ranks exact, rest within one bin)")
+
+
+def fmt(times):
+    times = sorted(times)
+    return f"median {times[len(times) // 2] * 1e6:8.1f} us  p99 {times[int(len(times) * 0.99)] * 1e6:8.1f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--writes", type=int, default=20_000)
+    parser.add_argument("--naive-writes", type=int, default=50)
+    args = parser.parse_args()
+
+    today = date.today()
+    names, totals, cohorts = synthetic_totals(args.users)
+    rows = [(u, EXERCISE, int(t)) for u, t in zip(names, totals)]
+
+    start = time.perf_counter()
+    board = leaderboard.Leaderboard(cohorts=cohorts, load_totals=lambda w, s, e: (rows, 0), max_age_sec=0,
+                                   sync_sec=0)
+    for window in leaderboard.WINDOWS:
+        board.rank(names[0], EXERCISE, window, today)
+    print(f"build week + month ({args.users} users, {len(set(cohorts.values()))} cohorts + 전체): "
+          f"{time.perf_counter() - start:.2f} s")
+    check(board, names, totals, cohorts, today)
+
+    rng = random.Random(2)
+    times = []
+    for _ in range(args.queries):
+        u = names[rng.randrange(args.users)]
+        t0 = time.perf_counter()
+        board.rank(u, EXERCISE, "week", today)
+        times.append(time.perf_counter() - t0)
+    print(f"rank()            {fmt(times)}")
+
+    log_date = today.isoformat()
+    times = []
+    for log_id in range(1, args.writes + 1):
+        i = rng.randrange(args.users)
+        amount = rng.randint(1, 50)
+        totals[i] += amount
+        t0 = time.perf_counter()
+        board.on_write("logs", [(names[i], log_date, EXERCISE, amount, log_id)])
+        times.append(time.perf_counter() - t0)
+    print(f"on_write()        {fmt(times)}  (week + month boards)")
+    check(board, names, totals, cohorts, today)
+
+    # 비교 기준: 쓰기마다 다시 정렬 + searchsorted
+    times = []
+    for _ in range(args.naive_writes):
+        i = rng.randrange(args.users)
+        t0 = time.perf_counter()
+        totals[i] += 1
+        ordered = np.sort(totals)
+        len(ordered) - np.searchsorted(ordered, totals[i], side="right") + 1
+        times.append(time.perf_counter() - t0)
+    print(f"re-sort per write {fmt(times)}  (전체 묶음 하나만)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""LLM 응답 캐시: 조회 / 저장 지연과 반복 질문 비율별 API 호출 절감.
+
+    python -m bench.llm_cache --entries 20000
+"""
+import argparse
+import os
+import tempfile
+import time
+import types
+
+import numpy as np
+
+import llm_cache
+
+OPENERS = ["오늘 운동 뭐하지", "어디서 운동할까", "하체 루틴 짜줘", "오늘 뭐 먹을까", "유산소 얼마나 해?"]
+
+
+class FakeCompletions:
+    # 고정 지연(기본 800ms)을 흉내 내는 대신 호출 수만 센다
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kw):
+        self.calls += 1
+        msg = types.SimpleNamespace(content="답변 " * 200)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=msg, finish_reason="stop")])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--turns", type=int, default=5000)
+    parser.add_argument("--repeat-ratio", type=float, default=0.3)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "llm_cache.db")
+    cache = llm_cache.ResponseCache(path, max_entries=args.entries)
+    completions = FakeCompletions()
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+    system = "시스템 프롬프트 " * 300
+
+    # 캐시 채우기 + 저장 지연
+    start = time.perf_counter()
+    for i in range(args.entries):
+        cache.put(llm_cache.make_key("m", system, [{"role": "user", "content": f"질문 {i}"}]), "m", "답변")
+    put_us = (time.perf_counter() - start) / args.entries * 1e6
+
+    keys = [llm_cache.make_key("m", system, [{"role": "user", "content": f"질문 {i}"}]) for i in range(1000)]
+    start = time.perf_counter()
+    for k in keys:
+        cache.get(k)
+    get_us = (time.perf_counter() - start) / len(keys) * 1e6
+    print(f"{args.entries} entries: put {put_us:.0f} us, hit lookup {get_us:.0f} us (key + sqlite)")
+
+    # 일부는 흔한 첫 질문, 나머지는 매번 다른 질문
+    rng = np.random.default_rng(0)
+    llm_cache.reset_stats()
+    for t in range(args.turns):
+        if rng.random() < args.repeat_ratio:
+            text = OPENERS[rng.integers(len(OPENERS))] + rng.choice(["", "?", "??", " ~"])
+        else:
+            text = f"고유 질문 {t}"
+        llm_cache.cached_chat_completion(
+            client, "m", system, [{"role": "user", "content": text}], cache=cache,
+            max_tokens=700, temperature=0.7,
+        )
+    s = llm_cache.stats()
+    print(f"{args.turns} turns, repeat ratio {args.repeat_ratio}: API calls {completions.calls}, "
+          f"hit rate {s['hit_rate']:.1%}, evicted {s['evicted']}")
+
+
+if __name__ == "__main__":
+    main()
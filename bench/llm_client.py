@@ -0,0 +1,109 @@
+"""몰린 요청(burst) 부하 테스트: 세션마다 동기 OpenAI 호출 vs 공용 LLMService.
+
+로컬 mock 서버(분당 요청 한도 있음)에 N 명이 동시에 한 턴씩 보낸다.
+일부는 같은 첫 질문이라 LLMService 에서는 합쳐진다.
+
+    python -m bench.llm_client --users 200 --rpm 600
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+import openai
+
+from bench.mock_openai import start_mock_server
+from llm_cache import is_rate_limit_error
+from llm_client import LLMService
+
+SYSTEM = "너는 AI 체력 코치다."
+OPENERS = ["오늘 운동 뭐하지", "하체 루틴 짜줘", "어디서 운동할까"]
+
+
+def user_messages(i, repeat_ratio, rng):
+    if rng.random() < repeat_ratio:
+        text = OPENERS[rng.integers(len(OPENERS))]
+    else:
+        text = f"{i}번 사용자: 스쿼트 {i % 50 + 10}개 했어"
+    return [{"role": "system", "content": SYSTEM}, {"role": "user", "content": text}]
+
+
+def burst(call, n_users, repeat_ratio, seed=0):
+    # 모든 사용자가 동시에 출발. 반환: (걸린 시간, 사용자별 (지연, 결과))
+    rng = np.random.default_rng(seed)
+    payloads = [user_messages(i, repeat_ratio, rng) for i in range(n_users)]
+    results = [None] * n_users
+    gate = threading.Barrier(n_users + 1)
+
+    def run(i):
+        gate.wait()
+        start = time.perf_counter()
+        try:
+            call(payloads[i])
+            outcome = "ok"
+        except Exception as e:
+            outcome = "fallback" if is_rate_limit_error(e) else f"error:{type(e).__name__}"
+        results[i] = (time.perf_counter() - start, outcome)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n_users)]
+    for t in threads:
+        t.start()
+    gate.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, results
+
+
+def report(name, elapsed, results, extra=""):
+    lat = np.array([r[0] for r in results]) * 1000
+    outcomes = [r[1] for r in results]
+    ok = outcomes.count("ok")
+    fallback = outcomes.count("fallback")
+    errors = len(outcomes) - ok - fallback
+    print(f"{name:<22} {len(results) / elapsed:6.1f} turns/s  ok {ok:4d}  fallback {fallback / len(results):6.1%}"
+          f"  errors {errors:3d}  p50 {np.percentile(lat, 50):6.0f} ms  p95 {np.percentile(lat, 95):6.0f} ms{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--rpm", type=float, default=600)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--repeat-ratio", type=float, default=0.3)
+    args = parser.parse_args()
+
+    print(f"{args.users} users at once, mock limit {args.rpm:.0f} rpm, latency {args.latency_ms:.0f} ms, "
+          f"{args.repeat_ratio:.0%} repeated openers")
+
+    # 1) 예전 방식: 세션마다 동기 클라이언트 (SDK 기본 재시도 2회), 실패하면 fallback
+    server, state, base_url = start_mock_server(rpm=args.rpm, latency_ms=args.latency_ms)
+    client = openai.OpenAI(api_key="mock", base_url=base_url)
+    elapsed, results = burst(
+        lambda m: client.chat.completions.create(model="mock", messages=m, max_tokens=700), args.users,
+        args.repeat_ratio,
+    )
+    report("per-session sync", elapsed, results, f"  (server 429s {state.counts['rate_limited']})")
+    server.shutdown()
+
+    # 2) 공용 서비스: 한도에 맞춘 token bucket + 재시도 + 같은 요청 합치기
+    for coalesce in (False, True):
+        server, state, base_url = start_mock_server(rpm=args.rpm, latency_ms=args.latency_ms)
+        service = LLMService(api_key="mock", base_url=base_url, rpm=args.rpm, concurrency=32,
+                             retry_deadline_sec=120, coalesce=coalesce)
+        elapsed, results = burst(
+            lambda m: service.chat.completions.create(model="mock", messages=m, max_tokens=700), args.users,
+            args.repeat_ratio,
+        )
+        s = service.stats()
+        report(
+            f"LLMService{' +coalesce' if coalesce else ''}", elapsed, results,
+            f"  (sent {s['sent']}, coalesced {s['coalesced']}, retries {s['retries']}, "
+            f"server 429s {state.counts['rate_limited']})",
+        )
+        service.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
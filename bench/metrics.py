@@ -0,0 +1,108 @@
+"""계측(metrics.py) 비용: 꺼져 있을 때 / 켜져 있을 때 호출당 추가 시간.
+
+    python -m bench.metrics --calls 200000
+
+- 빈 함수: 데코레이터 없음 / timed(꺼짐) / timed(켜짐), span 도 같이
+- 실제 경로: db.get_user, coach.prepare_turn (시설 / 기준표 없이) 을 계측 꺼짐 / 켜짐으로
+마지막에 Prometheus 텍스트가 형식에 맞는지 (구간 누적값이 줄지 않는지, count 와 +Inf 가 같은지) 본다.
+"""
+import argparse
+import os
+import re
+import tempfile
+import time
+
+import metrics
+
+
+def per_call_ns(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def best_of(fn, calls, repeat=5):
+    return min(per_call_ns(fn, calls) for _ in range(repeat))
+
+
+def noop():
+    return None
+
+
+timed_noop = metrics.timed()(noop)
+
+
+def span_noop():
+    with metrics.span("fitness_stage_seconds", stage="bench"):
+        return None
+
+
+def check_prometheus(text):
+    buckets = {}
+    counts = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        m = re.fullmatch(r'([a-z_]+)(\{.*\})? (\S+)', line)
+        assert m, line
+        name, labels, value = m.group(1), m.group(2) or "", float(m.group(3))
+        if name.endswith("_bucket"):
+            series = (name[:-7], re.sub(r',?le="[^"]*"', "", labels))
+            prev = buckets.get(series, [])
+            assert not prev or value >= prev[-1], line
+            buckets[series] = prev + [value]
+        elif name.endswith("_count"):
+            counts[(name[:-6], labels.replace("{}", ""))] = value
+    for (name, labels), values in buckets.items():
+        assert counts[(name, labels.replace("{}", ""))] == values[-1], (name, labels)
+    print(f"prometheus text ok: {len(buckets)} histograms, {len(text.splitlines())} lines")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--turns", type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {}
+    for enabled in (False, True):
+        metrics.set_enabled(enabled)
+        results[enabled] = {
+            "timed()": best_of(timed_noop, args.calls),
+            "span()": best_of(span_noop, args.calls),
+        }
+    base = best_of(noop, args.calls)
+    print(f"{'':<24} {'off':>10} {'on':>10}   (ns / call, plain call {base:.0f} ns)")
+    for name in results[False]:
+        print(f"{name:<24} {results[False][name] - base:10.0f} {results[True][name] - base:10.0f}")
+
+    import db
+    from coach import prepare_turn
+    from conversation import ConversationContext, new_context_state
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.configure(path=os.path.join(tmp, "bench.db"))
+        db.init_db()
+        db.create_user("bench", "pw")
+        context = ConversationContext()
+        messages = [{"role": "user", "content": "25살 여자, 윗몸일으키기 30개 했어"}]
+
+        def turn():
+            prepare_turn({}, messages[0]["content"], messages, new_context_state(), context,
+                         norm_index=None, facility_index=None)
+
+        for label, fn, calls in (("db.get_user", lambda: db.get_user("bench"), args.calls // 10),
+                                 ("coach.prepare_turn", turn, args.turns)):
+            times = {}
+            for enabled in (False, True):
+                metrics.set_enabled(enabled)
+                times[enabled] = best_of(fn, calls) / 1000
+            print(f"{label:<24} off {times[False]:8.2f} us  on {times[True]:8.2f} us"
+                  f"  (+{(times[True] / times[False] - 1) * 100:.1f}%)")
+
+    check_prometheus(metrics.prometheus_text())
+
+
+if __name__ == "__main__":
+    main()
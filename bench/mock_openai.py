@@ -0,0 +1,225 @@
+"""로컬 OpenAI chat completions 흉내 서버 (부하 테스트용, 실제 쿼터를 쓰지 않는다).
+
+    python -m bench.mock_openai --port 8099 --rpm 600 --latency-ms 800
+    OPENAI_BASE_URL=http://127.0.0.1:8099/v1 streamlit run app.py
+
+- POST /v1/chat/completions (stream=true 면 SSE 청크, stream_options.include_usage 지원)
+- --rpm: 분당 요청 한도. 넘으면 429 + Retry-After (token bucket, 1초 분량까지 몰아서 허용)
+- 지연 / 오류 주입: --latency-ms ± --jitter-ms, --error-rate (500), --rate-limit-rate (무작위 429),
+  --midstream-error-rate (스트리밍 도중 rate_limit error 이벤트 후 끊기)
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = (
+    "좋아, 지금 페이스면 충분히 잘하고 있어! 오늘은 스쿼트 4세트 x 15회, 세트 사이 60초 휴식으로 가보자. "
+    "마무리로 플랭크 40초 x 3세트 하고, 운동 끝나면 '📝 오늘 운동 기록' 탭에 꼭 저장해줘! 오늘은 이 루틴으로 가볼까?"
+)
+
+
+class MockState:
+    def __init__(self, rpm=0.0, latency_ms=300.0, token_ms=20.0, chunk_chars=8, jitter_ms=0.0,
+                 error_rate=0.0, rate_limit_rate=0.0, midstream_error_rate=0.0, seed=None):
+        self.rpm = rpm
+        self.latency_ms = latency_ms
+        self.token_ms = token_ms
+        self.chunk_chars = chunk_chars
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.midstream_error_rate = midstream_error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = max(1.0, rpm / 60.0)
+        self.updated = time.monotonic()
+        self.counts = {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0, "midstream_errors": 0}
+
+    def roll(self, rate: float) -> bool:
+        with self.lock:
+            return rate > 0 and self.rng.random() < rate
+
+    def latency(self, ms: float) -> float:
+        # 초 단위, ±jitter_ms 균등 분포
+        with self.lock:
+            jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, ms + jitter) / 1000
+
+    def count(self, name: str, n: int = 1):
+        with self.lock:
+            self.counts[name] += n
+
+    def admit(self):
+        # (허용 여부, 429 일 때 Retry-After 초)
+        with self.lock:
+            self.counts["requests"] += 1
+            if not self.rpm:
+                self.counts["ok"] += 1
+                return True, 0.0
+            rate = self.rpm / 60.0
+            now = time.monotonic()
+            self.tokens = min(max(1.0, rate), self.tokens + (now - self.updated) * rate)
+            self.updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                self.counts["ok"] += 1
+                return True, 0.0
+            self.counts["rate_limited"] += 1
+            return False, (1.0 - self.tokens) / rate
+
+
+def _usage(body, completion_chars):
+    prompt_chars = sum(len(m.get("content") or "") for m in body.get("messages", []))
+    prompt_tokens = prompt_chars // 2
+    completion_tokens = completion_chars // 2
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": 0},
+    }
+
+
+def make_handler(state: MockState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, status, obj, headers=None):
+            data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+                return
+
+            ok, retry_after = state.admit()
+            if ok and state.roll(state.rate_limit_rate):
+                ok, retry_after = False, 1.0
+                state.count("ok", -1)
+                state.count("rate_limited")
+            if not ok:
+                self._json(
+                    429,
+                    {"error": {"message": "Rate limit reached", "type": "requests",
+                               "code": "rate_limit_exceeded"}},
+                    headers={"Retry-After": f"{retry_after:.3f}"},
+                )
+                return
+
+            if state.roll(state.error_rate):
+                state.count("errors")
+                self._json(500, {"error": {"message": "injected server error", "type": "server_error"}})
+                return
+
+            model = body.get("model", "mock")
+            if body.get("stream"):
+                self._stream(body, model)
+                return
+            time.sleep(state.latency(state.latency_ms))
+            self._json(200, {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": REPLY},
+                             "finish_reason": "stop"}],
+                "usage": _usage(body, len(REPLY)),
+            })
+
+        def _send_event(self, obj):
+            data = b"data: " + (obj if isinstance(obj, bytes) else json.dumps(obj, ensure_ascii=False).encode("utf-8"))
+            data += b"\n\n"
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def _stream(self, body, model):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def chunk(delta, finish=None):
+                return {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                        "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+
+            # 첫 토큰까지 = latency 의 절반 정도, 이후 조각마다 token_ms
+            fail_at = len(REPLY) // 2 if state.roll(state.midstream_error_rate) else None
+            time.sleep(state.latency(state.latency_ms / 2))
+            self._send_event(chunk({"role": "assistant", "content": ""}))
+            for i in range(0, len(REPLY), state.chunk_chars):
+                if fail_at is not None and i >= fail_at:
+                    state.count("midstream_errors")
+                    self._send_event({"error": {"message": "Rate limit reached", "type": "requests",
+                                                "code": "rate_limit_exceeded"}})
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                    return
+                self._send_event(chunk({"content": REPLY[i:i + state.chunk_chars]}))
+                time.sleep(state.token_ms / 1000)
+            self._send_event(chunk({}, "stop"))
+            if (body.get("stream_options") or {}).get("include_usage"):
+                self._send_event({"id": "chatcmpl-mock", "object": "chat.completion.chunk",
+                                  "created": int(time.time()), "model": model, "choices": [],
+                                  "usage": _usage(body, len(REPLY))})
+            self._send_event(b"[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def start_mock_server(port: int = 0, **options):
+    # 백그라운드 스레드로 띄우고 (server, state, base_url) 를 돌려준다. 끝나면 server.shutdown()
+    state = MockState(**options)
+    server = _Server(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--rpm", type=float, default=0, help="분당 요청 한도 (0 = 무제한)")
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0)
+    parser.add_argument("--midstream-error-rate", type=float, default=0)
+    args = parser.parse_args()
+
+    server, state, base_url = start_mock_server(
+        args.port, rpm=args.rpm, latency_ms=args.latency_ms, token_ms=args.token_ms,
+        jitter_ms=args.jitter_ms, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        midstream_error_rate=args.midstream_error_rate,
+    )
+    print(f"mock OpenAI server: {base_url}")
+    try:
+        while True:
+            time.sleep(10)
+            print(state.counts)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
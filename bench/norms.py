@@ -0,0 +1,102 @@
+"""체력 기준 비교: 예전 DataFrame 마스크 방식 vs NormIndex (단건 지연 / 배열 처리량).
+
+    python -m bench.norms --batch 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import norms
+
+
+def legacy_simple_norm_comment(norm_df, age, sex, exercise_name, value):
+    if age < 13:
+        age_group = "유소년"
+    elif age < 20:
+        age_group = "청소년"
+    elif age < 65:
+        age_group = "성인"
+    else:
+        age_group = "어르신"
+
+    metric_map = {
+        "윗몸일으키기": "윗몸말아올리기(회)",
+        "제자리 멀리뛰기": "제자리 멀리뛰기(cm)",
+        "멀리뛰기": "제자리 멀리뛰기(cm)",
+        "왕복오래달리기": "왕복오래달리기(회)",
+    }
+    target_metric = None
+    for key, m in metric_map.items():
+        if key in exercise_name:
+            target_metric = m
+            break
+    if target_metric is None:
+        return ""
+
+    sub = norm_df[
+        (norm_df["AGRDE_FLAG_NM"] == age_group)
+        & (norm_df["sex"] == sex)
+        & (norm_df["metric"] == target_metric)
+    ]
+    if sub.empty:
+        return ""
+    row = sub.iloc[0]
+    mean, p30, p70 = row["mean"], row["p30"], row["p70"]
+    if value < p30:
+        level = "하 (하위 30% 이하)"
+    elif value > p70:
+        level = "상 (상위 30% 수준)"
+    else:
+        level = "중 (중간 수준)"
+    return (
+        f"- 기준: {age_group} {sex}의 '{target_metric}' 평균은 약 {mean:.1f}, "
+        f"30% 지점 {p30:.1f}, 70% 지점 {p70:.1f}.\n"
+        f"- 현재 기록 {value:.1f} → **{level}** 정도로 볼 수 있어.\n"
+    )
+
+
+def per_call_us(fn, n):
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--single", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=1000000)
+    args = parser.parse_args()
+
+    norm_df = pd.read_csv(norms.NORM_CSV_PATH)
+    index = norms.NormIndex(norm_df)
+
+    legacy_us = per_call_us(
+        lambda i: legacy_simple_norm_comment(norm_df, 15, "남", "윗몸일으키기", 20 + i % 40), args.single
+    )
+    new_us = per_call_us(
+        lambda i: norms.simple_norm_comment(15, "남", "윗몸일으키기", 20 + i % 40, index), args.single
+    )
+    print(f"single   legacy {legacy_us:8.1f} us/call  |  NormIndex {new_us:6.2f} us/call")
+
+    rng = np.random.default_rng(0)
+    n = args.batch
+    ages = rng.integers(5, 80, n)
+    sexes = rng.choice(["남", "여"], n)
+    metrics = rng.choice(["윗몸말아올리기(회)", "제자리 멀리뛰기(cm)", "왕복오래달리기(회)"], n)
+    values = rng.uniform(0, 250, n)
+
+    start = time.perf_counter()
+    result = index.classify(ages, sexes, metrics, values)
+    batch_s = time.perf_counter() - start
+    scored = int((result["level"] >= 0).sum())
+    print(
+        f"batch    {n} rows in {batch_s * 1000:.1f} ms  ->  {n / batch_s / 1e6:.2f} M rows/s"
+        f"  (scored {scored}, legacy loop would take ~{legacy_us * n / 1e6:.0f} s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""프롬프트 앞부분 재사용률: 예전 문자열 이어붙이기 vs prompts.build_coach_messages.
+
+OpenAI prompt caching 은 요청의 앞부분(prefix)이 이전 요청과 같을 때만 적용된다.
+같은 사용자의 연속된 턴 / 서로 다른 사용자 사이에서 공통 prefix 가 몇 글자인지 비교한다.
+
+    python -m bench.prompt_prefix
+"""
+import json
+import os
+import time
+
+from conversation import count_tokens
+from prompts import COACH_RULES_PROMPT, build_coach_messages, is_profile_complete, render_profile_block
+
+PROFILES = [
+    {"age": 24, "sex": "남자", "run_level": "10분 뛰면 숨참", "squat_level": "20개", "location": "마포구 대흥동"},
+    {"age": 31, "sex": "여자", "run_level": "5km 30분", "squat_level": "50개", "location": "강남구"},
+]
+# 12턴: 기록 숫자를 말한 턴에만 체력 기준 비교가 붙는다
+_NORM = "- 현재 기록 30.0 → **중 (중간 수준)**"
+_HINT = "- 시설명: 대흥동 체육관 / 거리: 약 0.4km"
+TURNS = [
+    (text, _NORM if "개" in text else "", _HINT)
+    for text in [
+        "윗몸일으키기 30개 했어", "오늘 뭐하지", "하체 루틴 짜줘", "스쿼트 40개 했어",
+        "플랭크 1분 했어", "어디서 뛰지", "윗몸일으키기 35개 됐어", "내일은 쉬어도 돼?",
+        "상체도 하고 싶어", "팔굽혀펴기 20개 했어", "이번 주 목표 정해줘", "고마워",
+    ]
+]
+
+
+def legacy_messages(profile, history, norm, hint):
+    system_prompt = COACH_RULES_PROMPT + "\n\n"
+    system_prompt += "현재까지 파악된 사용자 프로필:\n"
+    system_prompt += f"- 나이: {profile.get('age')}\n"
+    system_prompt += f"- 성별: {profile.get('sex')}\n"
+    system_prompt += f"- 달리기 수준 관련 문장: {profile.get('run_level')}\n"
+    system_prompt += f"- 스쿼트 수준: {profile.get('squat_level')}\n"
+    system_prompt += f"- 주 운동 지역: {profile.get('location')}\n"
+    system_prompt += f"- 프로필 완성도: {'완료' if is_profile_complete(profile) else '미완료'}\n"
+    if norm:
+        system_prompt += "\n[백엔드 체력 기준 비교 예시]\n" + norm + "\n"
+    if hint:
+        system_prompt += (
+            "\n[백엔드에서 찾은 체육시설 후보 리스트]\n"
+            + hint
+            + "\n이 후보들을 참고해서 실제 답변에서 1~2개만 골라 구체적으로 언급해줘.\n"
+        )
+    return [{"role": "system", "content": system_prompt}, *history]
+
+
+def new_messages(profile, history, norm, hint):
+    system_prompt, messages = build_coach_messages(profile, history, norm, hint)
+    return [{"role": "system", "content": system_prompt}, *messages]
+
+
+def serialize(messages):
+    return json.dumps(messages, ensure_ascii=False)
+
+
+def common_prefix(a: str, b: str) -> int:
+    return len(os.path.commonprefix([a, b]))
+
+
+def session(build, profile):
+    history, requests = [], []
+    for text, norm, hint in TURNS:
+        history.append({"role": "user", "content": text})
+        requests.append(serialize(build(profile, history, norm, hint)))
+        history.append({"role": "assistant", "content": "좋아! 오늘은 스쿼트 4세트 x 15회 가보자. " * 8})
+    return requests
+
+
+def main():
+    print(f"static rules prefix: {len(COACH_RULES_PROMPT)} chars ≈ {count_tokens(COACH_RULES_PROMPT)} tokens")
+    for name, build in (("legacy", legacy_messages), ("template", new_messages)):
+        a = session(build, PROFILES[0])
+        b = session(build, PROFILES[1])
+        same_user = [common_prefix(x, y) for x, y in zip(a, a[1:])]
+        total = sum(len(y) for y in a[1:])
+        cross_user = [common_prefix(x, y) for x, y in zip(a, b)]
+        print(f"{name:<9} prefix reused from previous turn: {sum(same_user) / total:5.1%} of "
+              f"{total} chars over {len(a) - 1} turns  |  shared with another user: "
+              f"{min(cross_user)} chars")
+
+    n = 100_000
+    start = time.perf_counter()
+    for _ in range(n):
+        render_profile_block(PROFILES[0])
+    print(f"render_profile_block (memoized): {(time.perf_counter() - start) / n * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""기록 보기 / 요약 탭이 rerun 마다 하는 조회: 매번 조회 vs querycache (사용자 기록 버전 캐시).
+
+    python -m bench.query_cache --rows 100000 --reruns 200 --write-every 20
+
+rerun 한 번 = 기록 건수 + 첫 페이지 + 요약 탭 분석(analytics.user_report) + 인사말용 30일 요약.
+write-every 번마다 insert_log 로 한 건씩 써서 캐시가 정확히 무효화되는지도 같이 본다.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+import db
+import querycache
+
+USER = "bench"
+
+
+def seed(n_rows):
+    # 하루 3건씩 과거로 쌓는다
+    exercises = ["스쿼트", "팔굽혀펴기", "달리기(분)"]
+    today = date.today()
+    db.bulk_insert_logs(USER, (
+        ((today - timedelta(days=i // 3)).isoformat(), exercises[i % 3], 10 + i % 7)
+        for i in range(n_rows)
+    ))
+
+
+def rerun():
+    since = (date.today() - timedelta(days=30)).isoformat()
+    stats = querycache.window_stats(USER, since)
+    total = querycache.count_logs(USER)
+    rows, _ = querycache.logs_page(USER, page_size=50)
+    report = querycache.training_report(USER)
+    return stats["total_amount"], total, rows[0][1:4], report["summary"]["load_7"]
+
+
+def run(reruns, write_every, enabled):
+    querycache._default_cache = querycache.UserQueryCache(enabled=enabled)
+    times = []
+    results = []
+    for i in range(reruns):
+        if write_every and i and i % write_every == 0:
+            db.insert_log(USER, date.today().isoformat(), "스쿼트", 1)
+        start = time.perf_counter()
+        results.append(rerun())
+        times.append((time.perf_counter() - start) * 1000)
+    return times, results, querycache.get_query_cache().stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--reruns", type=int, default=200)
+    parser.add_argument("--write-every", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.configure(path=os.path.join(tmp, "bench.db"))
+        db.init_db()
+        seed(args.rows)
+
+        # 둘 다 같은 순서로 쓰므로 (쓰기는 날짜별 합계 / 건수에 1씩 더해진다) 결과도 같아야 한다
+        uncached, expected, _ = run(args.reruns, args.write_every, enabled=False)
+        db.configure(path=os.path.join(tmp, "bench.db"))
+        with db.get_pool().connection() as conn, conn:
+            conn.execute("DELETE FROM logs WHERE amount = 1")
+        db.rebuild_rollup(USER)
+        cached, results, stats = run(args.reruns, args.write_every, enabled=True)
+        assert results == expected, "cached results differ"
+
+    def fmt(times):
+        times = sorted(times)
+        return f"median {times[len(times) // 2]:7.3f} ms  p95 {times[int(len(times) * 0.95)]:7.3f} ms"
+
+    print(f"{args.rows} log rows, {args.reruns} reruns, a write every {args.write_every} reruns")
+    print(f"uncached  {fmt(uncached)}")
+    print(f"cached    {fmt(cached)}  ({sum(uncached) / sum(cached):.1f}x total)")
+    print(f"cache stats {stats}")
+
+
+if __name__ == "__main__":
+    main()
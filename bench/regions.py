@@ -0,0 +1,76 @@
+"""지역명 → 지역 코드 (regions.RegionGazetteer) 와 지역 코드로 시설 찾기 (합성 50만 행).
+
+    python -m bench.regions --rows 500000
+
+같은 곳을 여러 방식으로 쓴 입력이 모두 같은 코드 / 같은 시설로 가는지 보여 주고,
+주소 토큰 역색인(token_search) 과 지역 코드 조회(resolve + region_rows) 시간을 비교한다.
+"""
+import argparse
+import time
+
+from bench.synthetic import synthetic_chat_messages, synthetic_facility_table
+from facilities import FacilityIndex
+
+VARIANTS = [
+    "마포구 대흥동", "서울 마포구 대흥동", "서울특별시 마포구 대흥동", "서울시마포구대흥동", "대흥동",
+    "마포구", "서울 마포구", "마포", "서울", "서울특별시", "강남구", "중구", "없는구",
+]
+
+
+def per_call_us(fn, args_list, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for args in args_list:
+            fn(*args)
+    return (time.perf_counter() - start) / (repeat * len(args_list)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=200_000)
+    args = parser.parse_args()
+
+    df = synthetic_facility_table(args.rows, coords=True)
+    start = time.perf_counter()
+    index = FacilityIndex(df)
+    print(f"index build: {time.perf_counter() - start:.2f} s for {args.rows} rows, "
+          f"{len(index.regions)} region codes")
+
+    start = time.perf_counter()
+    index.regions.__class__(list(index.regions.counts), list(index.regions.counts.values()))
+    print(f"gazetteer build (trie): {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    print(f"\n{'query':<24} {'token_search hits':>18}  region code")
+    for q in VARIANTS:
+        code = index.resolve_region(q)
+        hits = len(index.token_search(q, k=args.rows))
+        rows = len(index.region_rows(code)) if code else 0
+        print(f"{q:<24} {hits:>18}  {code} ({rows} rows)")
+
+    queries = [(q,) for q in VARIANTS]
+    codes = [(index.resolve_region(q),) for q in VARIANTS]
+    gaz = index.regions
+
+    def uncached(q):
+        gaz._resolved.clear()
+        return gaz.resolve(q)
+
+    print()
+    print(f"token_search          {per_call_us(index.token_search, queries, args.repeat):8.1f} us/query")
+    print(f"resolve (uncached)    {per_call_us(uncached, queries, args.repeat):8.1f} us/query")
+    print(f"resolve (cached)      {per_call_us(gaz.resolve, queries, args.repeat):8.1f} us/query")
+    print(f"region_rows[:5]       {per_call_us(lambda c: index.region_rows(c)[:5].tolist(), codes, args.repeat):8.1f} us/query")
+    print(f"search (code path)    {per_call_us(index.search, queries, args.repeat):8.1f} us/query")
+
+    messages = synthetic_chat_messages(args.messages, seed=3)
+    start = time.perf_counter()
+    found = sum(gaz.find_in_text(m) is not None for m in messages)
+    elapsed = time.perf_counter() - start
+    print(f"\nfind_in_text on {len(messages)} chat messages: {elapsed / len(messages) * 1e6:.1f} us/msg, "
+          f"{found / len(messages):.0%} mention a region")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""백엔드 함수 벤치마크 모음: 합성 데이터로 여러 규모에서 재고 JSON 으로 남긴 뒤 기준값과 비교.
+
+    python -m bench.suite                                  # 기본 규모 → bench/results/latest.json
+    python -m bench.suite --full                           # 기록 1000만 행 / 시설 100만 행까지
+    python -m bench.suite --baseline bench/baseline.json   # 기준값보다 느려진 항목이 있으면 exit 1
+    python -m bench.suite --save-baseline                  # 이번 결과를 bench/baseline.json 으로
+
+대상 (규모):
+  - db.get_logs / querycache.user_summary / db.insert_log  (기록 테이블 행 수, 사용자 = 행 수 / 1000)
+    기록이 가장 많은 사용자로 잰다. user_summary 는 캐시를 끄고 매번 계산한다
+  - coach.extract_profile_from_text  (채팅 메시지 수, 시/도 지역 사전)
+  - norms.simple_norm_comment        (호출 수, 저장소의 기준표 CSV)
+  - facilities.build_facility_hint   (전국 합성 시설 표 행 수, 좌표 포함)
+
+데이터는 seed 가 고정된 bench/synthetic.py 생성기로 만든다. Streamlit 과 네트워크 없이 돌고,
+끝에서 streamlit 이 import 되지 않았는지 확인한다 (백엔드가 화면 코드와 분리돼 있는지).
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from bench.synthetic import (
+    synthetic_chat_messages, synthetic_facility_table, synthetic_training_logs, synthetic_users,
+    training_log_rows,
+)
+
+LOG_SCALES = (1_000, 100_000, 1_000_000)
+LOG_SCALES_FULL = LOG_SCALES + (10_000_000,)
+MESSAGE_SCALES = (1_000, 10_000, 100_000)
+NORM_CALLS = (1_000, 10_000, 100_000)
+FACILITY_SCALES = (10_000, 100_000, 500_000)
+FACILITY_SCALES_FULL = FACILITY_SCALES + (1_000_000,)
+
+RESULTS_PATH = os.path.join("bench", "results", "latest.json")
+BASELINE_PATH = os.path.join("bench", "baseline.json")
+# 기준값 대비 이만큼(비율) 넘게 느려지면 회귀. 아주 짧은 항목은 MIN_DIFF_MS 보다 차이가 커야 센다.
+# 비교는 min_ms (가장 빨랐던 한 번)로 한다. 같은 기계에서도 median 은 다른 프로세스 영향으로
+# 실행마다 30~40% 씩 흔들려서 회귀 판정에 쓰기 어렵다
+TOLERANCE = 0.25
+MIN_DIFF_MS = 0.02
+COMPARE_STAT = "min_ms"
+SEED_BATCH = 50_000
+# 항목마다 반복 횟수 = 이 시간(초)을 채우는 만큼 (MIN_REPEAT ~ MAX_REPEAT)
+TIME_BUDGET_SEC = 1.0
+MIN_REPEAT = 5
+MAX_REPEAT = 200
+
+
+# =========================
+# 재기
+# =========================
+def measure(name, scale, unit, run, items=1, repeat=None):
+    # run() 을 repeat 번 불러 한 번당 ms 의 median / p95 / min. items = run 한 번이 처리하는 개수.
+    # repeat 을 안 주면 첫 호출 시간으로 TIME_BUDGET_SEC 에 맞춘다 (첫 호출은 캐시 / 지연 로드라 빼고 잰다)
+    start = time.perf_counter()
+    run()
+    if repeat is None:
+        first = time.perf_counter() - start
+        repeat = max(MIN_REPEAT, min(MAX_REPEAT, int(TIME_BUDGET_SEC / max(first, 1e-6))))
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    median = times[len(times) // 2]
+    result = {
+        "name": name,
+        "scale": scale,
+        "unit": unit,
+        "repeat": repeat,
+        "items": items,
+        "median_ms": round(median, 4),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 4),
+        "min_ms": round(times[0], 4),
+        "per_item_us": round(median * 1000 / items, 3),
+    }
+    per_item = f"  ({result['per_item_us']:.2f} us / item)" if items > 1 else ""
+    print(f"  {name:<32} {scale:>10,} {unit:<10} median {median:10.3f} ms  min {times[0]:10.3f} ms{per_item}")
+    return result
+
+
+def seed_logs(n_rows, seed=0):
+    # 사용자 n_rows / 1000 명, 기록 n_rows 행. 기록이 가장 많은 사용자 이름과 그 행 수를 돌려준다
+    import db
+
+    n_users = max(1, n_rows // 1000)
+    user, day, exercise, amount = synthetic_training_logs(n_rows, n_users, days=730, seed=seed)
+    for u in synthetic_users(n_users, seed=seed):
+        db.create_user(u["username"], u["password"])
+        db.update_user_profile(u["username"], u["profile"])
+    created_at = datetime.now().isoformat()
+    with db.get_pool().connection() as conn:
+        for start in range(0, n_rows, SEED_BATCH):
+            rows = training_log_rows(user, day, exercise, amount, start, start + SEED_BATCH)
+            with conn:
+                db._write_logs(conn, [row + (created_at,) for row in rows])
+    counts = np.bincount(user, minlength=n_users)
+    heavy = int(counts.argmax())
+    return f"user{heavy}", int(counts[heavy])
+
+
+def bench_logs(scales, tmp):
+    import db
+    import querycache
+
+    results = []
+    for n_rows in scales:
+        db.configure(path=os.path.join(tmp, f"logs_{n_rows}.db"))
+        db.init_db()
+        start = time.perf_counter()
+        username, user_rows = seed_logs(n_rows)
+        print(f"logs: {n_rows:,} rows seeded in {time.perf_counter() - start:.1f} s"
+              f" (heaviest user {username}: {user_rows:,} rows)")
+
+        querycache._default_cache = querycache.UserQueryCache(enabled=False)
+        results.append(measure("db.get_logs", n_rows, "log rows", lambda: db.get_logs(username)))
+        results.append(measure(
+            "querycache.user_summary", n_rows, "log rows", lambda: querycache.user_summary(username)
+        ))
+        results.append(measure(
+            "db.insert_log", n_rows, "log rows",
+            lambda: db.insert_log(username, "2024-01-01", "스쿼트", 10),
+        ))
+        querycache._default_cache = None
+        db.get_pool().close()
+    return results
+
+
+def bench_extraction(scales):
+    from coach import extract_profile_from_text
+    from regions import SIDO_GAZETTEER
+
+    results = []
+    for n in scales:
+        messages = synthetic_chat_messages(n, seed=0)
+
+        def run():
+            for text in messages:
+                extract_profile_from_text(text, SIDO_GAZETTEER)
+
+        results.append(measure("coach.extract_profile_from_text", n, "messages", run, items=n))
+    return results
+
+
+def bench_norms(scales):
+    from norms import NORM_CSV_PATH, NormIndex, simple_norm_comment
+
+    index = NormIndex.from_csv(NORM_CSV_PATH)
+    users = synthetic_users(max(scales), seed=1)
+    values = np.random.default_rng(1).integers(0, 80, len(users)).tolist()
+    # 나이 / 성별이 비어 있으면 예전처럼 기준표를 보지 않는다 (coach.norm_analysis_for)
+    calls = [(u["profile"].get("age", 30), u["profile"].get("sex", "남"), v) for u, v in zip(users, values)]
+
+    results = []
+    for n in scales:
+        batch = calls[:n]
+
+        def run():
+            for age, sex, value in batch:
+                simple_norm_comment(age, sex, "윗몸일으키기", value, index=index)
+
+        results.append(measure("norms.simple_norm_comment", n, "calls", run, items=n))
+    return results
+
+
+def bench_facilities(scales):
+    from facilities import FacilityIndex, build_facility_hint
+
+    users = synthetic_users(1000, seed=2)
+    # 사용자 지역 (합성 시설 표에 있는 서울 구 + 합성 동 이름, 없는 동이면 구로 내려간다) + 시/도만
+    locations = [u["profile"]["location"] for u in users if "location" in u["profile"]][:200]
+    locations += ["마포구 대흥동", "서울 강남구", "부산광역시", "없는구"]
+
+    results = []
+    for n_rows in scales:
+        start = time.perf_counter()
+        index = FacilityIndex(synthetic_facility_table(n_rows, seed=0, coords=True))
+        print(f"facilities: {n_rows:,} rows indexed in {time.perf_counter() - start:.1f} s")
+
+        def run():
+            for location in locations:
+                build_facility_hint(location, index)
+
+        results.append(measure(
+            "facilities.build_facility_hint", n_rows, "facilities", run, items=len(locations)
+        ))
+    return results
+
+
+# =========================
+# 결과 / 기준값
+# =========================
+def run_meta(args) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sqlite": sqlite3.sqlite_version,
+        "full": args.full,
+        "only": args.only,
+    }
+
+
+def compare(results, baseline, tolerance=TOLERANCE) -> list:
+    # (name, scale) 이 같은 항목끼리 min_ms 비교. 회귀한 항목 목록을 돌려준다
+    base = {(r["name"], r["scale"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\ncompared with baseline {baseline['meta'].get('commit') or '?'} "
+          f"({baseline['meta'].get('created_at', '?')}), tolerance {tolerance:.0%}")
+    for r in results:
+        b = base.get((r["name"], r["scale"]))
+        if b is None:
+            print(f"  {r['name']:<32} {r['scale']:>10,}  (기준값 없음)")
+            continue
+        ratio = r[COMPARE_STAT] / b[COMPARE_STAT] if b[COMPARE_STAT] else float("inf")
+        slower = ratio > 1 + tolerance and r[COMPARE_STAT] - b[COMPARE_STAT] > MIN_DIFF_MS
+        faster = ratio < 1 / (1 + tolerance)
+        mark = "REGRESSION" if slower else ("faster" if faster else "")
+        print(f"  {r['name']:<32} {r['scale']:>10,}  {b[COMPARE_STAT]:10.3f} → {r[COMPARE_STAT]:10.3f} ms"
+              f"  x{ratio:5.2f}  {mark}")
+        if slower:
+            regressions.append({**r, "baseline_ms": b[COMPARE_STAT], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+
+
+SUITES = ("logs", "extraction", "norms", "facilities")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full", action="store_true", help="기록 1000만 행 / 시설 100만 행까지")
+    parser.add_argument("--only", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--out", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=None, help="비교할 결과 JSON (예: bench/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help=f"결과를 {BASELINE_PATH} 에도 쓴다")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if "logs" in args.only:
+            results += bench_logs(LOG_SCALES_FULL if args.full else LOG_SCALES, tmp)
+        if "extraction" in args.only:
+            results += bench_extraction(MESSAGE_SCALES)
+        if "norms" in args.only:
+            results += bench_norms(NORM_CALLS)
+        if "facilities" in args.only:
+            results += bench_facilities(FACILITY_SCALES_FULL if args.full else FACILITY_SCALES)
+
+    assert "streamlit" not in sys.modules, "backend imported streamlit"
+
+    data = {"meta": run_meta(args), "results": results}
+    write_json(args.out, data)
+    print(f"\nwrote {args.out}")
+    if args.save_baseline:
+        write_json(BASELINE_PATH, data)
+        print(f"wrote {BASELINE_PATH}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s)")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
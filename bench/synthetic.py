@@ -0,0 +1,182 @@
+"""벤치마크용 합성 데이터 생성기 (재현 가능하도록 seed 고정)."""
+import numpy as np
+import pandas as pd
+
+SIDO = [
+    "서울특별시", "부산광역시", "대구광역시", "인천광역시", "광주광역시", "대전광역시",
+    "울산광역시", "세종특별자치시", "경기도", "강원특별자치도", "충청북도", "충청남도",
+    "전북특별자치도", "전라남도", "경상북도", "경상남도", "제주특별자치도",
+]
+SEOUL_GU = [
+    "종로구", "중구", "용산구", "성동구", "광진구", "동대문구", "중랑구", "성북구", "강북구",
+    "도봉구", "노원구", "은평구", "서대문구", "마포구", "양천구", "강서구", "구로구", "금천구",
+    "영등포구", "동작구", "관악구", "서초구", "강남구", "송파구", "강동구",
+]
+_SYLLABLES = list("가나다라마바사아자차카타파하강남동서북신한성원영정")
+FACILITY_TYPES = ["헬스장", "수영장", "축구장", "테니스장", "체육관", "배드민턴장", "골프연습장", "탁구장"]
+
+
+def _names(rng, n, suffix):
+    return ["".join(rng.choice(_SYLLABLES, 2)) + suffix for _ in range(n)]
+
+
+# 한반도 남쪽 대략의 범위 (위도, 경도)
+KOREA_BBOX = ((33.2, 38.6), (126.1, 129.6))
+
+
+def synthetic_facility_table(n_rows=500_000, seed=0, gu_per_sido=15, dong_per_gu=20,
+                             coords=False, missing_coord_ratio=0.05):
+    # 시도 → 시군구 → 동 계층을 만들고 시설을 무작위로 배치한다.
+    # 서울은 실제 25개 구 이름을 쓰고, 마포구에는 대흥동을 넣는다.
+    # coords=True 면 faci_lat / faci_lot 도 만든다: 시도 → 구 → 동 순으로 중심을 조금씩
+    # 흩뜨려 놓고 시설은 동 중심 ±0.01° 안에 둔다. 일부(missing_coord_ratio)는 비워 둔다
+    rng = np.random.default_rng(seed)
+    (lat0, lat1), (lon0, lon1) = KOREA_BBOX
+    regions = []
+    centers = []
+    for sido in SIDO:
+        gus = SEOUL_GU if sido == "서울특별시" else _names(rng, gu_per_sido, "구")
+        sido_c = (rng.uniform(lat0 + 0.3, lat1 - 0.3), rng.uniform(lon0 + 0.3, lon1 - 0.3))
+        for gu in gus:
+            gu_c = (sido_c[0] + rng.normal(0, 0.08), sido_c[1] + rng.normal(0, 0.08))
+            dongs = _names(rng, dong_per_gu, "동")
+            if gu == "마포구":
+                dongs[0] = "대흥동"
+            for dong in dongs:
+                regions.append((sido, gu, dong))
+                centers.append((gu_c[0] + rng.normal(0, 0.015), gu_c[1] + rng.normal(0, 0.015)))
+
+    picks = rng.integers(0, len(regions), n_rows)
+    bunji = rng.integers(1, 999, n_rows)
+    road_no = rng.integers(1, 300, n_rows)
+    types = rng.choice(FACILITY_TYPES, n_rows)
+
+    faci_addr = []
+    road_addr = []
+    names = []
+    for i, r in enumerate(picks):
+        sido, gu, dong = regions[r]
+        faci_addr.append(f"{sido} {gu} {dong} {bunji[i]}")
+        road_addr.append(f"{sido} {gu} {dong[:-1]}로 {road_no[i]}")
+        names.append(f"{dong} {types[i]} {i}")
+
+    # 실제 데이터처럼 일부 지번 주소는 비어 있다
+    faci_addr = pd.Series(faci_addr, dtype=object)
+    faci_addr[rng.random(n_rows) < 0.1] = None
+
+    data = {
+        "faci_nm": names,
+        "fcob_nm": types,
+        "faci_road_addr": road_addr,
+        "faci_addr": faci_addr,
+    }
+    if coords:
+        centers = np.asarray(centers)[picks]
+        lat = centers[:, 0] + rng.uniform(-0.01, 0.01, n_rows)
+        lon = centers[:, 1] + rng.uniform(-0.01, 0.01, n_rows)
+        missing = rng.random(n_rows) < missing_coord_ratio
+        lat[missing] = np.nan
+        lon[missing] = np.nan
+        data["faci_lat"] = lat
+        data["faci_lot"] = lon
+    return pd.DataFrame(data)
+
+
+# 채팅 메시지 조각: 프로필 / 운동 기록 / 지역 / 잡담. 섞어서 한 메시지를 만든다
+_MSG_AGE = ["{n}살", "나이는 {n}", "나이 {n}", "{n} 살이에요", "올해 {n}살 됐어"]
+_MSG_SEX = ["남자", "여자", "남성", "여성", " 남 ", " 여 ", "남편이랑", "여기"]
+_MSG_EXERCISE = [
+    "스쿼트 {n}개", "스쿼트는 {n}번", "스쿼트 했어", "윗몸일으키기 {n}개", "윗몸 {n} 개", "윗몸일으키기 해봤어",
+    "달리기 {n}분", "조깅 좀 했어", "뛰는 건 힘들어", "플랭크 {n}초", "푸쉬업 {n}개",
+]
+_MSG_PLACE = ["{gu}", "{gu} {dong}", "서울시 {gu} {dong}", "{gu}에 살아", "친구랑 {gu} 근처", "운동기구 추천"]
+_MSG_MOOD = [
+    "오늘은 운동 못했어", "운동 안 했어", "어제 안했는데", "오늘 뭐하지", "하체 루틴 짜줘", "무릎이 좀 아파",
+    "내일은 꼭 할게", "ㅋㅋ 힘들다", "좋아요!", "시간이 30분밖에 없어", "Hello coach 123",
+]
+
+
+def synthetic_chat_messages(n=1_000_000, seed=0):
+    # 사용자 채팅 메시지 n 개 (str list). 조각 1~4개를 무작위로 이어 붙이고,
+    # 숫자 / 구 / 동 이름도 무작위로 바꾼다
+    rng = np.random.default_rng(seed)
+    groups = [_MSG_AGE, _MSG_SEX, _MSG_EXERCISE, _MSG_PLACE, _MSG_MOOD]
+    dongs = _names(rng, 50, "동")
+    n_parts = rng.integers(1, 5, n)
+    group_idx = rng.integers(0, len(groups), n_parts.sum())
+    pick = rng.random(n_parts.sum())
+    nums = rng.integers(1, 120, n_parts.sum())
+    gus = rng.integers(0, len(SEOUL_GU), n_parts.sum())
+    dong_idx = rng.integers(0, len(dongs), n_parts.sum())
+    seps = rng.choice([" ", ", ", " ", "\n", ""], n_parts.sum())
+
+    messages = []
+    j = 0
+    for k in n_parts:
+        parts = []
+        for _ in range(k):
+            group = groups[group_idx[j]]
+            template = group[int(pick[j] * len(group))]
+            parts.append(template.format(n=nums[j], gu=SEOUL_GU[gus[j]], dong=dongs[dong_idx[j]]) + seps[j])
+            j += 1
+        messages.append("".join(parts))
+    return messages
+
+
+LOG_EXERCISES = ["팔굽혀펴기", "윗몸일으키기", "스쿼트", "달리기(분)", "턱걸이", "플랭크(초)", "기타"]
+# 운동별 한 번 기록할 때의 양 범위 (회 / 분 / 초)
+_LOG_AMOUNT_RANGE = [(5, 60), (10, 80), (10, 100), (5, 90), (1, 20), (20, 300), (1, 60)]
+
+
+def synthetic_training_logs(n_rows=10_000_000, n_users=100_000, days=730, seed=0, end_day=None):
+    # 운동 기록 n_rows 개를 정수 코드 배열로: (user, day, exercise, amount).
+    # 사용자마다 활동 정도가 달라서(기록 수가 지수 분포) 최근에 몰린 사용자와 드문 사용자가 섞인다.
+    # day 는 1970-01-01 부터의 일수, end_day(기본 오늘) 이전 days 일 안
+    if end_day is None:
+        end_day = int(np.datetime64("today", "D").astype(np.int64))
+    rng = np.random.default_rng(seed)
+    weight = rng.exponential(1.0, n_users)
+    user = rng.choice(n_users, n_rows, p=weight / weight.sum())
+    # 사용자마다 선호 운동 2가지 + 가끔 다른 운동
+    favorite = rng.integers(0, len(LOG_EXERCISES), (n_users, 2))
+    exercise = np.where(rng.random(n_rows) < 0.8, favorite[user, rng.integers(0, 2, n_rows)],
+                        rng.integers(0, len(LOG_EXERCISES), n_rows))
+    # 최근 날짜일수록 기록이 조금 더 많다
+    day = end_day - np.minimum((rng.exponential(days / 3, n_rows)).astype(np.int64), days - 1)
+    low = np.array([r[0] for r in _LOG_AMOUNT_RANGE])
+    high = np.array([r[1] for r in _LOG_AMOUNT_RANGE])
+    amount = rng.integers(low[exercise], high[exercise] + 1)
+    return user, day, exercise, amount
+
+
+def synthetic_users(n=1000, seed=0):
+    # 회원 n 명: {"username", "password", "profile"}. 프로필은 일부만 채워져 있다
+    # (나이 / 성별 / 서울 구 + 동, 달리기 / 스쿼트 수준)
+    rng = np.random.default_rng(seed)
+    dongs = _names(rng, 50, "동")
+    ages = rng.integers(15, 75, n)
+    sexes = rng.choice(["남", "여"], n)
+    gus = rng.integers(0, len(SEOUL_GU), n)
+    dong_idx = rng.integers(0, len(dongs), n)
+    filled = rng.random((n, 3)) < [0.8, 0.8, 0.6]
+    users = []
+    for i in range(n):
+        profile = {}
+        if filled[i, 0]:
+            profile["age"] = int(ages[i])
+        if filled[i, 1]:
+            profile["sex"] = str(sexes[i])
+        if filled[i, 2]:
+            profile["location"] = f"{SEOUL_GU[gus[i]]} {dongs[dong_idx[i]]}"
+        users.append({"username": f"user{i}", "password": f"pw{i}", "profile": profile})
+    return users
+
+
+def training_log_rows(user, day, exercise, amount, start=0, stop=None):
+    # synthetic_training_logs 의 배열 [start:stop] → db 에 넣을 (username, log_date, exercise, amount) 목록
+    sl = slice(start, stop)
+    dates = np.datetime_as_string(day[sl].astype("datetime64[D]")).tolist()
+    return [
+        (f"user{u}", d, LOG_EXERCISES[e], a)
+        for u, d, e, a in zip(user[sl].tolist(), dates, exercise[sl].tolist(), amount[sl].tolist())
+    ]
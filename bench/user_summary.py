@@ -0,0 +1,80 @@
+"""최근 30일 요약: pandas 로 전체 기록을 읽는 예전 방식 vs 인덱스 SQL 집계.
+
+    python -m bench.user_summary --rows 10 1000 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+import db
+
+
+def legacy_summary(username):
+    rows = db.get_logs(username)
+    df = pd.DataFrame(rows, columns=["log_date", "exercise", "amount", "created_at"])
+    df["log_date"] = pd.to_datetime(df["log_date"])
+    since = pd.to_datetime(date.today()) - timedelta(days=30)
+    df_30 = df[df["log_date"] >= since]
+    return (
+        df_30["log_date"].dt.date.nunique(),
+        df_30["amount"].sum(),
+        df_30.groupby("exercise")["amount"].sum().sort_values(ascending=False).index[0],
+    )
+
+
+def sql_summary(username):
+    since = (date.today() - timedelta(days=30)).isoformat()
+    return db.get_window_stats(username, since)
+
+
+def seed(username, n_rows):
+    # 하루 3건씩 과거로 쌓는다 → 최근 30일 구간의 행 수는 규모와 무관하게 일정
+    exercises = ["스쿼트", "팔굽혀펴기", "달리기(분)"]
+    today = date.today()
+    now = datetime.now().isoformat()
+    with db.get_pool().connection() as conn, conn:
+        conn.executemany(
+            """
+            INSERT INTO logs (username, log_date, exercise, amount, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (username, (today - timedelta(days=i // 3)).isoformat(),
+                 exercises[i % 3], 10 + i % 7, now)
+                for i in range(n_rows)
+            ],
+        )
+    db.rebuild_rollup(username)
+
+
+def timeit(fn, *args, repeat=50):
+    fn(*args)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 1000, 100000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.configure(path=os.path.join(tmp, "bench.db"))
+        db.init_db()
+        for n in args.rows:
+            user = f"user_{n}"
+            seed(user, n)
+            legacy_ms = timeit(legacy_summary, user, repeat=10 if n >= 100000 else 50)
+            sql_ms = timeit(sql_summary, user)
+            print(f"rows={n:<8} pandas {legacy_ms:8.2f} ms  |  sql {sql_ms:6.3f} ms")
+        db.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import time
+from contextlib import contextmanager
+
+import metrics
+from extraction import scan_message
+from facilities import build_facility_hint, get_region_gazetteer
+from norms import simple_norm_comment
+from prompts import build_coach_messages
+
+# =========================
+# 코치 한 턴 처리 (Streamlit 없이 쓸 수 있는 부분)
+# =========================
+# 사용자 입력 한 줄 → 프로필 추출 → 체력 기준 비교 → 시설 힌트 → 프롬프트 조립.
+# 모델 호출은 화면에 그리는 방식(스트리밍 여부)에 따라 호출하는 쪽에서 한다.
+TURN_STAGES = ("extract", "norm", "facility", "prompt")
+
+
+@metrics.timed()
+def extract_profile_from_text(text: str, gazetteer=None) -> dict:
+    # gazetteer(regions.RegionGazetteer)를 넘기면 지역을 지역 코드로 정리한다 (with_region)
+    profile = scan_message(text)["profile"]
+    return with_region(profile, text, gazetteer) if gazetteer is not None else profile
+
+
+def with_region(new_info: dict, text: str, gazetteer) -> dict:
+    # 메시지 속 지역을 지역 코드로 바꾼다. 정규식이 뽑은 location 이 있으면 그것을 통째로
+    # 읽을 수 있을 때만 코드로 바꾸고 (사전에 없는 동 이름을 상위 지역으로 뭉개지 않도록),
+    # 정규식이 못 뽑은 지역("대흥동에서", "서울시")은 메시지에서 찾는다
+    location = new_info.get("location")
+    if location:
+        code = gazetteer.resolve(location, strict=True)
+        new_info["region_code"] = code
+    else:
+        code = gazetteer.find_in_text(text)
+    if code is not None:
+        new_info["location"] = code
+        new_info["region_code"] = code
+    return new_info
+
+
+_FALLBACK_BASE = (
+    "지금은 AI 코치 서버를 쓸 수 없어서 고급 분석은 잠시 제한돼 있어.\n"
+    "그래도 코치 입장에서 한 번 정리해볼게.\n\n"
+)
+# scan_message 의 intent → 답. None 은 기본 답
+FALLBACK_REPLIES = {
+    "not_done": (
+        "오늘은 많이 못 움직인 날이네. 괜찮아, 누구나 그런 날 있어 😊\n"
+        "지금 자리에서 스쿼트 10개, 팔굽혀펴기 5개만 해볼까?\n"
+        "내일은 오늘보다 딱 1분만 더 움직이는 걸 목표로 잡자!"
+    ),
+    "situp": (
+        "복근 운동은 코어 안정성과 자세 교정에 진짜 중요해.\n"
+        "주 3~4회, 세트 사이 1분 휴식 기준으로 3세트 정도를 추천해.\n"
+        "허리가 불편하면 상체를 너무 높이 들지 말고 통증 없는 범위에서만 해줘!"
+    ),
+    "run": (
+        "달리기는 심폐지구력 올려주는 최고급 운동이야.\n"
+        "처음엔 '말하면서 숨 약간 찰 정도' 강도로 20분만 꾸준히 해봐.\n"
+        "일주일에 3번만 해도 2~4주 뒤 체력이 확 달라질 거야 🏃‍♂️"
+    ),
+    None: (
+        "지금 상태랑 고민 말해준 것만으로도 이미 첫 걸음은 뗀 거야.\n"
+        "가벼운 스트레칭, 스쿼트 10개, 팔 벌려뛰기 20개부터 시작해 보자.\n"
+        "작은 습관이 쌓이면 체력은 생각보다 금방 좋아져 🙌"
+    ),
+}
+
+
+def simple_fallback_reply(user_input: str, scan: dict = None) -> str:
+    # scan: 이미 scan_message 한 결과가 있으면 넘겨서 다시 훑지 않는다
+    if scan is None:
+        scan = scan_message(user_input)
+    metrics.count("fitness_fallback_total", intent=scan["intent"] or "default")
+    return _FALLBACK_BASE + FALLBACK_REPLIES[scan["intent"]]
+
+
+@contextmanager
+def _stage(timings, name: str):
+    # timings 가 dict 면 단계별 소요 시간(ms)을 기록. 계측(metrics)이 켜져 있으면 히스토그램에도
+    if timings is None and not metrics.is_enabled():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if timings is not None:
+            timings[name] = elapsed * 1000
+        metrics.observe("fitness_stage_seconds", elapsed, stage=name)
+
+
+def merge_profile(profile: dict, new_info: dict):
+    # (새 프로필, 바뀐 값이 있는지). 빈 값은 기존 값을 지우지 않는다.
+    # 단 지역이 바뀌면 region_code 는 (None 이어도) 새 지역 것을 따른다
+    updated = profile.copy()
+    changed = False
+    for k, v in new_info.items():
+        if v and updated.get(k) != v:
+            updated[k] = v
+            changed = True
+    if new_info.get("location") and updated.get("region_code") != new_info.get("region_code"):
+        updated["region_code"] = new_info.get("region_code")
+        changed = True
+    return updated, changed
+
+
+def norm_analysis_for(profile: dict, situp_count: float, norm_index=None) -> str:
+    if not (profile.get("age") and profile.get("sex")) or situp_count is None:
+        return ""
+    return simple_norm_comment(profile["age"], profile["sex"], "윗몸일으키기", situp_count, index=norm_index)
+
+
+def facility_hint_for(profile: dict, facility_index=None) -> str:
+    if not profile.get("location"):
+        return ""
+    return build_facility_hint(profile["location"], index=facility_index, region_code=profile.get("region_code"))
+
+
+def prepare_turn(profile: dict, user_text: str, messages, context_state: dict, context,
+                 norm_index=None, facility_index=None, timings: dict = None) -> dict:
+    # messages 에는 이번 사용자 메시지가 이미 들어 있어야 한다.
+    # 반환: profile / profile_changed / system_prompt / request_messages / key_messages /
+    #   scan (scan_message 결과, fallback 답 고를 때 다시 쓴다)
+    with _stage(timings, "extract"):
+        scan = scan_message(user_text)
+        # 시설 표(와 거기서 만든 지역 사전)는 지역이 나왔거나 프로필에 지역이 있을 때만 로드한다.
+        # 그 전에는 이미 로드된 사전, 없으면 시/도 사전으로 메시지 속 지역을 찾는다
+        if facility_index is not None:
+            gazetteer = facility_index.regions
+        else:
+            gazetteer = get_region_gazetteer(load=bool(profile.get("location") or scan["profile"].get("location")))
+        new_info = with_region(dict(scan["profile"]), user_text, gazetteer)
+        # 지역 코드가 생기기 전에 저장된 프로필은 여기서 한 번 채운다
+        if profile.get("location") and not profile.get("region_code") and "location" not in new_info:
+            code = gazetteer.resolve(profile["location"], strict=True)
+            if code is not None:
+                new_info.update(location=code, region_code=code)
+        profile, changed = merge_profile(profile, new_info)
+    with _stage(timings, "norm"):
+        norm_analysis = norm_analysis_for(profile, scan["situp_count"], norm_index)
+    with _stage(timings, "facility"):
+        facility_hint = facility_hint_for(profile, facility_index)
+    with _stage(timings, "prompt"):
+        # 고정 규칙 → 프로필 → 요약 + 최근 대화 → 이번 턴 분석 순서 (prompts.py)
+        context_messages = context.build(messages, context_state)
+        system_prompt, request_messages = build_coach_messages(
+            profile, context_messages, norm_analysis=norm_analysis, facility_hint=facility_hint
+        )
+    # 첫 메시지가 로컬에서 만든 인사말(사용자 이름 포함)이면 캐시 키에서는 뺀다
+    greeting = messages[0] if messages and messages[0]["role"] == "assistant" else None
+    return {
+        "profile": profile,
+        "profile_changed": changed,
+        "system_prompt": system_prompt,
+        "request_messages": request_messages,
+        "key_messages": [m for m in request_messages if m is not greeting],
+        "scan": scan,
+    }
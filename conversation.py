@@ -0,0 +1,181 @@
+import math
+import os
+import re
+
+# =========================
+# 대화 문맥 관리 (토큰 예산 + 누적 요약)
+# =========================
+# 매 턴마다 전체 대화를 보내지 않고, 최근 대화는 그대로 / 오래된 대화는 요약 한 덩어리로 보낸다.
+#   - 최근 대화 + 요약이 CONTEXT_TOKEN_BUDGET 을 넘을 때만 압축한다
+#   - 압축할 때는 예산의 CONTEXT_LOW_WATER 비율까지 줄여서, 매 턴 압축하지 않도록 여유를 둔다
+#   - 요약은 "이전 요약 + 이번에 밀려난 메시지" 만으로 만든다 (이미 요약된 대화는 다시 안 읽음)
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("FITNESS_CONTEXT_TOKEN_BUDGET", "2000"))
+CONTEXT_LOW_WATER = 0.6
+# 압축해도 그대로 남기는 최소 메시지 수 (마지막 사용자 메시지 + 직전 답 정도)
+MIN_RECENT_MESSAGES = 2
+# 압축할 때 최근 N 턴(사용자 + 코치 = 2 메시지)까지만 그대로 둔다
+MAX_RECENT_TURNS = int(os.environ.get("FITNESS_CONTEXT_RECENT_TURNS", "6"))
+SUMMARY_MAX_TOKENS = 400
+# 메시지 하나당 role 등으로 붙는 토큰 (OpenAI chat 형식 기준 대략값)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_HEADER = "[이전 대화 요약]"
+
+_HANGUL_RE = re.compile(r"[가-힣ㄱ-ㆎ]")
+_SENTENCE_RE = re.compile(r"(?<=[.!?。])\s+|\n+")
+
+# tiktoken 은 import 만 해도 느려서 처음 셀 때 불러온다. 없으면 글자 수 기반 근사치
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    # tiktoken 이 있으면 정확한 값(o200k = gpt-4o 계열), 없으면
+    # 한글 1글자 ≈ 1토큰, 그 밖의 글자 4개 ≈ 1토큰으로 근사 (한글은 약간 과대 추정)
+    global _encoding
+    if not text:
+        return 0
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except ImportError:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    hangul = len(_HANGUL_RE.findall(text))
+    return hangul + math.ceil((len(text) - hangul) / 4)
+
+
+def count_message_tokens(messages) -> int:
+    return sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    # 앞쪽(오래된 요약)부터 잘라서 max_tokens 안으로
+    if count_tokens(text) <= max_tokens:
+        return text
+    lines = text.split("\n")
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    text = lines[0] if len(lines) == 1 else "\n".join(lines)
+    while count_tokens(text) > max_tokens:
+        text = text[len(text) // 10 + 1:]
+    return text
+
+
+# -------------------------
+# 요약기
+# -------------------------
+def extractive_summary(previous: str, messages) -> str:
+    # API 호출 없이 만드는 요약: 사용자 말은 앞부분, 코치 답은 첫 문장만 한 줄씩 남긴다
+    lines = [previous] if previous else []
+    for m in messages:
+        text = " ".join(m["content"].split())
+        if m["role"] == "user":
+            lines.append(f"- 사용자: {text[:80]}")
+        else:
+            first = _SENTENCE_RE.split(m["content"].strip(), maxsplit=1)[0]
+            lines.append(f"- 코치: {' '.join(first.split())[:80]}")
+    return "\n".join(lines)
+
+
+def llm_summarizer(client, model: str, max_tokens: int = SUMMARY_MAX_TOKENS):
+    # 모델로 요약하는 요약기. 압축이 일어나는 턴에만 호출되고, 호출이 실패하면
+    # 그 턴은 extractive_summary 로 대신한다 (요약 때문에 답변이 막히지 않도록)
+    def summarize(previous: str, messages) -> str:
+        try:
+            return _summarize(previous, messages)
+        except Exception:
+            return extractive_summary(previous, messages)
+
+    def _summarize(previous: str, messages) -> str:
+        transcript = "\n".join(
+            f"{'사용자' if m['role'] == 'user' else '코치'}: {m['content']}" for m in messages
+        )
+        response = client.chat.completions.create(
+            model=model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        "운동 코치와 사용자의 대화 요약을 갱신해. 사용자 정보(나이, 체력 수준, 지역, 목표),"
+                        " 이미 추천한 루틴 / 장소, 사용자가 한 약속이나 불편함 위주로 짧은 bullet 로 써."
+                    ),
+                },
+                {"role": "user", "content": f"기존 요약:\n{previous or '(없음)'}\n\n새 대화:\n{transcript}"},
+            ],
+            max_tokens=max_tokens,
+            temperature=0.2,
+        )
+        return response.choices[0].message.content or previous
+
+    return summarize
+
+
+# -------------------------
+# 문맥 관리
+# -------------------------
+def new_context_state() -> dict:
+    # st.session_state 에 두는 상태. messages[:summarized_upto] 는 summary 에 들어가 있다
+    return {"summary": "", "summarized_upto": 0, "compactions": 0}
+
+
+class ConversationContext:
+    """토큰 예산 안에서 모델에 보낼 대화 목록을 만든다.
+
+    build() 는 "요약 메시지(있으면) + 최근 메시지들" 을 돌려주고, 예산을 넘은 경우에만
+    state 의 요약을 갱신한다. 원래 메시지 목록(화면 표시용)은 건드리지 않는다.
+    """
+
+    def __init__(self, budget_tokens: int = CONTEXT_TOKEN_BUDGET, summarize=None,
+                 low_water: float = CONTEXT_LOW_WATER, max_recent_turns: int = MAX_RECENT_TURNS):
+        self.budget_tokens = budget_tokens
+        self.summarize = summarize or extractive_summary
+        self.low_water = low_water
+        self.max_recent_messages = max(MIN_RECENT_MESSAGES, 2 * max_recent_turns)
+
+    @staticmethod
+    def _summary_messages(state: dict):
+        if not state["summary"]:
+            return []
+        return [{"role": "system", "content": f"{SUMMARY_HEADER}\n{state['summary']}"}]
+
+    def _cut_index(self, messages, start: int, target_tokens: int) -> int:
+        # 뒤에서부터 target_tokens / 최대 개수 안에 들어가는 만큼 남기고, 그 앞 위치를 돌려준다
+        kept = 0
+        used = 0
+        cut = len(messages)
+        while cut > start:
+            cost = count_message_tokens([messages[cut - 1]])
+            if kept >= MIN_RECENT_MESSAGES and (
+                used + cost > target_tokens or kept >= self.max_recent_messages
+            ):
+                break
+            used += cost
+            kept += 1
+            cut -= 1
+        return cut
+
+    def build(self, messages, state: dict):
+        start = min(state["summarized_upto"], len(messages))
+        recent = messages[start:]
+        total = count_message_tokens(self._summary_messages(state)) + count_message_tokens(recent)
+        if total > self.budget_tokens:
+            summary_reserve = SUMMARY_MAX_TOKENS + MESSAGE_OVERHEAD_TOKENS
+            target = max(0, int(self.budget_tokens * self.low_water) - summary_reserve)
+            cut = self._cut_index(messages, start, target)
+            if cut > start:
+                self.summarize_upto(messages, state, cut)
+                recent = messages[cut:]
+        return self._summary_messages(state) + list(recent)
+
+    def summarize_upto(self, messages, state: dict, cut: int):
+        # messages[summarized_upto:cut] 를 요약에 더하고 summarized_upto = cut
+        start = min(state["summarized_upto"], len(messages))
+        if cut <= start:
+            return
+        summary = self.summarize(state["summary"], messages[start:cut])
+        state["summary"] = _truncate_tokens(summary, SUMMARY_MAX_TOKENS)
+        state["summarized_upto"] = cut
+        state["compactions"] += 1
@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# CSV 에서 만든 결과물을 컬럼별 바이너리(.npy)로 캐시
+# =========================
+# 프로세스가 새로 뜰 때마다 큰 CSV 를 다시 파싱 / 색인하지 않도록, 한 번 만든 결과를
+# 배열 단위 .npy 파일로 저장해 두고 다음부터는 memory-map 으로 연다.
+#   - load_table(): CSV 표 자체
+#       숫자 컬럼은 값이 바뀌지 않는 범위에서 가장 작은 dtype 으로,
+#       문자열 컬럼은 종류가 적으면 사전(category) 코드, 많으면 UTF-8 바이트 + offset
+#   - cached_arrays(): 색인처럼 CSV 로부터 계산한 임의의 배열 묶음
+# 원본 CSV 의 크기/mtime 이 바뀌면 sha256 을 비교해서 내용이 다를 때만 다시 만든다.
+CACHE_DIR = os.environ.get("FITNESS_DATA_CACHE_DIR", ".datacache")
+FORMAT_VERSION = 1
+# 고유값 비율이 이보다 낮으면 category 로 저장
+CATEGORY_MAX_RATIO = 0.5
+
+
+def _artifact_dir(csv_path: str, kind: str) -> str:
+    abspath = os.path.abspath(csv_path)
+    stem = os.path.splitext(os.path.basename(abspath))[0]
+    key = hashlib.sha1(abspath.encode("utf-8")).hexdigest()[:10]
+    return os.path.join(CACHE_DIR, f"{stem}-{key}", kind)
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _source_stat(path: str) -> dict:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+# -------------------------
+# 문자열 배열
+# -------------------------
+def encode_strings(values):
+    # 문자열 목록 → (UTF-8 바이트 배열, int64 offset 배열)
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return blob, offsets
+
+
+def decode_strings(blob, offsets):
+    raw = blob.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+class StringColumn:
+    """UTF-8 바이트 + offset 으로 들고 있는 문자열 열. 꺼낼 때 한 칸씩만 디코딩한다."""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_list(cls, values):
+        return cls(*encode_strings(values))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def tolist(self):
+        return decode_strings(self.blob, self.offsets)
+
+
+# -------------------------
+# 배열 묶음 저장 / 읽기
+# -------------------------
+def save_arrays(csv_path: str, kind: str, arrays: dict, meta: dict = None) -> str:
+    stat = _source_stat(csv_path)
+    target = _artifact_dir(csv_path, kind)
+    parent = os.path.dirname(target)
+    os.makedirs(parent, exist_ok=True)
+
+    # 임시 디렉터리에 다 쓴 뒤 rename → 읽는 쪽은 반쯤 쓰인 캐시를 보지 않는다
+    tmp = tempfile.mkdtemp(dir=parent, prefix=f".{kind}-")
+    os.chmod(tmp, 0o755)
+    try:
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.asarray(arr), allow_pickle=False)
+        manifest = {
+            "version": FORMAT_VERSION,
+            "source": os.path.abspath(csv_path),
+            "sha256": _file_sha256(csv_path),
+            "arrays": sorted(arrays),
+            "meta": meta or {},
+            **stat,
+        }
+        with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.replace(tmp, target)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return target
+
+
+def _valid_manifest(csv_path: str, dirpath: str):
+    try:
+        with open(os.path.join(dirpath, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != FORMAT_VERSION:
+        return None
+
+    stat = _source_stat(csv_path)
+    if stat["size"] == manifest["size"] and stat["mtime_ns"] == manifest["mtime_ns"]:
+        return manifest
+    # mtime 만 바뀐 경우(복사, git checkout 등)는 내용 해시로 한 번 더 확인
+    if stat["size"] == manifest["size"] and _file_sha256(csv_path) == manifest["sha256"]:
+        manifest.update(stat)
+        try:
+            with open(os.path.join(dirpath, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False)
+        except OSError:
+            pass
+        return manifest
+    return None
+
+
+def load_arrays(csv_path: str, kind: str):
+    # 유효한 캐시가 있으면 (memory-map 된 배열 dict, meta), 없으면 None
+    dirpath = _artifact_dir(csv_path, kind)
+    manifest = _valid_manifest(csv_path, dirpath)
+    if manifest is None:
+        return None
+    arrays = {
+        name: np.load(os.path.join(dirpath, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+        for name in manifest["arrays"]
+    }
+    return arrays, manifest["meta"]
+
+
+def cached_arrays(csv_path: str, kind: str, build):
+    # build() -> (arrays, meta). 캐시가 맞으면 build 를 부르지 않는다.
+    # 원본 CSV 가 없으면 os.stat 의 FileNotFoundError 가 그대로 올라간다.
+    loaded = load_arrays(csv_path, kind)
+    if loaded is not None:
+        return loaded
+
+    arrays, meta = build()
+    try:
+        save_arrays(csv_path, kind, arrays, meta)
+    except OSError:
+        # 캐시 디렉터리에 쓸 수 없는 환경이면 캐시 없이 그대로 사용
+        pass
+    return arrays, meta
+
+
+# -------------------------
+# 표 (DataFrame)
+# -------------------------
+def _narrow_numeric(s: pd.Series) -> np.ndarray:
+    values = s.to_numpy()
+    if values.dtype.kind in "iu":
+        return pd.to_numeric(s, downcast="integer").to_numpy()
+    if values.dtype.kind == "f":
+        narrowed = values.astype(np.float32)
+        if np.array_equal(narrowed.astype(values.dtype), values, equal_nan=True):
+            return narrowed
+    return values
+
+
+def table_to_arrays(df: pd.DataFrame):
+    arrays = {}
+    columns = []
+    for i, c in enumerate(df.columns):
+        s = df[c]
+        if s.dtype.kind in "iufb":
+            arrays[f"{i}.values"] = _narrow_numeric(s)
+            columns.append({"name": c, "kind": "numeric"})
+            continue
+
+        values = s.astype(object)
+        null = values.isna().to_numpy()
+        strings = values.where(~null, "").astype(str)
+        codes, uniques = pd.factorize(strings.where(~null, None))
+
+        if len(uniques) <= max(1, len(s) * CATEGORY_MAX_RATIO):
+            dtype = np.int16 if len(uniques) < 2 ** 15 else np.int32
+            arrays[f"{i}.codes"] = codes.astype(dtype)
+            arrays[f"{i}.dict"], arrays[f"{i}.dict_offsets"] = encode_strings(list(uniques))
+            columns.append({"name": c, "kind": "category"})
+        else:
+            arrays[f"{i}.blob"], arrays[f"{i}.offsets"] = encode_strings(strings.tolist())
+            arrays[f"{i}.null"] = null
+            columns.append({"name": c, "kind": "string"})
+    return arrays, {"columns": columns, "rows": len(df)}
+
+
+def arrays_to_table(arrays: dict, meta: dict) -> pd.DataFrame:
+    data = {}
+    for i, col in enumerate(meta["columns"]):
+        if col["kind"] == "numeric":
+            data[col["name"]] = arrays[f"{i}.values"]
+        elif col["kind"] == "category":
+            categories = decode_strings(arrays[f"{i}.dict"], arrays[f"{i}.dict_offsets"])
+            data[col["name"]] = pd.Categorical.from_codes(arrays[f"{i}.codes"], categories=categories)
+        else:
+            strings = np.array(decode_strings(arrays[f"{i}.blob"], arrays[f"{i}.offsets"]), dtype=object)
+            strings[np.asarray(arrays[f"{i}.null"])] = None
+            data[col["name"]] = strings
+    return pd.DataFrame(data, copy=False)
+
+
+def load_table(csv_path: str, **read_csv_kwargs) -> pd.DataFrame:
+    # pd.read_csv 대신 쓰는 캐시 경유 읽기. 원본이 없으면 예외가 난다.
+    arrays, meta = cached_arrays(
+        csv_path, "table", lambda: table_to_arrays(pd.read_csv(csv_path, **read_csv_kwargs))
+    )
+    return arrays_to_table(arrays, meta)
+
+
+# =========================
+# 전처리 명령
+# =========================
+if __name__ == "__main__":
+    import argparse
+
+    import facilities
+    import norms
+
+    parser = argparse.ArgumentParser(description="데이터셋 캐시를 미리 만들어 둔다 (배포 / 컨테이너 빌드 시)")
+    parser.parse_args()
+
+    for path, warm in (
+        (norms.NORM_CSV_PATH, norms.load_norm_index),
+        (facilities.FACILITY_CSV_PATH, facilities.load_facility_index),
+    ):
+        if not os.path.exists(path):
+            print(f"skip (없음): {path}")
+            continue
+        warm(path)
+        print(f"ok: {path} → {os.path.dirname(_artifact_dir(path, 'x'))}")
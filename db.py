@@ -0,0 +1,1025 @@
+import itertools
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime
+
+import metrics
+
+# =========================
+# 0. 설정
+# =========================
+DB_PATH = os.environ.get("FITNESS_DB_PATH", "fitness.db")
+POOL_SIZE = int(os.environ.get("FITNESS_DB_POOL_SIZE", "8"))
+BUSY_TIMEOUT_SEC = 5.0
+
+# 커넥션을 열 때마다 한 번만 적용하는 PRAGMA
+# - WAL: 쓰는 중에도 다른 세션이 읽을 수 있음
+# - synchronous=NORMAL: WAL 에서는 체크포인트 때만 fsync → 커밋 비용 감소
+# - cache_size 음수 = KiB 단위 (약 16MB)
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA foreign_keys=ON",
+)
+
+# sqlite3 모듈의 커넥션별 prepared statement 캐시 크기.
+# 커넥션을 재사용하므로 같은 SQL 문자열은 다시 파싱되지 않는다.
+STATEMENT_CACHE_SIZE = 128
+
+# insert_log 묶음 커밋(group commit). 켜면 동시에 들어온 쓰기를 한 트랜잭션으로 모은다.
+# GROUP_COMMIT_MS 는 큐가 비었을 때 더 모으려고 기다리는 시간 (0 = 쌓인 것만 바로 커밋)
+GROUP_COMMIT = os.environ.get("FITNESS_DB_GROUP_COMMIT", "0") == "1"
+GROUP_COMMIT_MS = float(os.environ.get("FITNESS_DB_GROUP_COMMIT_MS", "0"))
+GROUP_COMMIT_MAX_ROWS = 500
+BULK_BATCH_SIZE = 50000
+
+logger = logging.getLogger(__name__)
+
+
+# =========================
+# 1. 커넥션 풀
+# =========================
+def open_connection(path: str = None) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        path or DB_PATH,
+        timeout=BUSY_TIMEOUT_SEC,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    """스레드 간에 공유하는 고정 크기 SQLite 커넥션 풀.
+
+    커넥션은 필요할 때 만들어지고 최대 ``size`` 개까지만 유지된다.
+    모두 사용 중이면 반납될 때까지 기다린다.
+    """
+
+    def __init__(self, path: str = None, size: int = POOL_SIZE):
+        self.path = path or DB_PATH
+        self.size = max(1, int(size))
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("connection pool is closed")
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return open_connection(self.path)
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get()
+
+    def _release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_PATH, POOL_SIZE)
+    return _pool
+
+
+def configure(path: str = None, pool_size: int = None):
+    # DB 파일 경로나 풀 크기를 바꿀 때 사용 (벤치마크, 테스트용 임시 DB 등)
+    global _pool, DB_PATH, POOL_SIZE
+    with _pool_lock:
+        if path is not None:
+            DB_PATH = path
+        if pool_size is not None:
+            POOL_SIZE = pool_size
+        if _pool is not None:
+            _pool.close()
+        _pool = None
+
+
+def get_connection():
+    # 예전 방식과 같은 1회용 커넥션. 호출한 쪽에서 close() 해야 한다.
+    return open_connection(DB_PATH)
+
+
+# =========================
+# 2. 스키마
+# =========================
+@metrics.db_timed
+def init_db():
+    with get_pool().connection() as conn, conn:
+        # 운동 기록 테이블
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                log_date TEXT NOT NULL,
+                exercise TEXT NOT NULL,
+                amount INTEGER NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+
+        # 사용자 프로필 테이블
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                username TEXT PRIMARY KEY,
+                password TEXT NOT NULL,
+                age INTEGER,
+                sex TEXT,
+                run_level TEXT,
+                squat_level TEXT,
+                location TEXT,
+                region_code TEXT
+            )
+            """
+        )
+        # region_code(regions 의 지역 코드)는 나중에 생긴 열이라 예전 DB 에는 추가한다
+        user_columns = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+        if "region_code" not in user_columns:
+            conn.execute("ALTER TABLE users ADD COLUMN region_code TEXT")
+
+        # (username, log_date, created_at): 사용자별 최신순 조회 / 정렬
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_logs_user_date
+            ON logs (username, log_date, created_at)
+            """
+        )
+        # 운동 종류로 거른 기록 페이지 조회용
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_logs_user_exercise_date
+            ON logs (username, exercise, log_date, created_at)
+            """
+        )
+        # 기간 집계는 daily_rollup 이 맡으므로 예전 커버링 인덱스는 정리
+        conn.execute("DROP INDEX IF EXISTS idx_logs_user_date_exercise")
+
+        # 일별 / 운동별 합계 테이블 (insert_log 가 같은 트랜잭션에서 갱신)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS daily_rollup (
+                username TEXT NOT NULL,
+                log_date TEXT NOT NULL,
+                exercise TEXT NOT NULL,
+                total_amount INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (username, log_date, exercise)
+            ) WITHOUT ROWID
+            """
+        )
+
+        # 사용자별 기록 버전. 기록을 쓰는 함수가 같은 트랜잭션에서 1 올린다 (querycache 가 본다)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS user_data_version (
+                username TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+
+        # 사용자별 대화 상태 (화면 / API 어느 프로세스에서든 이어서 대화하도록).
+        # version 은 저장할 때마다 1 올라간다 (save_chat_state 의 동시 저장 확인용)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chat_state (
+                username TEXT PRIMARY KEY,
+                messages TEXT NOT NULL,
+                context_state TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                updated_at TEXT NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+
+        # 코치 대화 턴 작업 큐 (jobqueue.py). status: queued → running → done / failed / cancelled.
+        # running 은 lease_until(epoch 초)까지 처리 중인 워커가 맡고 있다는 뜻 (지나면 다시 queued)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chat_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                message TEXT NOT NULL,
+                status TEXT NOT NULL,
+                partial TEXT,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_until REAL,
+                created_at TEXT NOT NULL,
+                finished_at TEXT
+            )
+            """
+        )
+        # (status, id): 가장 오래된 대기 작업 / 사용자별 처리 중 작업 찾기
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_chat_jobs_status_id
+            ON chat_jobs (status, id)
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_chat_jobs_user_id
+            ON chat_jobs (username, id)
+            """
+        )
+
+        # 롤업이 도입되기 전에 쌓인 기록이 있으면 한 번만 채워 넣는다
+        has_rollup = conn.execute("SELECT EXISTS (SELECT 1 FROM daily_rollup)").fetchone()[0]
+        has_logs = conn.execute("SELECT EXISTS (SELECT 1 FROM logs)").fetchone()[0]
+        if has_logs and not has_rollup:
+            _rebuild_rollup(conn)
+
+
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+def ensure_schema():
+    # init_db 를 DB 파일마다 프로세스당 한 번만 (Streamlit rerun / API 요청마다 부르는 쪽)
+    if DB_PATH in _schema_ready:
+        return
+    with _schema_lock:
+        if DB_PATH not in _schema_ready:
+            init_db()
+            _schema_ready.add(DB_PATH)
+
+
+def _rebuild_rollup(conn, username=None):
+    if username is None:
+        conn.execute("DELETE FROM daily_rollup")
+        conn.execute(
+            """
+            INSERT INTO daily_rollup (username, log_date, exercise, total_amount, count)
+            SELECT username, log_date, exercise, SUM(amount), COUNT(*)
+            FROM logs
+            GROUP BY username, log_date, exercise
+            """
+        )
+    else:
+        conn.execute("DELETE FROM daily_rollup WHERE username = ?", (username,))
+        conn.execute(
+            """
+            INSERT INTO daily_rollup (username, log_date, exercise, total_amount, count)
+            SELECT username, log_date, exercise, SUM(amount), COUNT(*)
+            FROM logs
+            WHERE username = ?
+            GROUP BY username, log_date, exercise
+            """,
+            (username,),
+        )
+    _bump_versions(conn, None if username is None else [username])
+
+
+@metrics.db_timed
+def rebuild_rollup(username=None):
+    # logs 원본으로부터 daily_rollup 을 다시 계산 (username 생략 시 전체)
+    with get_pool().connection() as conn, conn:
+        _rebuild_rollup(conn, username)
+
+
+# =========================
+# 3. 기록 / 사용자 함수
+# =========================
+# 커밋이 끝난 쓰기를 프로세스 안의 다른 모듈(순위표 등)에 알린다.
+# fn(kind, payload):
+#   "logs"    payload = [(username, log_date, exercise, amount, log_id), ...]  log_id = logs.id
+#   "profile" payload = (username, profile dict)
+# 이 프로세스에서 db.py 함수로 쓴 것만 알린다. 리스너 오류는 쓰기를 실패시키지 않는다
+_write_listeners = []
+
+
+def add_write_listener(fn):
+    if fn not in _write_listeners:
+        _write_listeners.append(fn)
+
+
+def remove_write_listener(fn):
+    if fn in _write_listeners:
+        _write_listeners.remove(fn)
+
+
+def _notify(kind, payload):
+    for fn in list(_write_listeners):
+        try:
+            fn(kind, payload)
+        except Exception:
+            logger.exception("write listener failed (%s)", kind)
+
+
+ROLLUP_UPSERT_SQL = """
+    INSERT INTO daily_rollup (username, log_date, exercise, total_amount, count)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (username, log_date, exercise) DO UPDATE SET
+        total_amount = total_amount + excluded.total_amount,
+        count = count + excluded.count
+"""
+
+
+LOG_INSERT_SQL = """
+    INSERT INTO logs (username, log_date, exercise, amount, created_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+VERSION_BUMP_SQL = """
+    INSERT INTO user_data_version (username, version) VALUES (?, 1)
+    ON CONFLICT (username) DO UPDATE SET version = version + 1
+"""
+
+
+def _bump_versions(conn, usernames):
+    # 기록이 바뀐 사용자들의 버전을 올린다 (None = 전체). 호출한 쪽 트랜잭션 안에서
+    if usernames is None:
+        conn.execute("UPDATE user_data_version SET version = version + 1")
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO user_data_version (username, version)
+            SELECT DISTINCT username, 1 FROM logs
+            """
+        )
+    else:
+        conn.executemany(VERSION_BUMP_SQL, [(u,) for u in usernames])
+
+
+@metrics.db_timed
+def get_data_version(username) -> int:
+    # 사용자 기록 버전 (한 번도 안 썼으면 0). db.py 의 쓰기 함수를 거친 변경만 반영된다
+    with get_pool().connection() as conn:
+        row = conn.execute(
+            "SELECT version FROM user_data_version WHERE username = ?", (username,)
+        ).fetchone()
+    return row[0] if row else 0
+
+
+def _write_logs(conn, rows) -> list:
+    # rows: (username, log_date, exercise, amount, created_at) 목록.
+    # 원본 기록과 롤업을 호출한 쪽의 트랜잭션 안에서 함께 쓴다.
+    # 반환: 새 logs.id 목록 (rows 순서). 쓰기 트랜잭션은 하나씩이라 한 번에 넣은 id 는 이어진다
+    conn.executemany(LOG_INSERT_SQL, rows)
+    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+
+    rollup = {}
+    for username, log_date, exercise, amount, _ in rows:
+        acc = rollup.setdefault((username, log_date, exercise), [0, 0])
+        acc[0] += amount
+        acc[1] += 1
+    conn.executemany(
+        ROLLUP_UPSERT_SQL,
+        [(u, d, e, total, cnt) for (u, d, e), (total, cnt) in rollup.items()],
+    )
+    _bump_versions(conn, {u for u, _, _ in rollup})
+    return list(range(last_id - len(rows) + 1, last_id + 1))
+
+
+@metrics.db_timed
+def insert_log(username, log_date, exercise, amount):
+    row = (username, log_date, exercise, amount, datetime.now().isoformat())
+    writer = get_group_writer()
+    if writer is not None:
+        # 다른 세션의 쓰기와 묶여서 한 번에 커밋될 때까지 기다린다
+        writer.submit(row).result()
+        return
+
+    with get_pool().connection() as conn, conn:
+        log_id = conn.execute(LOG_INSERT_SQL, row).lastrowid
+        conn.execute(ROLLUP_UPSERT_SQL, (username, log_date, exercise, amount, 1))
+        conn.execute(VERSION_BUMP_SQL, (username,))
+    _notify("logs", [(*row[:4], log_id)])
+
+
+@metrics.db_timed
+def bulk_insert_logs(username, rows, batch_size: int = BULK_BATCH_SIZE) -> int:
+    # (log_date, exercise, amount) 이터러블을 batch_size 단위 트랜잭션으로 저장.
+    # 이터러블은 한 번만 훑으므로 제너레이터를 넘기면 메모리에 전부 올리지 않는다.
+    # 반환: 저장한 행 수
+    created_at = datetime.now().isoformat()
+    it = iter(rows)
+    inserted = 0
+    with get_pool().connection() as conn:
+        while True:
+            batch = [
+                (username, log_date, exercise, amount, created_at)
+                for log_date, exercise, amount in itertools.islice(it, batch_size)
+            ]
+            if not batch:
+                break
+            with conn:
+                ids = _write_logs(conn, batch)
+            inserted += len(batch)
+            _notify("logs", [(*row[:4], log_id) for row, log_id in zip(batch, ids)])
+    return inserted
+
+
+# =========================
+# 3-1. insert_log 묶음 커밋 (write-behind)
+# =========================
+class GroupCommitWriter:
+    """여러 세션의 insert_log 를 짧은 시간 창 동안 모아 한 트랜잭션으로 커밋.
+
+    호출한 쪽은 submit() 이 돌려준 Future 로 커밋 완료를 기다린다.
+    """
+
+    def __init__(self, window_ms: float = GROUP_COMMIT_MS, max_rows: int = GROUP_COMMIT_MAX_ROWS):
+        self.window = window_ms / 1000.0
+        self.max_rows = max_rows
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="db-group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, row) -> Future:
+        fut = Future()
+        self._queue.put((row, fut))
+        return fut
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_rows:
+                # 이미 쌓인 요청은 바로 가져가고, 비었을 때만 창이 끝날 때까지 기다린다
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+    @metrics.timed("fitness_db_seconds", slow_ms=metrics.SLOW_QUERY_MS, op="group_commit")
+    def _commit(self, batch):
+        try:
+            with get_pool().connection() as conn, conn:
+                ids = _write_logs(conn, [row for row, _ in batch])
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+        else:
+            _notify("logs", [(*row[:4], log_id) for (row, _), log_id in zip(batch, ids)])
+            for _, fut in batch:
+                fut.set_result(None)
+
+
+_group_writer = None
+
+
+def get_group_writer():
+    global _group_writer
+    if not GROUP_COMMIT:
+        return None
+    if _group_writer is None:
+        with _pool_lock:
+            if _group_writer is None:
+                _group_writer = GroupCommitWriter(GROUP_COMMIT_MS)
+    return _group_writer
+
+
+def set_group_commit(enabled: bool, window_ms: float = None):
+    # 묶음 커밋을 켜거나 끈다 (기존 writer 는 쌓인 묶음을 커밋하고 종료)
+    global _group_writer, GROUP_COMMIT, GROUP_COMMIT_MS
+    with _pool_lock:
+        writer, _group_writer = _group_writer, None
+        GROUP_COMMIT = enabled
+        if window_ms is not None:
+            GROUP_COMMIT_MS = window_ms
+    if writer is not None:
+        writer.close()
+
+
+@metrics.db_timed
+def get_logs(username):
+    with get_pool().connection() as conn:
+        return conn.execute(
+            """
+            SELECT log_date, exercise, amount, created_at
+            FROM logs
+            WHERE username = ?
+            ORDER BY log_date DESC, created_at DESC
+            """,
+            (username,),
+        ).fetchall()
+
+
+def _log_filters(username, exercise=None, since=None, until=None):
+    where = ["username = ?"]
+    params = [username]
+    if exercise:
+        where.append("exercise = ?")
+        params.append(exercise)
+    if since:
+        where.append("log_date >= ?")
+        params.append(since)
+    if until:
+        where.append("log_date <= ?")
+        params.append(until)
+    return " AND ".join(where), params
+
+
+@metrics.db_timed
+def get_logs_page(
+    username, page_size=50, after=None, exercise=None, since=None, until=None
+):
+    # 최신순 기록 한 페이지를 (log_date, created_at, id) 키셋으로 가져온다.
+    # after 에는 직전 페이지가 돌려준 next_cursor 를 넘긴다 (첫 페이지는 None).
+    # 반환: (rows, next_cursor) — rows 는 (id, log_date, exercise, amount, created_at),
+    #       다음 페이지가 없으면 next_cursor 는 None
+    where, params = _log_filters(username, exercise, since, until)
+    if after is not None:
+        where += " AND (log_date, created_at, id) < (?, ?, ?)"
+        params.extend(after)
+
+    with get_pool().connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT id, log_date, exercise, amount, created_at
+            FROM logs
+            WHERE {where}
+            ORDER BY log_date DESC, created_at DESC, id DESC
+            LIMIT ?
+            """,
+            params + [page_size + 1],
+        ).fetchall()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = (last[1], last[4], last[0])
+    return rows, next_cursor
+
+
+@metrics.db_timed
+def count_logs(username, exercise=None, since=None, until=None) -> int:
+    # 기록 건수는 daily_rollup 의 count 를 더해서 구한다 (운동한 날 수에 비례)
+    where, params = _log_filters(username, exercise, since, until)
+    with get_pool().connection() as conn:
+        return conn.execute(
+            f"SELECT COALESCE(SUM(count), 0) FROM daily_rollup WHERE {where}",
+            params,
+        ).fetchone()[0]
+
+
+@metrics.db_timed
+def get_window_stats(username, since: str, until: str = None) -> dict:
+    # since ~ until (ISO 날짜 문자열, until 생략 시 상한 없음) 기간의
+    # 운동한 날 수 / 총 운동량 / 가장 많이 한 운동을 daily_rollup 에서 바로 계산
+    where = "username = ? AND log_date >= ?"
+    params = [username, since]
+    if until is not None:
+        where += " AND log_date <= ?"
+        params.append(until)
+
+    with get_pool().connection() as conn:
+        days, total = conn.execute(
+            f"""
+            SELECT COUNT(DISTINCT log_date), COALESCE(SUM(total_amount), 0)
+            FROM daily_rollup
+            WHERE {where}
+            """,
+            params,
+        ).fetchone()
+        top = conn.execute(
+            f"""
+            SELECT exercise, SUM(total_amount) AS total
+            FROM daily_rollup
+            WHERE {where}
+            GROUP BY exercise
+            ORDER BY total DESC, exercise
+            LIMIT 1
+            """,
+            params,
+        ).fetchone()
+
+    return {
+        "total_days": int(days),
+        "total_amount": int(total),
+        "top_exercise": top[0] if top else None,
+    }
+
+
+@metrics.db_timed
+def get_daily_totals(username):
+    # 날짜별 총 운동량 (오래된 날짜부터). 원본 행 수가 아니라 운동한 날 수에 비례
+    with get_pool().connection() as conn:
+        return conn.execute(
+            """
+            SELECT log_date, SUM(total_amount)
+            FROM daily_rollup
+            WHERE username = ?
+            GROUP BY log_date
+            ORDER BY log_date
+            """,
+            (username,),
+        ).fetchall()
+
+
+@metrics.db_timed
+def get_daily_exercise_totals(username=None):
+    # (username, log_date, exercise, total_amount) 날짜 / 운동별 합계 (analytics 입력).
+    # username 생략 시 전체 사용자 (야간 집계)
+    where, params = ("WHERE username = ?", (username,)) if username is not None else ("", ())
+    with get_pool().connection() as conn:
+        return conn.execute(
+            f"""
+            SELECT username, log_date, exercise, total_amount
+            FROM daily_rollup
+            {where}
+            ORDER BY username, log_date
+            """,
+            params,
+        ).fetchall()
+
+
+@metrics.db_timed
+def create_user(username, password) -> bool:
+    # 이미 있는 닉네임이면 False. 확인과 저장을 INSERT 한 번으로 (여러 워커에서 동시에 가입해도 하나만)
+    try:
+        with get_pool().connection() as conn, conn:
+            conn.execute(
+                "INSERT INTO users (username, password) VALUES (?, ?)",
+                (username, password),
+            )
+    except sqlite3.IntegrityError:
+        return False
+    return True
+
+
+@metrics.db_timed
+def get_user(username):
+    with get_pool().connection() as conn:
+        return conn.execute(
+            """
+            SELECT username, password, age, sex, run_level, squat_level, location, region_code
+            FROM users
+            WHERE username = ?
+            """,
+            (username,),
+        ).fetchone()
+
+
+@metrics.db_timed
+def update_user_profile(username, profile: dict):
+    with get_pool().connection() as conn, conn:
+        conn.execute(
+            """
+            UPDATE users
+            SET age = ?, sex = ?, run_level = ?, squat_level = ?, location = ?, region_code = ?
+            WHERE username = ?
+            """,
+            (
+                profile.get("age"),
+                profile.get("sex"),
+                profile.get("run_level"),
+                profile.get("squat_level"),
+                profile.get("location"),
+                profile.get("region_code"),
+                username,
+            ),
+        )
+    _notify("profile", (username, profile))
+
+
+# =========================
+# 3-2. 대화 상태
+# =========================
+@metrics.db_timed
+def get_chat_state(username):
+    # (messages, context_state, version). 저장된 대화가 없으면 None (version 0 으로 보면 된다)
+    with get_pool().connection() as conn:
+        row = conn.execute(
+            "SELECT messages, context_state, version FROM chat_state WHERE username = ?", (username,)
+        ).fetchone()
+    if row is None:
+        return None
+    return json.loads(row[0]), json.loads(row[1]), row[2]
+
+
+@metrics.db_timed
+def save_chat_state(username, messages, context_state: dict, expected_version: int = None):
+    # expected_version: 읽었던 version (없던 대화면 0). 그 사이 다른 요청이 먼저 저장했으면
+    # 덮어쓰지 않고 None 을 돌려준다. None 이면 확인 없이 덮어쓴다 (새 대화 시작 등).
+    # 저장했으면 새 version
+    values = (
+        username,
+        json.dumps(messages, ensure_ascii=False),
+        json.dumps(context_state, ensure_ascii=False),
+        datetime.now().isoformat(),
+    )
+    with get_pool().connection() as conn, conn:
+        if expected_version is None:
+            return conn.execute(
+                """
+                INSERT INTO chat_state (username, messages, context_state, updated_at, version)
+                VALUES (?, ?, ?, ?, 1)
+                ON CONFLICT (username) DO UPDATE SET
+                    messages = excluded.messages,
+                    context_state = excluded.context_state,
+                    updated_at = excluded.updated_at,
+                    version = chat_state.version + 1
+                RETURNING version
+                """,
+                values,
+            ).fetchone()[0]
+        if expected_version == 0:
+            cur = conn.execute(
+                """
+                INSERT OR IGNORE INTO chat_state (username, messages, context_state, updated_at, version)
+                VALUES (?, ?, ?, ?, 1)
+                """,
+                values,
+            )
+        else:
+            cur = conn.execute(
+                """
+                UPDATE chat_state
+                SET messages = ?, context_state = ?, updated_at = ?, version = version + 1
+                WHERE username = ? AND version = ?
+                """,
+                values[1:] + (username, expected_version),
+            )
+        return expected_version + 1 if cur.rowcount else None
+
+
+# =========================
+# 3-3. 대화 턴 작업 큐 (jobqueue.py)
+# =========================
+CHAT_JOB_COLUMNS = (
+    "id", "username", "message", "status", "partial", "result", "error",
+    "attempts", "worker", "lease_until", "created_at", "finished_at",
+)
+CHAT_JOB_ACTIVE = ("queued", "running")
+
+
+def _chat_job(row) -> dict:
+    job = dict(zip(CHAT_JOB_COLUMNS, row))
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+@metrics.db_timed
+def enqueue_chat_job(username, message) -> int:
+    with get_pool().connection() as conn, conn:
+        return conn.execute(
+            "INSERT INTO chat_jobs (username, message, status, created_at) VALUES (?, ?, 'queued', ?)",
+            (username, message, datetime.now().isoformat()),
+        ).lastrowid
+
+
+@metrics.db_timed
+def claim_chat_job(worker, lease_sec: float, max_attempts: int):
+    # 가장 오래된 대기 작업 하나를 running 으로 바꿔 가져간다. 없으면 None.
+    # - 같은 사용자의 작업이 처리 중이면 그 사용자 작업은 건너뛴다 (사용자별 순서 보장)
+    # - lease 가 지난 running 작업(워커가 죽었거나 서버가 재시작됨)은 먼저 queued 로 되돌린다.
+    #   이미 max_attempts 번 가져갔던 작업은 failed 로
+    # UPDATE 가 쓰기 잠금을 먼저 잡으므로 여러 프로세스의 워커가 같은 작업을 가져가지 않는다.
+    # 할 일이 없으면 (놀고 있는 워커의 폴링) 읽기만 하고 쓰기 잠금은 잡지 않는다
+    now = time.time()
+    with get_pool().connection() as conn, conn:
+        waiting = conn.execute(
+            """
+            SELECT EXISTS (SELECT 1 FROM chat_jobs WHERE status = 'queued')
+                OR EXISTS (SELECT 1 FROM chat_jobs WHERE status = 'running' AND lease_until < ?)
+            """,
+            (now,),
+        ).fetchone()[0]
+        if not waiting:
+            return None
+        conn.execute(
+            """
+            UPDATE chat_jobs
+            SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,
+                error = CASE WHEN attempts >= ? THEN '처리 중 워커가 여러 번 멈췄어' ELSE error END,
+                finished_at = CASE WHEN attempts >= ? THEN ? ELSE finished_at END,
+                worker = NULL, lease_until = NULL
+            WHERE status = 'running' AND lease_until < ?
+            """,
+            (max_attempts, max_attempts, max_attempts, datetime.now().isoformat(), now),
+        )
+        row = conn.execute(
+            f"""
+            UPDATE chat_jobs
+            SET status = 'running', attempts = attempts + 1, worker = ?, lease_until = ?, partial = NULL
+            WHERE id = (
+                SELECT id FROM chat_jobs
+                WHERE status = 'queued'
+                  AND username NOT IN (SELECT username FROM chat_jobs WHERE status = 'running')
+                ORDER BY id
+                LIMIT 1
+            )
+            RETURNING {", ".join(CHAT_JOB_COLUMNS)}
+            """,
+            (worker, now + lease_sec),
+        ).fetchone()
+    return _chat_job(row) if row else None
+
+
+@metrics.db_timed
+def update_chat_job_progress(job_id, partial, lease_sec: float) -> bool:
+    # 지금까지 받은 답 저장 + lease 연장. 그 사이 취소됐으면 False
+    with get_pool().connection() as conn, conn:
+        cur = conn.execute(
+            "UPDATE chat_jobs SET partial = ?, lease_until = ? WHERE id = ? AND status = 'running'",
+            (partial, time.time() + lease_sec, job_id),
+        )
+    return cur.rowcount > 0
+
+
+@metrics.db_timed
+def extend_chat_job_leases(jobs, lease_sec: float):
+    # 처리 중인 작업들의 lease 연장 (jobqueue 의 lease 스레드). jobs: (id, attempts) 목록.
+    # attempts 가 다르면 그 사이 다른 워커가 다시 가져간 작업이라 건드리지 않는다
+    lease_until = time.time() + lease_sec
+    with get_pool().connection() as conn, conn:
+        conn.executemany(
+            "UPDATE chat_jobs SET lease_until = ? WHERE id = ? AND attempts = ? AND status = 'running'",
+            [(lease_until, job_id, attempts) for job_id, attempts in jobs],
+        )
+
+
+@metrics.db_timed
+def finish_chat_job(job_id, status, result: dict = None, error: str = None) -> bool:
+    # running → done / failed. 그 사이 취소됐으면 바꾸지 않고 False
+    with get_pool().connection() as conn, conn:
+        cur = conn.execute(
+            """
+            UPDATE chat_jobs
+            SET status = ?, result = ?, error = ?, partial = NULL, lease_until = NULL, finished_at = ?
+            WHERE id = ? AND status = 'running'
+            """,
+            (
+                status,
+                json.dumps(result, ensure_ascii=False) if result is not None else None,
+                error,
+                datetime.now().isoformat(),
+                job_id,
+            ),
+        )
+    return cur.rowcount > 0
+
+
+@metrics.db_timed
+def requeue_chat_job(job_id) -> bool:
+    # 처리 중이던 작업을 다시 대기로 (워커를 멈출 때)
+    with get_pool().connection() as conn, conn:
+        cur = conn.execute(
+            """
+            UPDATE chat_jobs SET status = 'queued', worker = NULL, lease_until = NULL, partial = NULL
+            WHERE id = ? AND status = 'running'
+            """,
+            (job_id,),
+        )
+    return cur.rowcount > 0
+
+
+@metrics.db_timed
+def cancel_chat_job(job_id, username) -> bool:
+    # 대기 / 처리 중인 작업 취소. 처리 중이면 워커가 답을 저장하기 전에 알아채고 버린다
+    with get_pool().connection() as conn, conn:
+        cur = conn.execute(
+            """
+            UPDATE chat_jobs SET status = 'cancelled', lease_until = NULL, finished_at = ?
+            WHERE id = ? AND username = ? AND status IN ('queued', 'running')
+            """,
+            (datetime.now().isoformat(), job_id, username),
+        )
+    return cur.rowcount > 0
+
+
+@metrics.db_timed
+def get_chat_job(job_id, username=None):
+    # 작업 dict (+ ahead: 앞에 남은 대기 작업 수). 없거나 다른 사용자 작업이면 None
+    with get_pool().connection() as conn:
+        row = conn.execute(
+            f"SELECT {', '.join(CHAT_JOB_COLUMNS)} FROM chat_jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None or (username is not None and row[1] != username):
+            return None
+        job = _chat_job(row)
+        job["ahead"] = (
+            conn.execute(
+                "SELECT COUNT(*) FROM chat_jobs WHERE status = 'queued' AND id < ?", (job_id,)
+            ).fetchone()[0]
+            if job["status"] == "queued"
+            else 0
+        )
+    return job
+
+
+@metrics.db_timed
+def list_chat_jobs(username, statuses=CHAT_JOB_ACTIVE) -> list:
+    # 사용자 작업 (오래된 순). 기본은 아직 끝나지 않은 것만
+    marks = ", ".join("?" * len(statuses))
+    with get_pool().connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT {", ".join(CHAT_JOB_COLUMNS)} FROM chat_jobs
+            WHERE username = ? AND status IN ({marks})
+            ORDER BY id
+            """,
+            (username, *statuses),
+        ).fetchall()
+    return [_chat_job(row) for row in rows]
+
+
+@metrics.db_timed
+def purge_chat_jobs(finished_before: str) -> int:
+    # finished_before(ISO 시각) 전에 끝난 작업 삭제. 반환: 지운 수
+    with get_pool().connection() as conn, conn:
+        return conn.execute(
+            "DELETE FROM chat_jobs WHERE status NOT IN ('queued', 'running') AND finished_at < ?",
+            (finished_before,),
+        ).rowcount
+
+
+# =========================
+# 4. 관리 명령
+# =========================
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="fitness.db 관리 명령")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_rebuild = sub.add_parser("rebuild-rollup", help="logs 로부터 daily_rollup 재계산")
+    p_rebuild.add_argument("--user", default=None, help="특정 사용자만 재계산")
+    args = parser.parse_args()
+
+    if args.command == "rebuild-rollup":
+        init_db()
+        rebuild_rollup(args.user)
+        print("daily_rollup rebuilt" + (f" for {args.user}" if args.user else ""))
@@ -0,0 +1,125 @@
+import re
+
+import pandas as pd
+
+# =========================
+# 사용자 메시지 한 번 훑기 (프로필 / 윗몸일으키기 개수 / fallback 의도)
+# =========================
+# 예전에는 같은 메시지를 프로필 추출(정규식 5개 + 키워드 any 여러 번), fallback 답 고르기,
+# 윗몸일으키기 개수 정규식이 각각 처음부터 다시 훑었다.
+# 여기서는 키워드 전체를 하나로 묶은 정규식으로 한 번만 훑어서 어떤 키워드가 있는지 모으고,
+# 숫자 / 지역처럼 주변을 봐야 하는 값은 해당 키워드가 있을 때만 원래 정규식으로 확인한다.
+# (대부분의 메시지는 키워드가 몇 개뿐이라 나머지 정규식은 돌지 않는다)
+# 결과는 예전 함수들과 똑같다 (bench/extraction.py 의 golden corpus 로 확인).
+
+# 키워드 → 종류. 긴 것부터 묶어야 "운동 안" 이 "안 했" 보다 먼저 잡힌다.
+# 띄어 쓴 한 글자 성별(" 남 ", " 여 ")은 " 여 남 " 처럼 공백을 같이 쓰면 뒤의 것이 안 잡히므로
+# 여자로 잡힌 경우에만 " 남 " 을 한 번 더 본다 (남자가 우선)
+KEYWORDS = {
+    "나이": "age",
+    "살": "age_sal",
+    "남자": "male",
+    "남성": "male",
+    " 남 ": "male",
+    "여자": "female",
+    "여성": "female",
+    " 여 ": "female",
+    "달리기": "run",
+    "조깅": "run",
+    "뛰": "run",
+    "스쿼트": "squat",
+    "윗몸": "situp",
+    "구": "gu",
+    "못했": "not_done",
+    "안 했": "not_done",
+    "안했": "not_done",
+    "운동 안": "not_done",
+}
+_SCAN_RE = re.compile("|".join(re.escape(k) for k in sorted(KEYWORDS, key=len, reverse=True)))
+
+# 키워드가 있을 때만 돌리는 정규식 (예전 extract_profile_from_text / 채팅 탭과 같은 식)
+_AGE_RE = re.compile(r"나이(?:는)?\s*(\d+)")
+_AGE_SAL_RE = re.compile(r"(\d+)\s*살")
+_SQUAT_RE = re.compile(r"스쿼트[^0-9]*(\d+)\s*(개|번)?")
+_SITUP_RE = re.compile(r"(윗몸일으키기|윗몸)\D*(\d+)\s*개")
+# 지역 정규식은 한글 덩어리 처음에서만 시작하게 했다 (가장 왼쪽 일치는 어차피 덩어리 처음에서
+# 시작하므로 결과는 같고, 덩어리 중간마다 다시 시도하는 backtracking 이 없어진다)
+_LOCATION_DONG_RE = re.compile(r"(?<![가-힣])([가-힣]+시\s*)?[가-힣]+구\s*[가-힣0-9]+동")
+_LOCATION_GU_RE = re.compile(r"(?<![가-힣])[가-힣]+구")
+
+# fallback 답을 고르는 순서 (앞에 있는 의도가 이긴다)
+INTENTS = ("not_done", "situp", "run")
+
+
+def keyword_kinds(text: str) -> set:
+    # 메시지에 나온 키워드 종류
+    return set(map(KEYWORDS.__getitem__, _SCAN_RE.findall(text)))
+
+
+def scan_message(text: str) -> dict:
+    """메시지 하나에서 profile(extract_profile_from_text 와 같은 dict), situp_count, intent 를 뽑는다.
+
+    intent 는 fallback 답 종류 ("not_done" / "situp" / "run") 또는 None.
+    """
+    text = text.strip()
+    kinds = keyword_kinds(text)
+    profile = {}
+    situp_count = None
+    intent = None
+    if not kinds:
+        return {"profile": profile, "situp_count": situp_count, "intent": intent}
+
+    # 나이: "나이 35" 가 "35살" 보다 우선
+    age_match = _AGE_RE.search(text) if "age" in kinds else None
+    if not age_match and "age_sal" in kinds:
+        age_match = _AGE_SAL_RE.search(text)
+    if age_match:
+        profile["age"] = int(age_match.group(1))
+
+    if "male" in kinds:
+        profile["sex"] = "남"
+    elif "female" in kinds:
+        profile["sex"] = "남" if " 남 " in text else "여"
+
+    # 달리기 수준은 문장 통째로 저장
+    if "run" in kinds:
+        profile["run_level"] = text
+
+    if "squat" in kinds:
+        squat_match = _SQUAT_RE.search(text)
+        if squat_match:
+            profile["squat_level"] = squat_match.group(1)
+
+    if "gu" in kinds:
+        loc_match = _LOCATION_DONG_RE.search(text) or _LOCATION_GU_RE.search(text)
+        if loc_match:
+            profile["location"] = loc_match.group(0)
+
+    if "situp" in kinds:
+        situp_match = _SITUP_RE.search(text)
+        if situp_match:
+            situp_count = float(situp_match.group(2))
+
+    for name in INTENTS:
+        if name in kinds:
+            intent = name
+            break
+    return {"profile": profile, "situp_count": situp_count, "intent": intent}
+
+
+def scan_messages(texts):
+    # 보관된 대화 등 여러 메시지를 한꺼번에 처리 (입력 순서대로 scan_message 결과 list)
+    return [scan_message(t) for t in texts]
+
+
+def scan_frame(texts):
+    # scan_messages 를 DataFrame 으로: age / sex / run_level / squat_level / location /
+    # situp_count / intent 열 (없는 값은 NaN / None)
+    rows = []
+    for result in scan_messages(texts):
+        row = dict(result["profile"])
+        row["situp_count"] = result["situp_count"]
+        row["intent"] = result["intent"]
+        rows.append(row)
+    columns = ["age", "sex", "run_level", "squat_level", "location", "situp_count", "intent"]
+    return pd.DataFrame(rows, columns=columns)
@@ -0,0 +1,365 @@
+import bisect
+import logging
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+import datacache
+import geo
+import metrics
+import regions
+
+# =========================
+# 전국 체육시설 (전국체육시설_전체데이터.csv)
+# =========================
+FACILITY_CSV_PATH = "전국체육시설_전체데이터.csv"
+
+logger = logging.getLogger(__name__)
+
+NAME_COL_CANDIDATES = ["faci_nm", "시설명", "FACI_NM"]
+TYPE_COL_CANDIDATES = ["ftype_nm", "fcob_nm", "시설유형"]
+
+# 주소 토큰: 한글/영문/숫자가 이어진 덩어리. 번지 같은 순수 숫자는 색인하지 않는다
+_TOKEN_RE = re.compile(r"[가-힣A-Za-z0-9]+")
+# 붙여 쓴 지역명("마포구대흥동")을 나눌 수 있는 위치 = 이 글자 바로 뒤
+_ADMIN_SPLIT_SUFFIXES = ("시", "도", "군", "구")
+PREFIX_CACHE_SIZE = 1024
+
+
+def tokenize_address(text: str):
+    return [t for t in _TOKEN_RE.findall(text) if not t.isdigit()]
+
+
+def detect_columns(columns):
+    addr_cols = [c for c in columns if "addr" in c.lower() or "주소" in c]
+    name_col = next((c for c in NAME_COL_CANDIDATES if c in columns), None)
+    type_col = next((c for c in TYPE_COL_CANDIDATES if c in columns), None)
+    return addr_cols, name_col, type_col
+
+
+class FacilityIndex:
+    """주소 토큰(시/구/동, 도로명 등) → 시설 행 번호 역색인 + 지역 코드 → 시설 행 번호.
+
+    지역명으로 찾을 때는 regions.RegionGazetteer 로 지역 코드를 정한 뒤 그 코드의 행 목록을
+    그대로 꺼낸다. 지역으로 못 읽는 입력(도로명, 시설 이름 일부)만 토큰 역색인으로 찾는다.
+
+    컬럼 탐지와 표시용 문자열 준비는 만들 때 한 번만 한다. 조회는 질의 토큰의
+    posting 중 가장 짧은 것을 기준으로 나머지 posting 에 있는지 이진 탐색으로 확인하므로
+    전체 표를 훑거나 복사하지 않는다.
+
+    내용은 전부 numpy 배열(UTF-8 문자열 + offset, 이어 붙인 posting)이라
+    datacache 로 디스크에 저장했다가 memory-map 으로 바로 다시 열 수 있다.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._load(*self.build_arrays(df))
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, meta: dict):
+        self = cls.__new__(cls)
+        self._load(arrays, meta)
+        return self
+
+    @classmethod
+    def from_csv(cls, path: str = FACILITY_CSV_PATH):
+        # 색인을 CSV 와 함께 캐시해 두고, 원본이 바뀌지 않았으면 파싱 / 색인을 건너뛴다
+        arrays, meta = datacache.cached_arrays(
+            path, "facility-index-v3", lambda: cls.build_arrays(pd.read_csv(path))
+        )
+        return cls.from_arrays(arrays, meta)
+
+    @staticmethod
+    def build_arrays(df: pd.DataFrame):
+        addr_cols, name_col, type_col = detect_columns(list(df.columns))
+        lat_col, lon_col = geo.detect_coord_columns(list(df.columns))
+        meta = {
+            "addr_cols": addr_cols,
+            "name_col": name_col,
+            "type_col": type_col,
+            "coord_cols": [lat_col, lon_col] if lat_col else None,
+            "rows": len(df),
+        }
+        if name_col is None or not addr_cols:
+            return {}, meta
+
+        names = df[name_col].astype(str).tolist()
+        if type_col:
+            types = [str(v) if pd.notna(v) else "" for v in df[type_col].tolist()]
+        else:
+            types = [""] * len(df)
+
+        # 표시용 주소 = 값이 있는 첫 주소 컬럼. 색인은 모든 주소 컬럼의 토큰을 합친다
+        addr_values = [df[c].tolist() for c in addr_cols]
+        addrs = []
+        row_region_lists = []
+        postings = {}
+        for row_id, values in enumerate(zip(*addr_values)):
+            display = ""
+            tokens = set()
+            row_regions = []
+            for v in values:
+                if pd.isna(v):
+                    continue
+                v = str(v)
+                if not display:
+                    display = v
+                tokens.update(tokenize_address(v))
+                row_regions.extend(r for r in geo.parse_region(v) if r not in row_regions)
+            addrs.append(display)
+            row_region_lists.append(row_regions)
+            for t in tokens:
+                postings.setdefault(t, []).append(row_id)
+
+        vocab = sorted(postings)
+        post_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum([len(postings[t]) for t in vocab], out=post_offsets[1:])
+        post_ids = np.fromiter(
+            (i for t in vocab for i in postings[t]), dtype=np.int32, count=int(post_offsets[-1])
+        )
+
+        arrays = {"post_ids": post_ids, "post_offsets": post_offsets}
+
+        # 지역 코드(geo.parse_region: 시/도, 시/군/구, 읍/면/동) → 행 번호
+        region_rows = {}
+        for row_id, row_regions in enumerate(row_region_lists):
+            for r in row_regions:
+                region_rows.setdefault(r, []).append(row_id)
+        region_names = sorted(region_rows)
+        region_offsets = np.zeros(len(region_names) + 1, dtype=np.int64)
+        np.cumsum([len(region_rows[r]) for r in region_names], out=region_offsets[1:])
+        arrays["region_ids"] = np.fromiter(
+            (i for r in region_names for i in region_rows[r]), dtype=np.int32, count=int(region_offsets[-1])
+        )
+        arrays["region_offsets"] = region_offsets
+
+        # 좌표: 위경도 컬럼이 있으면 그 값을, 비어 있는 시설은 주소 지역(동 → 구 → 시/도)의
+        # 중심 좌표로 채운다. 중심 좌표는 좌표가 있는 시설들의 평균
+        if lat_col:
+            lat = pd.to_numeric(df[lat_col], errors="coerce").to_numpy(dtype=np.float64, copy=True)
+            lon = pd.to_numeric(df[lon_col], errors="coerce").to_numpy(dtype=np.float64, copy=True)
+            bad = ~((lat > -90) & (lat < 90) & (lon > -180) & (lon < 180)) | ((lat == 0) & (lon == 0))
+            lat[bad] = np.nan
+            lon[bad] = np.nan
+            gazetteer = geo.Gazetteer.build(row_region_lists, lat, lon)
+            region_id = {name: i for i, name in enumerate(gazetteer.names)}
+            for row_id in np.flatnonzero(np.isnan(lat)):
+                for r in reversed(row_region_lists[row_id]):
+                    if r in region_id:
+                        lat[row_id], lon[row_id] = gazetteer.centroid(region_id[r])
+                        break
+            arrays.update(gazetteer.to_arrays())
+            arrays.update(geo.GridIndex.build(lat, lon).to_arrays())
+        for key, values in (("names", names), ("types", types), ("addrs", addrs), ("vocab", vocab),
+                            ("region_names", region_names)):
+            arrays[key], arrays[f"{key}_offsets"] = datacache.encode_strings(values)
+        return arrays, meta
+
+    def _load(self, arrays: dict, meta: dict):
+        self.addr_cols = meta["addr_cols"]
+        self.name_col = meta["name_col"]
+        self.type_col = meta["type_col"]
+        self.size = meta["rows"]
+        self._prefix_cache = {}
+
+        self.gazetteer = self.grid = None
+        self.regions = regions.SIDO_GAZETTEER
+        self._region_pos = {}
+        if not arrays:
+            self.names = self.types = self.addrs = []
+            self._vocab = []
+            self._token_pos = {}
+            return
+
+        self.names = datacache.StringColumn(arrays["names"], arrays["names_offsets"])
+        self.types = datacache.StringColumn(arrays["types"], arrays["types_offsets"])
+        self.addrs = datacache.StringColumn(arrays["addrs"], arrays["addrs_offsets"])
+        self._vocab = datacache.decode_strings(arrays["vocab"], arrays["vocab_offsets"])
+        self._token_pos = {t: i for i, t in enumerate(self._vocab)}
+        self._post_ids = arrays["post_ids"]
+        self._post_offsets = arrays["post_offsets"]
+
+        region_names = datacache.decode_strings(arrays["region_names"], arrays["region_names_offsets"])
+        self._region_pos = {r: i for i, r in enumerate(region_names)}
+        self._region_ids = arrays["region_ids"]
+        self._region_offsets = arrays["region_offsets"]
+        self.regions = regions.RegionGazetteer(region_names, np.diff(self._region_offsets))
+
+        # 좌표 컬럼이 있는 표로 만든 색인에만 있다
+        if "gaz_names" in arrays:
+            self.gazetteer = geo.Gazetteer.from_arrays(arrays)
+            self.grid = geo.GridIndex.from_arrays(arrays)
+
+    def _posting(self, token: str):
+        i = self._token_pos.get(token)
+        if i is None:
+            return None
+        return self._post_ids[self._post_offsets[i]:self._post_offsets[i + 1]]
+
+    def _split_joined(self, token: str):
+        # "마포구대흥동" → ["마포구", "대흥동"] (양쪽이 모두 색인에 있을 때만)
+        for i in range(2, len(token) - 1):
+            if token[i - 1] in _ADMIN_SPLIT_SUFFIXES:
+                head, tail = token[:i], token[i:]
+                if head in self._token_pos and tail in self._token_pos:
+                    return [head, tail]
+        return None
+
+    def _posting_for(self, token: str):
+        ids = self._posting(token)
+        if ids is not None:
+            return [ids]
+        parts = self._split_joined(token)
+        if parts:
+            return [self._posting(p) for p in parts]
+        # "서울" → "서울특별시" 처럼 앞부분만 말한 경우: 그 글자로 시작하는 토큰 전부.
+        # 합치는 비용이 크므로 결과를 기억해 둔다
+        if token in self._prefix_cache:
+            return self._prefix_cache[token]
+        lo = bisect.bisect_left(self._vocab, token)
+        hi = bisect.bisect_left(self._vocab, token + "\uffff")
+        found = None
+        if lo < hi:
+            found = [np.unique(np.concatenate([self._posting(t) for t in self._vocab[lo:hi]]))]
+        if len(self._prefix_cache) >= PREFIX_CACHE_SIZE:
+            self._prefix_cache.clear()
+        self._prefix_cache[token] = found
+        return found
+
+    def region_rows(self, region_code: str):
+        # 지역 코드에 속한 시설 행 번호 (파일 순서). 없는 코드면 빈 배열
+        i = self._region_pos.get(region_code)
+        if i is None:
+            return np.empty(0, dtype=np.int32)
+        return self._region_ids[self._region_offsets[i]:self._region_offsets[i + 1]]
+
+    def resolve_region(self, location: str):
+        return self.regions.resolve(location) if location else None
+
+    def search(self, location: str, k: int = 5, region_code: str = None):
+        # 지역 코드(없으면 location 을 지역으로 읽은 코드)에 속한 시설, 지역으로 못 읽으면
+        # location 의 토큰을 모두 포함하는 시설. 행 번호를 파일 순서대로 최대 k 개
+        if not self._token_pos or not (location or region_code):
+            return []
+        region_code = region_code or self.resolve_region(location)
+        if region_code in self._region_pos:
+            return self.region_rows(region_code)[:k].tolist()
+        return self.token_search(location, k) if location else []
+
+    def token_search(self, location: str, k: int = 5):
+        # location 의 토큰을 모두 포함하는 시설 행 번호를 파일 순서대로 최대 k 개
+        if not self._token_pos or not location:
+            return []
+
+        postings = []
+        for token in tokenize_address(location):
+            found = self._posting_for(token)
+            if found is None:
+                return []
+            postings.extend(found)
+        if not postings:
+            return []
+
+        postings.sort(key=len)
+        candidates = postings[0]
+        for other in postings[1:]:
+            pos = np.searchsorted(other, candidates)
+            pos[pos == len(other)] = 0
+            candidates = candidates[other[pos] == candidates]
+            if not len(candidates):
+                return []
+        return candidates[:k].tolist()
+
+    def nearest(self, location: str, k: int = 5, radius_km: float = None, region_code: str = None):
+        # 지역 코드(없으면 location 을 지역으로 읽은 코드)의 중심 좌표에서 가까운 시설
+        # [(행 번호, km), ...]. 좌표 정보가 없거나 지역을 못 찾으면 None
+        if self.gazetteer is None or not len(self.grid):
+            return None
+        region = self.gazetteer.find(region_code or self.resolve_region(location))
+        if region is None:
+            return None
+        lat, lon = self.gazetteer.centroid(region)
+        if radius_km is None:
+            ids, dist = self.grid.knn(lat, lon, k)
+        else:
+            ids, dist = self.grid.within(lat, lon, radius_km, limit=k)
+        return list(zip(ids.tolist(), dist.tolist()))
+
+    def describe(self, row_id: int, distance_km: float = None) -> str:
+        line = f"- 시설명: {self.names[row_id]}"
+        if self.types[row_id]:
+            line += f" / 유형: {self.types[row_id]}"
+        if self.addrs[row_id]:
+            line += f" / 주소: {self.addrs[row_id]}"
+        if distance_km is not None:
+            line += f" / 거리: 약 {distance_km:.1f}km"
+        return line
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def load_facility_index(path: str = FACILITY_CSV_PATH):
+    # 파일이 없으면 None (시설 힌트 없이 동작)
+    try:
+        return FacilityIndex.from_csv(path)
+    except Exception:
+        return None
+
+
+def get_facility_index():
+    # 프로세스당 한 번만 로드
+    global _default_index
+    if _default_index is None:
+        with _default_lock:
+            if _default_index is None:
+                _default_index = load_facility_index() or False
+    return _default_index or None
+
+
+def get_region_gazetteer(load: bool = True) -> regions.RegionGazetteer:
+    # 시설 주소로 만든 지역 사전. 시설 자료가 없으면 시/도만 있는 사전.
+    # load=False 면 시설 표를 새로 로드하지 않는다 (이미 로드돼 있을 때만 그 사전)
+    if load:
+        index = get_facility_index()
+    else:
+        index = _default_index or None
+    return index.regions if index is not None else regions.SIDO_GAZETTEER
+
+
+@metrics.timed()
+def build_facility_hint(location: str, index: FacilityIndex = None, k: int = 5, region_code: str = None) -> str:
+    # region_code 가 있으면 (프로필에 저장된 지역 코드) 다시 해석하지 않고 그 코드로 찾는다.
+    # 힌트는 덤이라 찾다가 오류가 나도 대화 턴은 힌트 없이 계속한다
+    if not (location or region_code):
+        return ""
+    try:
+        return _facility_hint(location, index, k, region_code)
+    except Exception:
+        logger.exception("facility hint failed (%r, %r)", location, region_code)
+        return ""
+
+
+def _facility_hint(location: str, index: FacilityIndex, k: int, region_code: str) -> str:
+    index = index or get_facility_index()
+    if index is None:
+        return ""
+    location = location or region_code
+    region_code = region_code or index.resolve_region(location)
+
+    # 좌표를 쓸 수 있으면 지역 중심에서 가까운 순 (구 경계 너머 시설도 포함),
+    # 아니면 그 지역 / 주소에 지역명이 들어간 시설
+    nearest = index.nearest(location, k, region_code=region_code)
+    if nearest:
+        lines = [index.describe(i, d) for i, d in nearest]
+        header = f"사용자가 말한 지역 '{location}' 중심에서 가까운 순으로 백엔드에서 추려본 체육시설 후보야:\n"
+    else:
+        row_ids = index.search(location, k, region_code=region_code)
+        if not row_ids:
+            return ""
+        lines = [index.describe(i) for i in row_ids]
+        header = f"사용자가 말한 지역 '{location}' 기준으로 백엔드에서 추려본 체육시설 후보야:\n"
+
+    return header + "\n".join(lines)
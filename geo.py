@@ -0,0 +1,256 @@
+import math
+import re
+
+import numpy as np
+
+import datacache
+import regions
+
+# =========================
+# 오프라인 지명 → 좌표 / 격자 공간 색인
+# =========================
+EARTH_RADIUS_KM = 6371.0088
+# 격자 한 칸 크기(도). 위도 0.01° ≈ 1.1km
+GRID_CELL_DEG = 0.01
+# 이 링(≈ 칸 수) 안에서 k 개를 못 채우면 전체를 직접 계산
+MAX_RING = 300
+
+_TOKEN_RE = re.compile(r"[가-힣A-Za-z0-9]+")
+_SIGUNGU_SUFFIXES = ("시", "군", "구")
+_DONG_SUFFIXES = regions.DONG_SUFFIXES
+
+LAT_COL_CANDIDATES = ["faci_lat", "FACI_LAT", "lat", "위도", "latitude"]
+LON_COL_CANDIDATES = ["faci_lot", "FACI_LOT", "faci_lon", "lon", "lng", "경도", "longitude"]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def detect_coord_columns(columns):
+    lat_col = next((c for c in LAT_COL_CANDIDATES if c in columns), None)
+    lon_col = next((c for c in LON_COL_CANDIDATES if c in columns), None)
+    if lat_col is None or lon_col is None:
+        return None, None
+    return lat_col, lon_col
+
+
+def parse_region(address: str):
+    # "경기도 성남시 분당구 정자동 1" → ["경기도", "경기도 성남시 분당구", "경기도 성남시 분당구 정자동"]
+    # (regions 의 지역 코드). 시/도 이름은 정식 이름으로 바꾸고 ("서울" → "서울특별시"),
+    # 시/도로 시작하지 않는 주소는 지역으로 보지 않는다
+    tokens = [t for t in _TOKEN_RE.findall(address) if not t.isdigit()]
+    sido = regions.canonical_sido(tokens[0]) if tokens else None
+    if sido is None:
+        return []
+
+    tokens[0] = sido
+    levels = [sido]
+    i = 1
+    sigungu = []
+    while i < len(tokens) and len(sigungu) < 2 and tokens[i].endswith(_SIGUNGU_SUFFIXES):
+        sigungu.append(tokens[i])
+        i += 1
+    if sigungu:
+        levels.append(" ".join([tokens[0]] + sigungu))
+    if i < len(tokens) and tokens[i].endswith(_DONG_SUFFIXES):
+        levels.append(" ".join([tokens[0]] + sigungu + [tokens[i]]))
+    return levels
+
+
+# -------------------------
+# 지명 사전 (gazetteer)
+# -------------------------
+class Gazetteer:
+    """지역 코드(시/도, 시/군/구, 읍/면/동) → 중심 좌표.
+
+    좌표가 있는 시설들의 평균 위치를 그 지역의 중심으로 쓴다.
+    자유 입력 → 지역 코드 변환은 regions.RegionGazetteer 가 맡는다.
+    """
+
+    def __init__(self, names, lat, lon, count):
+        self.names = names
+        self.lat = lat
+        self.lon = lon
+        self.count = count
+        self._pos = {name: i for i, name in enumerate(names)}
+
+    @classmethod
+    def build(cls, region_lists, lat, lon):
+        # region_lists[i] = i 번째 시설의 parse_region 결과들을 합친 목록
+        sums = {}
+        for row_regions, la, lo in zip(region_lists, lat, lon):
+            if np.isnan(la) or np.isnan(lo):
+                continue
+            for r in row_regions:
+                acc = sums.setdefault(r, [0.0, 0.0, 0])
+                acc[0] += la
+                acc[1] += lo
+                acc[2] += 1
+        names = sorted(sums)
+        count = np.array([sums[n][2] for n in names], dtype=np.int32)
+        c_lat = np.array([sums[n][0] for n in names], dtype=np.float64) / np.maximum(count, 1)
+        c_lon = np.array([sums[n][1] for n in names], dtype=np.float64) / np.maximum(count, 1)
+        return cls(names, c_lat, c_lon, count)
+
+    def to_arrays(self, prefix="gaz_"):
+        blob, offsets = datacache.encode_strings(self.names)
+        return {
+            f"{prefix}names": blob,
+            f"{prefix}names_offsets": offsets,
+            f"{prefix}lat": self.lat,
+            f"{prefix}lon": self.lon,
+            f"{prefix}count": self.count,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix="gaz_"):
+        names = datacache.decode_strings(arrays[f"{prefix}names"], arrays[f"{prefix}names_offsets"])
+        return cls(names, arrays[f"{prefix}lat"], arrays[f"{prefix}lon"], arrays[f"{prefix}count"])
+
+    def __len__(self):
+        return len(self.names)
+
+    def find(self, code: str):
+        # 지역 코드 → 지역 번호. 좌표가 없는 지역이면 가장 가까운 상위 지역
+        while code is not None:
+            region_id = self._pos.get(code)
+            if region_id is not None:
+                return region_id
+            code = regions.parent_code(code)
+        return None
+
+    def centroid(self, region_id: int):
+        return float(self.lat[region_id]), float(self.lon[region_id])
+
+
+# -------------------------
+# 격자 공간 색인
+# -------------------------
+def _cell_of(lat, lon, cell_deg):
+    lat_i = np.floor((np.asarray(lat) + 90.0) / cell_deg).astype(np.int64)
+    lon_i = np.floor((np.asarray(lon) + 180.0) / cell_deg).astype(np.int64)
+    return lat_i, lon_i
+
+
+def _cell_key(lat_i, lon_i):
+    return lat_i * 1_000_000 + lon_i
+
+
+class GridIndex:
+    """위경도 점을 일정 크기 칸으로 나눠 칸 번호 순으로 정렬해 둔 공간 색인.
+
+    k-최근접 / 반경 질의는 질의 점 주변 칸만 이진 탐색으로 꺼내서 거리를 계산한다.
+    """
+
+    def __init__(self, lat, lon, cell_keys, order, cell_deg=GRID_CELL_DEG):
+        self.lat = lat
+        self.lon = lon
+        self.cell_keys = cell_keys  # 정렬된 칸 번호 (order 와 같은 순서)
+        self.order = order  # 정렬 순서대로의 점 번호
+        self.cell_deg = cell_deg
+
+    @classmethod
+    def build(cls, lat, lon, cell_deg=GRID_CELL_DEG):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        valid = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        keys = _cell_key(*_cell_of(lat[valid], lon[valid], cell_deg))
+        sort = np.argsort(keys, kind="stable")
+        return cls(lat, lon, keys[sort], valid[sort].astype(np.int32), cell_deg)
+
+    def to_arrays(self, prefix="grid_"):
+        return {
+            f"{prefix}lat": self.lat,
+            f"{prefix}lon": self.lon,
+            f"{prefix}cell_keys": self.cell_keys,
+            f"{prefix}order": self.order,
+            f"{prefix}cell_deg": np.array([self.cell_deg]),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix="grid_"):
+        return cls(
+            arrays[f"{prefix}lat"],
+            arrays[f"{prefix}lon"],
+            arrays[f"{prefix}cell_keys"],
+            arrays[f"{prefix}order"],
+            float(arrays[f"{prefix}cell_deg"][0]),
+        )
+
+    def __len__(self):
+        return len(self.order)
+
+    def _points_in_cells(self, keys):
+        lo = np.searchsorted(self.cell_keys, keys, side="left")
+        hi = np.searchsorted(self.cell_keys, keys, side="right")
+        hit = hi > lo
+        if not hit.any():
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate([self.order[a:b] for a, b in zip(lo[hit], hi[hit])])
+
+    def _ring_keys(self, ci, cj, r):
+        if r == 0:
+            return _cell_key(np.array([ci]), np.array([cj]))
+        span = np.arange(-r, r + 1)
+        top = _cell_key(np.full(span.size, ci + r), cj + span)
+        bottom = _cell_key(np.full(span.size, ci - r), cj + span)
+        inner = np.arange(-r + 1, r)
+        left = _cell_key(ci + inner, np.full(inner.size, cj - r))
+        right = _cell_key(ci + inner, np.full(inner.size, cj + r))
+        return np.concatenate([top, bottom, left, right])
+
+    def _nearest(self, lat, lon, ids, k):
+        d = haversine_km(lat, lon, self.lat[ids], self.lon[ids])
+        if len(ids) > k:
+            part = np.argpartition(d, k)[:k]
+            ids, d = ids[part], d[part]
+        sort = np.argsort(d, kind="stable")
+        return ids[sort], d[sort]
+
+    def knn(self, lat, lon, k=5):
+        # (점 번호 배열, km 거리 배열) 가까운 순
+        if not len(self.order):
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        ci, cj = (int(x) for x in _cell_of(lat, lon, self.cell_deg))
+        # 링 r 까지 훑었으면 질의 점에서 (칸 안 위치까지의 거리 + r 칸) 안은 모두 본 것.
+        # 경도 방향 칸이 더 좁으므로 그쪽 기준으로 보수적으로 잡는다
+        lat_km = self.cell_deg * 111.0
+        lon_km = lat_km * max(math.cos(math.radians(abs(lat) + self.cell_deg * MAX_RING)), 0.01)
+        fi = (lat + 90.0) / self.cell_deg - ci
+        fj = (lon + 180.0) / self.cell_deg - cj
+        edge_km = min(min(fi, 1 - fi) * lat_km, min(fj, 1 - fj) * lon_km)
+        step_km = min(lat_km, lon_km)
+
+        found = []
+        n_found = 0
+        for r in range(MAX_RING + 1):
+            ids = self._points_in_cells(self._ring_keys(ci, cj, r))
+            if len(ids):
+                found.append(ids)
+                n_found += len(ids)
+            if n_found >= k:
+                ids, d = self._nearest(lat, lon, np.concatenate(found), k)
+                if d[-1] <= edge_km + r * step_km:
+                    return ids, d
+        return self._nearest(lat, lon, self.order, k)
+
+    def within(self, lat, lon, radius_km, limit=None):
+        # 반경 radius_km 안의 점을 가까운 순으로
+        dlat = radius_km / 111.0
+        dlon = radius_km / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+        i0, j0 = _cell_of(lat - dlat, lon - dlon, self.cell_deg)
+        i1, j1 = _cell_of(lat + dlat, lon + dlon, self.cell_deg)
+        ii, jj = np.meshgrid(np.arange(i0, i1 + 1), np.arange(j0, j1 + 1), indexing="ij")
+        ids = self._points_in_cells(_cell_key(ii.ravel(), jj.ravel()))
+        if not len(ids):
+            return ids, np.empty(0)
+        d = haversine_km(lat, lon, self.lat[ids], self.lon[ids])
+        keep = d <= radius_km
+        ids, d = ids[keep], d[keep]
+        sort = np.argsort(d, kind="stable")
+        if limit is not None:
+            sort = sort[:limit]
+        return ids[sort], d[sort]
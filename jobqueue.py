@@ -0,0 +1,237 @@
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+import db
+import metrics
+
+# =========================
+# 대화 턴 작업 큐 워커
+# =========================
+# 화면은 LLM 답을 rerun 안에서 기다리지 않는다. service.enqueue_turn 으로 db.chat_jobs 에 턴을 넣고
+# 결과를 폴링하면, 여기 워커 스레드들이 작업을 하나씩 가져가 service.chat_turn 으로 처리한다.
+#   - 내구성: 작업은 넣는 순간 db 에 커밋된다. 처리 중인 작업의 lease(JOB_LEASE_SEC)는 lease 스레드가
+#     JOB_LEASE_SEC / 3 마다 연장한다 (스트리밍 여부와 상관없이). 프로세스가 죽으면 lease 가
+#     지난 뒤 다른 워커가 다시 가져간다 (최대 JOB_MAX_ATTEMPTS 번). 답을 저장한 직후 죽으면
+#     같은 턴이 한 번 더 처리될 수 있다 (at-least-once)
+#   - 순서: 한 사용자의 작업은 넣은 순서대로 한 번에 하나씩만 (db.claim_chat_job)
+#   - 취소: service.cancel_turn. 처리 중이면 답을 저장하기 전에 알아채고 버린다
+#   - 워커는 화면 / API 프로세스마다 CHAT_WORKERS 개. 따로 띄우려면
+#       FITNESS_CHAT_WORKERS=0 streamlit run app.py
+#       python -m jobqueue --threads 8
+#     여러 프로세스가 같은 db 를 같이 처리해도 된다
+CHAT_WORKERS = int(os.environ.get("FITNESS_CHAT_WORKERS", "4"))
+JOB_POLL_SEC = float(os.environ.get("FITNESS_CHAT_JOB_POLL_SEC", "0.5"))
+JOB_LEASE_SEC = float(os.environ.get("FITNESS_CHAT_JOB_LEASE_SEC", "120"))
+JOB_MAX_ATTEMPTS = 3
+# 같은 사용자 대화가 그 사이 바뀌었을 때 (로그인으로 새 대화 등) 다시 읽어서 처리하는 횟수
+JOB_CONFLICT_RETRIES = 2
+# 받는 중인 답을 db 에 쓰는 간격 (화면이 폴링해서 보여준다)
+JOB_PROGRESS_SEC = 0.3
+# 끝난 작업을 지우기 전까지 남겨 두는 기간
+JOB_KEEP_DAYS = 1
+JOB_STREAM = os.environ.get("FITNESS_LLM_STREAM", "1") != "0"
+
+logger = logging.getLogger(__name__)
+
+
+class ChatWorkerPool:
+    """db.chat_jobs 를 처리하는 워커 스레드 묶음.
+
+    작업이 없으면 poll_sec 마다 다시 보고, 같은 프로세스에서 작업을 넣으면 wake() 로 바로 깨운다.
+    """
+
+    def __init__(self, threads: int = CHAT_WORKERS, api_key: str = None, poll_sec: float = JOB_POLL_SEC):
+        self.api_key = api_key
+        self.poll_sec = poll_sec
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._wake = threading.Condition()
+        self._stop = threading.Event()
+        self._running = {}
+        self._running_lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"chat-worker-{i}", daemon=True) for i in range(threads)
+        ]
+        self._lease_thread = threading.Thread(target=self._extend_leases, name="chat-worker-lease", daemon=True)
+
+    def start(self):
+        db.purge_chat_jobs((datetime.now() - timedelta(days=JOB_KEEP_DAYS)).isoformat())
+        for t in self._threads:
+            t.start()
+        self._lease_thread.start()
+
+    def wake(self):
+        with self._wake:
+            self._wake.notify()
+
+    def stop(self, timeout: float = 10.0):
+        # 새 작업은 그만 가져가고 timeout 동안 처리 중인 턴을 기다린다.
+        # 그래도 안 끝난 작업은 바로 다시 대기로 돌려 다음 워커가 lease 를 기다리지 않게 한다
+        self._stop.set()
+        with self._wake:
+            self._wake.notify_all()
+        deadline = time.monotonic() + timeout
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+        with self._running_lock:
+            leftover = list(self._running.values())
+        for job in leftover:
+            db.requeue_chat_job(job["id"])
+
+    def _extend_leases(self):
+        # 처리 중인 작업의 lease 를 주기적으로 연장. 스트리밍을 끄거나 재시도로 턴이 길어져도
+        # 살아 있는 워커의 작업을 다른 워커가 다시 가져가지 않게 한다
+        while not self._stop.wait(JOB_LEASE_SEC / 3):
+            with self._running_lock:
+                jobs = [(job["id"], job["attempts"]) for job in self._running.values()]
+            if not jobs:
+                continue
+            try:
+                db.extend_chat_job_leases(jobs, JOB_LEASE_SEC)
+            except Exception:
+                logger.warning("chat job lease extension failed", exc_info=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                job = db.claim_chat_job(self.name, JOB_LEASE_SEC, JOB_MAX_ATTEMPTS)
+            except sqlite3.OperationalError:
+                # busy_timeout 안에 쓰기 잠금을 못 잡았다 → 잠시 뒤 다시
+                logger.warning("chat job claim failed", exc_info=True)
+                job = None
+            if job is None:
+                with self._wake:
+                    self._wake.wait(self.poll_sec)
+                continue
+            me = threading.get_ident()
+            with self._running_lock:
+                self._running[me] = job
+            try:
+                self._process(job)
+            except Exception as e:
+                # chat_turn 밖(db 잠김 등)에서 난 오류도 스레드를 죽이지 않는다
+                logger.exception("chat job %s crashed", job["id"])
+                self._abandon(job, str(e))
+            finally:
+                with self._running_lock:
+                    self._running.pop(me, None)
+
+    def _abandon(self, job: dict, error: str):
+        # 처리하다 만 작업: 시도 횟수가 남았으면 다시 대기로, 아니면 failed.
+        # 이것도 실패하면 lease 가 지난 뒤 claim_chat_job 이 같은 처리를 한다
+        try:
+            if job["attempts"] < JOB_MAX_ATTEMPTS:
+                db.requeue_chat_job(job["id"])
+            else:
+                db.finish_chat_job(job["id"], "failed", error=error)
+                metrics.count("fitness_chat_jobs_total", status="failed")
+        except Exception:
+            logger.exception("chat job %s could not be released", job["id"])
+
+    def _process(self, job: dict):
+        import service
+
+        metrics.observe(
+            "fitness_chat_job_wait_seconds",
+            (datetime.now() - datetime.fromisoformat(job["created_at"])).total_seconds(),
+        )
+        state = {"cancelled": False, "written": 0.0}
+
+        def on_text(partial):
+            now = time.monotonic()
+            if now - state["written"] >= JOB_PROGRESS_SEC:
+                state["written"] = now
+                if not db.update_chat_job_progress(job["id"], partial, JOB_LEASE_SEC):
+                    state["cancelled"] = True
+
+        def cancelled():
+            # 취소됐거나, lease 가 지나 다른 워커가 다시 가져갔으면 이 워커의 답은 버린다
+            if not state["cancelled"]:
+                current = db.get_chat_job(job["id"])
+                state["cancelled"] = (
+                    current is None or current["status"] != "running" or current["attempts"] != job["attempts"]
+                )
+            return state["cancelled"]
+
+        for _ in range(JOB_CONFLICT_RETRIES + 1):
+            try:
+                result = service.chat_turn(
+                    job["username"],
+                    job["message"],
+                    on_text=on_text if JOB_STREAM else None,
+                    api_key=self.api_key,
+                    cancelled=cancelled,
+                )
+            except service.ChatConflict:
+                metrics.count("fitness_chat_jobs_total", status="conflict")
+                continue
+            except service.TurnCancelled:
+                metrics.count("fitness_chat_jobs_total", status="cancelled")
+                return
+            except Exception as e:
+                logger.exception("chat job %s failed", job["id"])
+                db.finish_chat_job(job["id"], "failed", error=str(e))
+                metrics.count("fitness_chat_jobs_total", status="failed")
+                return
+            db.finish_chat_job(job["id"], "done", result=result)
+            metrics.count("fitness_chat_jobs_total", status="done")
+            return
+        db.finish_chat_job(job["id"], "failed", error="대화가 계속 동시에 바뀌어서 답을 저장하지 못했어")
+        metrics.count("fitness_chat_jobs_total", status="failed")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def start_workers(api_key: str = None, threads: int = None):
+    # 프로세스당 한 번 워커를 띄운다 (처음 부를 때의 api_key, 없으면 OPENAI_API_KEY). threads 0 이면 None
+    global _pool
+    threads = CHAT_WORKERS if threads is None else threads
+    if threads <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = ChatWorkerPool(threads, api_key=api_key or None)
+                pool.start()
+                _pool = pool
+    return _pool
+
+
+def stop_workers(timeout: float = 10.0):
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.stop(timeout)
+
+
+def notify_enqueued():
+    # 같은 프로세스에 워커가 있으면 폴링을 기다리지 않고 바로 가져가게 한다
+    pool = _pool
+    if pool is not None:
+        pool.wake()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="대화 턴 작업 큐 워커")
+    parser.add_argument("--threads", type=int, default=max(1, CHAT_WORKERS))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    db.ensure_schema()
+    metrics.start_exporters()
+    start_workers(threads=args.threads)
+    logger.info("chat workers: %d threads on %s", args.threads, db.DB_PATH)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stop_workers()
@@ -0,0 +1,414 @@
+import bisect
+import heapq
+import math
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+import db
+
+# =========================
+# 운동별 순위표 (같은 연령대 / 성별 안에서 이번 주 / 이번 달 몇 등인지)
+# =========================
+# 순위표 하나 = (운동, 기간 종류, 기간 시작일). 사용자별 그 기간 운동량 합계를 들고 있고,
+# 묶음(연령대 + 성별, 그리고 전체)마다 "합계 구간별 사용자 수" Fenwick 트리를 둔다.
+#   - 순위 / 백분위: 내 구간보다 위에 있는 사용자 수 = 트리 prefix 합 두 번 → O(log 구간 수)
+#   - insert_log: 내 합계가 옛 구간에서 새 구간으로 옮겨 갈 뿐이라 트리 두 곳만 고친다
+#     (사용자 전체를 다시 정렬하지 않는다). db 의 쓰기 알림(add_write_listener)으로 받는다
+#   - 상위 목록: 기간 안에서 합계는 늘기만 하므로 묶음마다 상위 TOP_K 명만 들고 있으면 된다
+# 합계 구간은 EXACT_BINS 까지는 1 단위, 그 위로는 BIN_GROWTH 배씩 넓어진다
+# (아주 큰 값끼리는 같은 구간이면 같은 순위로 본다).
+#
+# 순위표는 처음 물어볼 때 daily_rollup 에서 한 번 만들고, 그 뒤에는 쓰기만 더해 간다.
+#   - 만들 때 같은 읽기 트랜잭션에서 MAX(logs.id) 를 watermark 로 읽어 둔다.
+#     id 가 watermark 이하인 기록은 이미 합계에 들어 있으므로 다시 더하지 않는다
+#   - 이 프로세스의 쓰기는 db 쓰기 알림으로 바로 반영 (watermark 위의 id 는 applied 에 적어 둔다)
+#   - 다른 프로세스(API 워커 여럿, python -m jobqueue 등)의 쓰기는 조회할 때 FITNESS_LEADERBOARD_SYNC_SEC 마다
+#     logs 에서 watermark 뒤의 기록만 읽어 따라잡는다 (id 가 PK 라 범위 조회 한 번. 0 = 안 함)
+#   - 다른 프로세스의 프로필(나이 / 성별) 변경은 FITNESS_LEADERBOARD_MAX_AGE_SEC 마다 통째로 다시 만들 때
+#     users 를 다시 읽어 반영한다 (0 = 안 함). 따라잡다가 처음 보는 사용자는 그때 users 에서 찾는다
+WINDOWS = ("week", "month")
+COHORT_AGE_BOUNDS = (20, 30, 40, 50, 60)
+COHORT_AGE_GROUPS = ("10대 이하", "20대", "30대", "40대", "50대", "60대 이상")
+ALL_COHORT = "전체"
+EXACT_BINS = 2048
+BIN_GROWTH = 1.02
+MAX_TOTAL = 10 ** 8
+TOP_K = 20
+# 기간 종류마다 들고 있을 기간 수 (이번 기간 + 지난 기간)
+KEEP_PERIODS = 2
+LEADERBOARD_MAX_AGE_SEC = float(os.environ.get("FITNESS_LEADERBOARD_MAX_AGE_SEC", "0"))
+LEADERBOARD_SYNC_SEC = float(os.environ.get("FITNESS_LEADERBOARD_SYNC_SEC", "1"))
+
+_LOG_GROWTH = math.log(BIN_GROWTH)
+
+
+def cohort_of(age, sex) -> str:
+    # "20대 남" / "나이 미입력 여" / "30대 성별 미입력"
+    group = COHORT_AGE_GROUPS[bisect.bisect_right(COHORT_AGE_BOUNDS, age)] if age else "나이 미입력"
+    return f"{group} {sex or '성별 미입력'}"
+
+
+def value_bin(total) -> int:
+    if total < EXACT_BINS:
+        return int(total)
+    return EXACT_BINS + int(math.log(min(total, MAX_TOTAL) / EXACT_BINS) / _LOG_GROWTH)
+
+
+N_BINS = value_bin(MAX_TOTAL) + 1
+
+
+def _value_bins(totals: np.ndarray) -> np.ndarray:
+    # value_bin 을 배열로 (처음 만들 때)
+    totals = np.minimum(totals, MAX_TOTAL).astype(np.float64)
+    big = EXACT_BINS + (np.log(np.maximum(totals, EXACT_BINS) / EXACT_BINS) / _LOG_GROWTH).astype(np.int64)
+    return np.where(totals < EXACT_BINS, totals.astype(np.int64), big)
+
+
+def period_start(day: date, window: str) -> date:
+    if window == "week":
+        return day - timedelta(days=day.weekday())
+    if window == "month":
+        return day.replace(day=1)
+    raise ValueError(f"window 는 week / month: {window!r}")
+
+
+def period_end(start: date, window: str) -> date:
+    # 다음 기간 시작일 (이 날짜는 포함하지 않음)
+    if window == "week":
+        return start + timedelta(days=7)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+class FenwickTree:
+    """구간별 개수. add / prefix 모두 O(log n)."""
+
+    def __init__(self, size: int, counts=None):
+        self.size = size
+        self.total = 0
+        self._tree = [0] * (size + 1)
+        if counts is not None:
+            # O(n) 한 번에 만들기: 각 칸을 자기 부모 칸에 더해 올린다
+            tree = self._tree
+            for i, c in enumerate(counts, 1):
+                tree[i] += int(c)
+                parent = i + (i & -i)
+                if parent <= size:
+                    tree[parent] += tree[i]
+            self.total = int(sum(counts))
+
+    def add(self, i: int, delta: int):
+        self.total += delta
+        i += 1
+        tree = self._tree
+        while i <= self.size:
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i: int) -> int:
+        # 0..i 구간 합 (i < 0 이면 0)
+        s = 0
+        i += 1
+        tree = self._tree
+        while i > 0:
+            s += tree[i]
+            i -= i & -i
+        return s
+
+
+def load_rollup_totals(window: str, start: date, end: date):
+    # 기간 안의 ([(username, exercise, 합계)], watermark).
+    # watermark = 같은 스냅샷의 MAX(logs.id). 롤업은 logs 와 같은 트랜잭션에서 쓰이므로
+    # id 가 watermark 이하인 기록은 모두 합계에 들어 있고, 그보다 큰 기록은 하나도 없다
+    with db.get_pool().connection() as conn, conn:
+        conn.execute("BEGIN")
+        watermark = conn.execute("SELECT COALESCE(MAX(id), 0) FROM logs").fetchone()[0]
+        rows = conn.execute(
+            """
+            SELECT username, exercise, SUM(total_amount)
+            FROM daily_rollup
+            WHERE log_date >= ? AND log_date < ?
+            GROUP BY username, exercise
+            """,
+            (start.isoformat(), end.isoformat()),
+        ).fetchall()
+    return rows, watermark
+
+
+def load_new_logs(after_id: int, since: date):
+    # watermark(after_id) 뒤에 커밋된 기록 중 since 이후 것 → ([(id, username, log_date, exercise, amount)], 새 watermark)
+    with db.get_pool().connection() as conn, conn:
+        conn.execute("BEGIN")
+        watermark = conn.execute("SELECT COALESCE(MAX(id), 0) FROM logs").fetchone()[0]
+        if watermark <= after_id:
+            return [], after_id
+        rows = conn.execute(
+            """
+            SELECT id, username, log_date, exercise, amount
+            FROM logs
+            WHERE id > ? AND id <= ? AND log_date >= ?
+            ORDER BY id
+            """,
+            (after_id, watermark, since.isoformat()),
+        ).fetchall()
+    return rows, watermark
+
+
+def load_user_cohorts(usernames=None) -> dict:
+    # username → 묶음 이름 (usernames 를 주면 그 사용자들만)
+    sql, params = "SELECT username, age, sex FROM users", ()
+    if usernames is not None:
+        params = tuple(usernames)
+        sql += f" WHERE username IN ({','.join('?' * len(params))})"
+    with db.get_pool().connection() as conn:
+        return {u: cohort_of(age, sex) for u, age, sex in conn.execute(sql, params)}
+
+
+class Leaderboard:
+    """운동 / 기간별 순위표 묶음.
+
+    cohorts: username → 묶음 이름 (None 이면 users 테이블에서 읽고, 다시 만들 때마다 새로 읽는다)
+    load_totals: (window, start, end) → ([(username, exercise, total)], watermark) (기본은 daily_rollup)
+    load_since: (after_id, since) → ([(id, username, log_date, exercise, amount)], watermark)
+    (기본은 logs, sync_sec 마다 다른 프로세스의 쓰기를 따라잡을 때)
+    """
+
+    def __init__(self, cohorts: dict = None, load_totals=load_rollup_totals,
+                 max_age_sec: float = LEADERBOARD_MAX_AGE_SEC, load_since=load_new_logs,
+                 sync_sec: float = LEADERBOARD_SYNC_SEC):
+        self._load_cohorts = load_user_cohorts if cohorts is None else None
+        self._cohorts = load_user_cohorts() if cohorts is None else dict(cohorts)
+        self._load_totals = load_totals
+        self._load_since = load_since
+        self.max_age_sec = max_age_sec
+        self.sync_sec = sync_sec
+        self._synced_at = time.monotonic()
+        # (window, start) → {"loaded_at": 시각, "watermark": 반영이 끝난 MAX(logs.id),
+        #                    "applied": watermark 위에서 이미 더한 id, "boards": {exercise: board}}
+        self._periods = {}
+        self._lock = threading.Lock()
+
+    # -------------------------
+    # 만들기
+    # -------------------------
+    def _period(self, window: str, start: date) -> dict:
+        self._sync()
+        key = (window, start)
+        period = self._periods.get(key)
+        if period is not None and not (
+            self.max_age_sec and time.monotonic() - period["loaded_at"] > self.max_age_sec
+        ):
+            return period
+        if period is not None:
+            # 다시 만들기: 그 사이 다른 프로세스에서 바뀐 프로필도 반영 (다른 기간의 순위표도 옮긴다)
+            self._refresh_cohorts()
+        loaded_at = time.monotonic()
+        rows, watermark = self._load_totals(window, start, period_end(start, window))
+        period = {"loaded_at": loaded_at, "watermark": watermark, "applied": set(), "boards": self._build_boards(rows)}
+        self._periods[key] = period
+        # 오래된 기간은 버린다
+        starts = sorted(s for w, s in self._periods if w == window)
+        for old in starts[:-KEEP_PERIODS]:
+            del self._periods[(window, old)]
+        return period
+
+    def _build_boards(self, rows) -> dict:
+        by_exercise = {}
+        for username, exercise, total in rows:
+            by_exercise.setdefault(exercise, {})[username] = total
+        boards = {}
+        for exercise, totals in by_exercise.items():
+            names = list(totals)
+            values = np.fromiter(totals.values(), dtype=np.int64, count=len(names))
+            cohort_names = [self._cohort(u) for u in names]
+            cohort_list, cohort_idx = np.unique(np.array(cohort_names, dtype=object), return_inverse=True)
+            bins = _value_bins(values)
+            trees = {ALL_COHORT: FenwickTree(N_BINS, np.bincount(bins, minlength=N_BINS))}
+            top = {ALL_COHORT: self._top_from(names, values, np.arange(len(names)))}
+            for c, name in enumerate(cohort_list):
+                members = np.flatnonzero(cohort_idx == c)
+                trees[name] = FenwickTree(N_BINS, np.bincount(bins[members], minlength=N_BINS))
+                top[name] = self._top_from(names, values, members)
+            boards[exercise] = {"totals": totals, "trees": trees, "top": top}
+        return boards
+
+    @staticmethod
+    def _top_from(names, values, members) -> list:
+        # [(-합계, username), ...] 오름차순 = 합계 큰 순
+        if len(members) > TOP_K:
+            members = members[np.argpartition(-values[members], TOP_K - 1)[:TOP_K]]
+        return sorted((-int(values[i]), names[i]) for i in members)
+
+    def _cohort(self, username) -> str:
+        # 모르는 사용자는 기본 묶음으로 보되 적어 두지 않는다 (나중에 users 에서 읽으면 _move 로 옮긴다)
+        cohort = self._cohorts.get(username)
+        return cohort if cohort is not None else cohort_of(None, None)
+
+    def _refresh_cohorts(self, usernames=None):
+        if self._load_cohorts is None:
+            return
+        for username, cohort in self._load_cohorts(usernames).items():
+            self._move(username, cohort)
+
+    # -------------------------
+    # 쓰기 반영
+    # -------------------------
+    def on_write(self, kind, payload):
+        # db.add_write_listener 에 등록하는 함수. 커밋 직후에 불리지만 그 사이 순위표를 새로 읽었거나
+        # _sync 가 먼저 읽어 갔을 수 있으므로, 이미 반영한 id 는 다시 더하지 않는다
+        with self._lock:
+            if kind == "logs":
+                for username, log_date, exercise, amount, log_id in payload:
+                    self._apply(log_id, username, log_date, exercise, amount)
+            elif kind == "profile":
+                username, profile = payload
+                self._move(username, cohort_of(profile.get("age"), profile.get("sex")))
+
+    def _apply(self, log_id, username, log_date, exercise, amount):
+        day = date.fromisoformat(log_date)
+        for window in WINDOWS:
+            period = self._periods.get((window, period_start(day, window)))
+            if period is None or log_id <= period["watermark"] or log_id in period["applied"]:
+                continue
+            self._add(period["boards"], username, exercise, amount)
+            if self.sync_sec:
+                # _sync 가 watermark 를 올리며 비운다 (sync 를 안 하면 watermark 만으로 충분)
+                period["applied"].add(log_id)
+
+    def _sync(self):
+        # 다른 프로세스가 쓴 기록 따라잡기: 가장 낮은 watermark 뒤의 logs 를 읽어 아직 안 더한 것만 더한다.
+        # 쓰기 트랜잭션은 하나씩이고 id 는 커밋 순서대로 늘어나므로 새 watermark 이하는 모두 읽은 셈이다
+        now = time.monotonic()
+        if not self.sync_sec or not self._periods or now - self._synced_at < self.sync_sec:
+            return
+        self._synced_at = now
+        after_id = min(p["watermark"] for p in self._periods.values())
+        since = min(start for _, start in self._periods)
+        rows, watermark = self._load_since(after_id, since)
+        unknown = {row[1] for row in rows} - self._cohorts.keys()
+        if unknown:
+            # 다른 프로세스에서 가입한 사용자
+            self._refresh_cohorts(unknown)
+        for row in rows:
+            self._apply(*row)
+        for period in self._periods.values():
+            if watermark > period["watermark"]:
+                period["watermark"] = watermark
+                period["applied"] = {i for i in period["applied"] if i > watermark}
+
+    def _add(self, boards, username, exercise, amount):
+        board = boards.get(exercise)
+        if board is None:
+            board = boards[exercise] = {"totals": {}, "trees": {}, "top": {}}
+        old = board["totals"].get(username, 0)
+        new = old + amount
+        board["totals"][username] = new
+        for name in (ALL_COHORT, self._cohort(username)):
+            tree = board["trees"].get(name)
+            if tree is None:
+                tree = board["trees"][name] = FenwickTree(N_BINS)
+            if old:
+                tree.add(value_bin(old), -1)
+            tree.add(value_bin(new), 1)
+            self._raise_top(board["top"].setdefault(name, []), username, new)
+
+    @staticmethod
+    def _raise_top(top: list, username, total):
+        # 합계가 늘어난 사용자를 상위 목록에 반영 (목록 길이는 TOP_K 이하)
+        if len(top) >= TOP_K and -total >= top[-1][0] and all(u != username for _, u in top):
+            return
+        top[:] = [entry for entry in top if entry[1] != username]
+        bisect.insort(top, (-total, username))
+        del top[TOP_K:]
+
+    def _move(self, username, cohort):
+        # 프로필(나이 / 성별)이 바뀌어 묶음이 바뀐 사용자를 모든 순위표에서 옮긴다
+        old = self._cohort(username)
+        self._cohorts[username] = cohort
+        if old == cohort:
+            return
+        for period in self._periods.values():
+            for board in period["boards"].values():
+                total = board["totals"].get(username)
+                if total is None:
+                    continue
+                b = value_bin(total)
+                board["trees"][old].add(b, -1)
+                tree = board["trees"].get(cohort)
+                if tree is None:
+                    tree = board["trees"][cohort] = FenwickTree(N_BINS)
+                tree.add(b, 1)
+                old_top = board["top"].get(old, [])
+                if any(u == username for _, u in old_top):
+                    # 빠진 자리는 남은 사람 중에서 다시 채운다 (드문 경우라 전체를 훑는다)
+                    members = [(u, t) for u, t in board["totals"].items() if self._cohort(u) == old]
+                    board["top"][old] = sorted((-t, u) for u, t in heapq.nlargest(TOP_K, members, key=lambda m: m[1]))
+                self._raise_top(board["top"].setdefault(cohort, []), username, total)
+
+    # -------------------------
+    # 조회
+    # -------------------------
+    def rank(self, username, exercise, window: str = "week", today: date = None):
+        """이번 기간 내 순위. 기록이 없으면 None.
+
+        반환 dict: exercise / window / period_start / total, cohort / all 은 각각
+        {"name", "size", "rank", "top_percent", "percentile"}. rank 는 나보다 합계 구간이 높은 사람 수 + 1,
+        top_percent = rank / size * 100 (상위 몇 %), percentile = 나보다 낮은 비율 (같은 구간은 절반)
+        """
+        start = period_start(today or date.today(), window)
+        with self._lock:
+            board = self._period(window, start)["boards"].get(exercise)
+            total = board["totals"].get(username) if board is not None else None
+            if total is None:
+                return None
+            b = value_bin(total)
+            result = {"exercise": exercise, "window": window, "period_start": start, "total": total}
+            for key, name in (("cohort", self._cohort(username)), ("all", ALL_COHORT)):
+                tree = board["trees"][name]
+                below = tree.prefix(b - 1)
+                at_or_below = tree.prefix(b)
+                size = tree.total
+                rank = size - at_or_below + 1
+                result[key] = {
+                    "name": name,
+                    "size": size,
+                    "rank": rank,
+                    "top_percent": rank / size * 100,
+                    "percentile": (below + (at_or_below - below) / 2) / size * 100,
+                }
+            return result
+
+    def top(self, exercise, window: str = "week", cohort: str = ALL_COHORT, k: int = 10, today: date = None):
+        # [(username, 합계), ...] 합계 큰 순 (k <= TOP_K)
+        start = period_start(today or date.today(), window)
+        with self._lock:
+            board = self._period(window, start)["boards"].get(exercise)
+            if board is None:
+                return []
+            return [(u, -neg) for neg, u in board["top"].get(cohort, [])[:k]]
+
+    def exercises(self, username, window: str = "week", today: date = None):
+        # 이번 기간에 기록이 있는 운동
+        start = period_start(today or date.today(), window)
+        with self._lock:
+            boards = self._period(window, start)["boards"]
+            return sorted(e for e, board in boards.items() if username in board["totals"])
+
+
+_default_board = None
+_default_lock = threading.Lock()
+
+
+def get_leaderboard() -> Leaderboard:
+    # 프로세스당 하나. 만들 때 db 쓰기 알림에 등록한다
+    global _default_board
+    if _default_board is None:
+        with _default_lock:
+            if _default_board is None:
+                board = Leaderboard()
+                db.add_write_listener(board.on_write)
+                _default_board = board
+    return _default_board
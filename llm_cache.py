@@ -0,0 +1,413 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import deque
+
+import openai
+
+import db
+# 인자 이름 metrics(호출별 지표 dict)와 겹치지 않도록
+import metrics as perf_metrics
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# OpenAI 응답 캐시 (SQLite)
+# =========================
+# 같은 시스템 프롬프트 + 같은 최근 대화 + 같은 모델 파라미터면 API 를 다시 부르지 않고
+# 저장해 둔 답을 돌려준다. 키는 공백/유니코드/끝 문장부호를 정규화한 뒤의 sha256.
+#   - TTL: 저장 후 LLM_CACHE_TTL_SEC 가 지나면 무시 (다음 저장 때 지워짐)
+#   - LRU: 항목이 LLM_CACHE_MAX_ENTRIES 를 넘으면 가장 오래 안 쓴 것부터 삭제
+#   - FITNESS_LLM_CACHE=0 이면 캐시를 거치지 않는다 (set_enabled 로 실행 중에도 전환)
+LLM_CACHE_PATH = os.environ.get("FITNESS_LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_ENABLED = os.environ.get("FITNESS_LLM_CACHE", "1") != "0"
+LLM_CACHE_TTL_SEC = float(os.environ.get("FITNESS_LLM_CACHE_TTL_SEC", str(24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("FITNESS_LLM_CACHE_MAX_ENTRIES", "20000"))
+# 키에 넣는 최근 메시지 수 (마지막 사용자 메시지 포함)
+LLM_CACHE_CONTEXT_MESSAGES = int(os.environ.get("FITNESS_LLM_CACHE_CONTEXT_MESSAGES", "3"))
+# 마지막 접근 시각은 이 간격보다 자주 갱신하지 않는다 (읽기마다 쓰기가 생기지 않도록)
+TOUCH_INTERVAL_SEC = 60.0
+# 만료 / 개수 초과 정리는 저장 이 횟수마다 한 번 (그 사이에는 최대 개수를 조금 넘을 수 있음)
+EVICT_EVERY_PUTS = 64
+
+_WS_RE = re.compile(r"\s+")
+_TRAILING_PUNCT_RE = re.compile(r"[\s.!?~…ㅋㅎ]+$")
+
+_counters = {"hits": 0, "misses": 0, "bypass": 0, "expired": 0, "stores": 0, "evicted": 0}
+_counters_lock = threading.Lock()
+
+
+def _count(name: str, n: int = 1):
+    with _counters_lock:
+        _counters[name] += n
+
+
+def stats() -> dict:
+    # 이 프로세스에서의 조회 결과 수 + 적중률
+    with _counters_lock:
+        out = dict(_counters)
+    looked_up = out["hits"] + out["misses"]
+    out["hit_rate"] = out["hits"] / looked_up if looked_up else 0.0
+    return out
+
+
+def reset_stats():
+    with _counters_lock:
+        for k in _counters:
+            _counters[k] = 0
+
+
+def set_enabled(enabled: bool):
+    global LLM_CACHE_ENABLED
+    LLM_CACHE_ENABLED = bool(enabled)
+
+
+# -------------------------
+# 키
+# -------------------------
+def normalize_text(text: str) -> str:
+    # "오늘 운동 뭐하지??", " 오늘  운동 뭐하지 " → "오늘 운동 뭐하지"
+    text = unicodedata.normalize("NFKC", text or "")
+    text = _WS_RE.sub(" ", text).strip().lower()
+    return _TRAILING_PUNCT_RE.sub("", text)
+
+
+def make_key(model: str, system_prompt: str, messages, params: dict = None,
+             context_messages: int = None) -> str:
+    # 시스템 메시지(프로필 / 요약 / 이번 턴 분석)는 위치와 상관없이 전부,
+    # 대화 메시지는 최근 context_messages 개만 키에 넣는다
+    n = LLM_CACHE_CONTEXT_MESSAGES if context_messages is None else context_messages
+    system = [system_prompt] + [m["content"] for m in messages if m["role"] == "system"]
+    dialog = [m for m in messages if m["role"] != "system"]
+    recent = dialog[-n:] if n > 0 else []
+    payload = {
+        "model": model,
+        "system": [normalize_text(t) for t in system],
+        "messages": [[m["role"], normalize_text(m["content"])] for m in recent],
+        "params": params or {},
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# -------------------------
+# 저장소
+# -------------------------
+class ResponseCache:
+    """SQLite 파일 하나에 담는 응답 캐시. 여러 프로세스 / 스레드가 같이 써도 된다."""
+
+    def __init__(self, path: str = None, ttl_sec: float = None, max_entries: int = None):
+        self.path = path or LLM_CACHE_PATH
+        self.ttl_sec = LLM_CACHE_TTL_SEC if ttl_sec is None else ttl_sec
+        self.max_entries = LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.pool = db.ConnectionPool(self.path, size=4)
+        self._puts = 0
+        with self.pool.connection() as conn, conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)"
+            )
+
+    def get(self, key: str):
+        now = time.time()
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT response, created_at, accessed_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, created_at, accessed_at = row
+            if self.ttl_sec > 0 and now - created_at > self.ttl_sec:
+                _count("expired")
+                return None
+            if now - accessed_at > TOUCH_INTERVAL_SEC:
+                with conn:
+                    conn.execute(
+                        "UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                        (now, key),
+                    )
+        return response
+
+    def put(self, key: str, model: str, response: str):
+        now = time.time()
+        with self.pool.connection() as conn, conn:
+            conn.execute(
+                """
+                INSERT INTO llm_cache (key, model, response, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    response = excluded.response,
+                    created_at = excluded.created_at,
+                    accessed_at = excluded.accessed_at
+                """,
+                (key, model, response, now, now),
+            )
+            self._puts += 1
+            if self._puts % EVICT_EVERY_PUTS:
+                evicted = 0
+            else:
+                evicted = self._evict(conn, now)
+        _count("stores")
+        if evicted:
+            _count("evicted", evicted)
+
+    def _evict(self, conn, now: float) -> int:
+        # 만료된 항목 + 최대 개수를 넘는 만큼 오래 안 쓴 항목 삭제
+        evicted = 0
+        if self.ttl_sec > 0:
+            evicted += conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_sec,)
+            ).rowcount
+        (size,) = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        if size > self.max_entries:
+            evicted += conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?
+                )
+                """,
+                (size - self.max_entries,),
+            ).rowcount
+        return evicted
+
+    def clear(self):
+        with self.pool.connection() as conn, conn:
+            conn.execute("DELETE FROM llm_cache")
+
+    def __len__(self):
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = ResponseCache()
+    return _default_cache
+
+
+# -------------------------
+# OpenAI 호출 래퍼
+# -------------------------
+def _lookup(model, system_prompt, messages, key_messages, params, bypass, cache):
+    # (key, cache, 저장된 답). 캐시를 안 쓰면 cache 는 None
+    if bypass or not LLM_CACHE_ENABLED:
+        _count("bypass")
+        return None, None, None
+    key = make_key(model, system_prompt, messages if key_messages is None else key_messages, params)
+    try:
+        if cache is None:
+            cache = get_cache()
+        cached = cache.get(key)
+    except sqlite3.Error:
+        # 캐시 파일을 못 쓰는 환경이면 캐시 없이 호출
+        return key, None, None
+    _count("hits" if cached is not None else "misses")
+    return key, cache, cached
+
+
+def _store(cache, key, model, reply, finish_reason):
+    # 길이 제한으로 잘린 답은 다시 쓰지 않는다
+    if cache is None or not reply or finish_reason != "stop":
+        return
+    try:
+        cache.put(key, model, reply)
+    except sqlite3.Error:
+        pass
+
+
+def cached_chat_completion(client, model: str, system_prompt: str, messages,
+                           key_messages=None, bypass: bool = False,
+                           cache: ResponseCache = None, metrics: dict = None, **params):
+    # client.chat.completions.create 와 같은 역할이지만 답 텍스트만 돌려준다.
+    # key_messages: 키에 쓸 메시지 (기본 = messages). 사용자마다 다른 인사말처럼
+    #   모델 답에 영향이 적은 메시지를 빼고 싶을 때 넘긴다.
+    # metrics: dict 를 넘기면 ttft_ms / total_ms / cached 와 프롬프트 크기 / 토큰 사용량을 채운다
+    #   (비스트리밍은 ttft = total)
+    # 반환: (답, 캐시 적중 여부). API 예외는 그대로 올라간다 (실패한 답은 저장하지 않음)
+    started = time.perf_counter()
+    key, cache, cached = _lookup(model, system_prompt, messages, key_messages, params, bypass, cache)
+    if cached is not None:
+        now = time.perf_counter()
+        _finish_timing(metrics, "blocking", started, now, now, cached=True)
+        return cached, True
+
+    response = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "system", "content": system_prompt}, *messages],
+        **params,
+    )
+    reply = response.choices[0].message.content
+    ended = time.perf_counter()
+    _finish_timing(metrics, "blocking", started, ended, ended, cached=False)
+    _record_usage(metrics, "blocking", system_prompt, messages, response.usage)
+    _store(cache, key, model, reply, response.choices[0].finish_reason)
+    return reply, False
+
+
+def stream_chat_completion(client, model: str, system_prompt: str, messages,
+                           key_messages=None, bypass: bool = False,
+                           cache: ResponseCache = None, metrics: dict = None, **params):
+    # cached_chat_completion 의 스트리밍 버전. 답 조각(str)을 차례로 내보내는 generator.
+    # 캐시에 있으면 저장된 답을 한 조각으로 내보낸다.
+    # 도중에 난 API 예외(RateLimitError 등)는 그대로 올라가고, 끝까지 받은 답만 저장한다.
+    started = time.perf_counter()
+    key, cache, cached = _lookup(model, system_prompt, messages, key_messages, params, bypass, cache)
+    if cached is not None:
+        now = time.perf_counter()
+        _finish_timing(metrics, "stream", started, now, now, cached=True)
+        yield cached
+        return
+
+    stream = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "system", "content": system_prompt}, *messages],
+        stream=True,
+        # 마지막 청크에 usage(캐시된 프롬프트 토큰 포함)를 받는다
+        stream_options={"include_usage": True},
+        **params,
+    )
+    parts = []
+    first_at = None
+    finish_reason = None
+    usage = None
+    for chunk in stream:
+        if getattr(chunk, "usage", None) is not None:
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        if choice.finish_reason:
+            finish_reason = choice.finish_reason
+        text = choice.delta.content if choice.delta else None
+        if text:
+            if first_at is None:
+                first_at = time.perf_counter()
+            parts.append(text)
+            yield text
+
+    ended = time.perf_counter()
+    _finish_timing(metrics, "stream", started, first_at or ended, ended, cached=False)
+    _record_usage(metrics, "stream", system_prompt, messages, usage)
+    _store(cache, key, model, "".join(parts), finish_reason)
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    # 호출 시작 때의 429 는 RateLimitError 로 오지만, 스트리밍 도중의 쿼터 / 속도 제한은
+    # HTTP 200 응답 안의 error 이벤트라 일반 APIError 로 온다
+    if isinstance(exc, openai.RateLimitError):
+        return True
+    if isinstance(exc, openai.APIError):
+        code = str(getattr(exc, "code", "") or "")
+        kind = str(getattr(exc, "type", "") or "")
+        return code in ("rate_limit_exceeded", "insufficient_quota") or "rate_limit" in kind
+    return False
+
+
+# -------------------------
+# 응답 지연 (TTFT / 전체)
+# -------------------------
+# 방식별 최근 LATENCY_WINDOW 번의 (첫 토큰까지, 전체) ms. 캐시 적중은 따로 센다
+LATENCY_WINDOW = 500
+_latency = {}
+_latency_lock = threading.Lock()
+
+
+def _finish_timing(metrics, mode, started, first_at, ended, cached):
+    # first_at = 첫 글자를 받은 시각 (비스트리밍은 답 전체를 받은 시각)
+    if cached:
+        mode += "-cached"
+    ttft_ms = (first_at - started) * 1000
+    total_ms = (ended - started) * 1000
+    with _latency_lock:
+        _latency.setdefault(mode, deque(maxlen=LATENCY_WINDOW)).append((ttft_ms, total_ms))
+    perf_metrics.observe("fitness_llm_seconds", ttft_ms / 1000, mode=mode, phase="ttft")
+    perf_metrics.observe("fitness_llm_seconds", total_ms / 1000, mode=mode, phase="total")
+    perf_metrics.observe("fitness_stage_seconds", total_ms / 1000, stage="llm")
+    if metrics is not None:
+        metrics.update(mode=mode, cached=cached, ttft_ms=ttft_ms, total_ms=total_ms)
+
+
+def latency_stats() -> dict:
+    # {방식: {"count", "ttft_p50_ms", "ttft_p95_ms", "total_p50_ms", "total_p95_ms"}}
+    with _latency_lock:
+        samples = {mode: list(values) for mode, values in _latency.items()}
+    out = {}
+    for mode, values in samples.items():
+        ttft = sorted(v[0] for v in values)
+        total = sorted(v[1] for v in values)
+        out[mode] = {
+            "count": len(values),
+            "ttft_p50_ms": ttft[len(ttft) // 2],
+            "ttft_p95_ms": ttft[min(len(ttft) - 1, int(len(ttft) * 0.95))],
+            "total_p50_ms": total[len(total) // 2],
+            "total_p95_ms": total[min(len(total) - 1, int(len(total) * 0.95))],
+        }
+    return out
+
+
+# -------------------------
+# 프롬프트 크기 / 토큰 사용량
+# -------------------------
+# API usage 의 prompt_tokens_details.cached_tokens = OpenAI 쪽 prefix 캐시로 할인된 토큰
+_usage = {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+_usage_lock = threading.Lock()
+
+
+def _record_usage(metrics, mode, system_prompt, messages, usage):
+    static_chars = len(system_prompt)
+    dynamic_chars = sum(len(m["content"]) for m in messages)
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+    completion_tokens = getattr(usage, "completion_tokens", None) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None) or 0
+
+    with _usage_lock:
+        _usage["calls"] += 1
+        _usage["prompt_tokens"] += prompt_tokens
+        _usage["cached_tokens"] += cached_tokens
+        _usage["completion_tokens"] += completion_tokens
+    if metrics is not None:
+        metrics.update(
+            static_chars=static_chars,
+            dynamic_chars=dynamic_chars,
+            prompt_tokens=prompt_tokens,
+            cached_tokens=cached_tokens,
+            completion_tokens=completion_tokens,
+        )
+    logger.info(
+        "llm %s: prompt %d chars (static %d + dynamic %d), prompt_tokens=%d cached_tokens=%d "
+        "completion_tokens=%d",
+        mode, static_chars + dynamic_chars, static_chars, dynamic_chars,
+        prompt_tokens, cached_tokens, completion_tokens,
+    )
+
+
+def usage_stats() -> dict:
+    # 이 프로세스의 API 호출 누적 토큰 + 프롬프트 토큰 중 캐시된 비율
+    with _usage_lock:
+        out = dict(_usage)
+    out["cached_ratio"] = out["cached_tokens"] / out["prompt_tokens"] if out["prompt_tokens"] else 0.0
+    return out
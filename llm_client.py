@@ -0,0 +1,335 @@
+import asyncio
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+import openai
+
+from conversation import count_tokens
+
+# =========================
+# 프로세스 공용 비동기 LLM 클라이언트
+# =========================
+# Streamlit 세션마다 OpenAI 를 따로 부르면 몰릴 때 429 가 나고 바로 fallback 으로 떨어진다.
+# 여기서는 프로세스당 하나의 이벤트 루프(백그라운드 스레드)에서 모든 호출을 모아서
+#   - 분당 요청 수 / 토큰 수 token bucket 으로 미리 속도를 맞추고
+#   - 동시에 나가는 요청 수를 LLM_CONCURRENCY 로 제한하고
+#   - 429 / 5xx / 연결 오류는 지터를 넣은 지수 백오프로 재시도 (Retry-After 가 있으면 따름).
+#     단 쿼터 소진(429 insufficient_quota)은 기다려도 풀리지 않으므로 바로 올려 보낸다 (간단 코치 답으로)
+#   - 똑같은 요청이 동시에 들어오면 한 번만 보내고 결과(스트림 조각 포함)를 나눠 준다
+# 세션 쪽은 OpenAI 클라이언트와 같은 모양(service.chat.completions.create)으로 부르고 결과를 기다린다.
+# 재시도 예산(LLM_MAX_RETRIES / LLM_RETRY_DEADLINE_SEC)을 다 쓴 경우에만 마지막 예외가 올라간다.
+LLM_RPM = float(os.environ.get("FITNESS_LLM_RPM", "500"))
+LLM_TPM = float(os.environ.get("FITNESS_LLM_TPM", "200000"))
+# 한꺼번에 몰아 보낼 수 있는 양 = 초당 한도 x LLM_BURST_SEC
+LLM_BURST_SEC = float(os.environ.get("FITNESS_LLM_BURST_SEC", "2"))
+LLM_CONCURRENCY = int(os.environ.get("FITNESS_LLM_CONCURRENCY", "16"))
+LLM_MAX_RETRIES = int(os.environ.get("FITNESS_LLM_MAX_RETRIES", "5"))
+LLM_RETRY_DEADLINE_SEC = float(os.environ.get("FITNESS_LLM_RETRY_DEADLINE_SEC", "30"))
+BACKOFF_BASE_SEC = 0.5
+BACKOFF_MAX_SEC = 8.0
+REQUEST_TIMEOUT_SEC = 60.0
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+_END = object()
+
+
+def backoff_delay(attempt: int, retry_after: float = None) -> float:
+    # attempt 0, 1, 2, ... → 최대 BACKOFF_BASE * 2^attempt 사이의 무작위 값 ("full jitter")
+    if retry_after is not None:
+        return retry_after + random.uniform(0, BACKOFF_BASE_SEC)
+    return random.uniform(0, min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * 2 ** attempt))
+
+
+def _retry_after(exc) -> float:
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_quota_exhausted(exc) -> bool:
+    # 429 중 결제 / 쿼터 소진. 속도 제한과 달리 재시도해도 소용없다
+    if getattr(exc, "code", None) == "insufficient_quota":
+        return True
+    body = getattr(exc, "body", None)
+    if isinstance(body, dict):
+        error = body.get("error") if isinstance(body.get("error"), dict) else body
+        return error.get("code") == "insufficient_quota"
+    return False
+
+
+def estimate_request_tokens(messages, max_tokens: int = None) -> int:
+    # TPM 한도는 입력 + 최대 출력 토큰으로 계산된다
+    prompt = sum(count_tokens(m["content"]) + 4 for m in messages)
+    return prompt + (max_tokens or 0)
+
+
+def request_key(kwargs: dict) -> str:
+    raw = json.dumps(kwargs, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# -------------------------
+# 속도 제한
+# -------------------------
+class TokenBucket:
+    """초당 rate 만큼 차오르고 capacity 까지 쌓이는 양동이. 이벤트 루프 안에서만 쓴다."""
+
+    def __init__(self, per_minute: float, burst_sec: float = LLM_BURST_SEC):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_sec)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        # 기다린 시간(초)을 돌려준다. capacity 보다 큰 요청은 capacity 만큼만 요구
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return waited
+            delay = (amount - self.tokens) / self.rate
+            waited += delay
+            await asyncio.sleep(delay)
+
+    def refund(self, amount: float):
+        # 예상보다 토큰을 덜 썼으면 돌려놓는다 (음수면 추가로 차감)
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class _InFlight:
+    """진행 중인 요청 하나. 결과 조각을 모든 구독자 큐에 나눠 주고, 늦게 온 구독자에게는 처음부터 다시 준다."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items = []
+        self.subscribers = []
+        self.done = False
+        self.error = None
+
+    def subscribe(self) -> queue.Queue:
+        q = queue.Queue()
+        with self.lock:
+            for item in self.items:
+                q.put(item)
+            if self.done:
+                q.put(self.error or _END)
+            else:
+                self.subscribers.append(q)
+        return q
+
+    def publish(self, item):
+        with self.lock:
+            self.items.append(item)
+            for q in self.subscribers:
+                q.put(item)
+
+    def finish(self, error: BaseException = None):
+        with self.lock:
+            self.done = True
+            self.error = error
+            for q in self.subscribers:
+                q.put(error or _END)
+
+
+# -------------------------
+# 서비스
+# -------------------------
+class LLMService:
+    """백그라운드 이벤트 루프 하나를 공유하는 OpenAI 호출 서비스."""
+
+    def __init__(self, api_key: str = None, base_url: str = None, rpm: float = LLM_RPM,
+                 tpm: float = LLM_TPM, concurrency: int = LLM_CONCURRENCY,
+                 max_retries: int = LLM_MAX_RETRIES, retry_deadline_sec: float = LLM_RETRY_DEADLINE_SEC,
+                 coalesce: bool = True):
+        # 설정 오류(키 없음 등)는 여기서 바로 올라가도록 루프 밖에서 만든다
+        self._client = openai.AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=0,
+            timeout=REQUEST_TIMEOUT_SEC,
+        )
+        self.rpm, self.tpm = rpm, tpm
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_deadline_sec = retry_deadline_sec
+        self.coalesce = coalesce
+
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0, "coalesced": 0, "sent": 0, "retries": 0, "rate_limited": 0,
+            "failed": 0, "limiter_wait_sec": 0.0,
+        }
+
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, name="llm-service", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+        # OpenAI 클라이언트와 같은 호출 모양
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._rpm_bucket = TokenBucket(self.rpm)
+        self._tpm_bucket = TokenBucket(self.tpm)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._paused_until = 0.0
+        self._ready.set()
+        self._loop.run_forever()
+
+    def _count(self, name: str, n=1):
+        with self._stats_lock:
+            self._stats[name] += n
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    # ----- 세션 쪽 (동기) -----
+    def create(self, **kwargs):
+        # client.chat.completions.create 와 같은 인자. stream=True 면 청크 iterator,
+        # 아니면 ChatCompletion 을 돌려준다 (다 받을 때까지 기다림)
+        self._count("requests")
+        stream = bool(kwargs.get("stream"))
+        key = request_key(kwargs)
+
+        with self._inflight_lock:
+            entry = self._inflight.get(key) if self.coalesce else None
+            if entry is None:
+                entry = _InFlight()
+                if self.coalesce:
+                    self._inflight[key] = entry
+                asyncio.run_coroutine_threadsafe(self._run(key, entry, kwargs), self._loop)
+            else:
+                self._count("coalesced")
+        q = entry.subscribe()
+
+        if stream:
+            return self._iter_queue(q)
+        item = q.get()
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    @staticmethod
+    def _iter_queue(q):
+        while True:
+            item = q.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    # ----- 이벤트 루프 쪽 -----
+    async def _run(self, key, entry: _InFlight, kwargs):
+        try:
+            await self._call_with_retry(entry, kwargs)
+            entry.finish()
+        except BaseException as e:  # 구독자에게 그대로 전달
+            self._count("failed")
+            entry.finish(e)
+        finally:
+            with self._inflight_lock:
+                if self._inflight.get(key) is entry:
+                    del self._inflight[key]
+
+    async def _call_with_retry(self, entry: _InFlight, kwargs):
+        deadline = time.monotonic() + self.retry_deadline_sec
+        need_tokens = estimate_request_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+        attempt = 0
+        while True:
+            # 다른 요청이 429 를 받았으면 다 같이 잠깐 쉰다
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            waited = await self._rpm_bucket.acquire(1)
+            waited += await self._tpm_bucket.acquire(need_tokens)
+            if waited:
+                self._count("limiter_wait_sec", waited)
+
+            published = len(entry.items)
+            try:
+                async with self._semaphore:
+                    self._count("sent")
+                    await self._call_once(entry, kwargs, need_tokens)
+                return
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, openai.RateLimitError):
+                    self._count("rate_limited")
+                    if is_quota_exhausted(e):
+                        # 다른 요청까지 멈춰 세우지 않고 바로 fallback 으로
+                        raise
+                retry_after = _retry_after(e)
+                delay = backoff_delay(attempt, retry_after)
+                # 스트림 조각을 이미 내보냈으면 이어 붙일 수 없으니 재시도하지 않는다
+                if (len(entry.items) > published or attempt >= self.max_retries
+                        or time.monotonic() + delay > deadline):
+                    raise
+                if isinstance(e, openai.RateLimitError):
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                attempt += 1
+                self._count("retries")
+                await asyncio.sleep(delay)
+
+    async def _call_once(self, entry: _InFlight, kwargs, need_tokens: int):
+        if not kwargs.get("stream"):
+            response = await self._client.chat.completions.create(**kwargs)
+            used = getattr(response.usage, "total_tokens", None)
+            if used is not None:
+                self._tpm_bucket.refund(min(need_tokens, self._tpm_bucket.capacity) - used)
+            entry.publish(response)
+            return
+
+        stream = await self._client.chat.completions.create(**kwargs)
+        async for chunk in stream:
+            entry.publish(chunk)
+            usage = getattr(chunk, "usage", None)
+            if usage is not None and usage.total_tokens is not None:
+                self._tpm_bucket.refund(min(need_tokens, self._tpm_bucket.capacity) - usage.total_tokens)
+
+
+_default_service = None
+_default_lock = threading.Lock()
+
+
+def get_llm_service(api_key: str = None, base_url: str = None) -> LLMService:
+    # 프로세스당 하나. 처음 부를 때의 설정을 쓴다
+    global _default_service
+    if _default_service is None:
+        with _default_lock:
+            if _default_service is None:
+                _default_service = LLMService(api_key=api_key, base_url=base_url)
+    return _default_service
@@ -0,0 +1,143 @@
+import codecs
+import csv
+import io
+import json
+from datetime import date
+
+import db
+
+# =========================
+# 운동 기록 일괄 가져오기 (CSV / JSONL)
+# =========================
+# 한 줄 = 한 기록. 필요한 필드: log_date (YYYY-MM-DD), exercise, amount
+# 바이트 파일은 UTF-8 로 읽히지 않으면 cp949 (한국어 Excel 의 "CSV" 저장)로 읽는다
+REQUIRED_FIELDS = ("log_date", "exercise", "amount")
+AMOUNT_MIN = 1
+AMOUNT_MAX = 10000
+EXERCISE_MAX_LEN = 50
+MAX_REPORTED_ERRORS = 20
+FALLBACK_ENCODING = "cp949"
+SNIFF_CHUNK_BYTES = 1 << 20
+
+
+def validate_row(raw: dict):
+    # 검증을 통과하면 (log_date, exercise, amount), 아니면 ValueError
+    missing = [f for f in REQUIRED_FIELDS if raw.get(f) in (None, "")]
+    if missing:
+        raise ValueError(f"필수 항목 누락: {', '.join(missing)}")
+
+    log_date = date.fromisoformat(str(raw["log_date"]).strip()[:10]).isoformat()
+
+    exercise = str(raw["exercise"]).strip()
+    if not exercise or len(exercise) > EXERCISE_MAX_LEN:
+        raise ValueError(f"운동 이름은 1~{EXERCISE_MAX_LEN}자여야 해: {exercise!r}")
+
+    amount_f = float(raw["amount"])
+    if amount_f != int(amount_f):
+        raise ValueError(f"운동 양은 정수여야 해: {raw['amount']!r}")
+    amount = int(amount_f)
+    if not AMOUNT_MIN <= amount <= AMOUNT_MAX:
+        raise ValueError(f"운동 양은 {AMOUNT_MIN}~{AMOUNT_MAX} 사이여야 해: {amount}")
+
+    return log_date, exercise, amount
+
+
+def detect_format(filename: str) -> str:
+    name = (filename or "").lower()
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    return "csv"
+
+
+def detect_encoding(fileobj) -> str:
+    # 바이트 스트림이 UTF-8 로 끝까지 읽히면 utf-8-sig, 아니면 cp949. 읽은 뒤 제자리로 되감는다.
+    # 되감을 수 없는 스트림은 UTF-8 로 본다 (중간에 못 읽는 줄이 나오면 iter_valid_rows 가 멈추고 알린다)
+    if not (hasattr(fileobj, "seekable") and fileobj.seekable()):
+        return "utf-8-sig"
+    start = fileobj.tell()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        while True:
+            chunk = fileobj.read(SNIFF_CHUNK_BYTES)
+            decoder.decode(chunk, final=not chunk)
+            if not chunk:
+                return "utf-8-sig"
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+    finally:
+        fileobj.seek(start)
+
+
+def _iter_raw(text_stream, fmt: str):
+    # (줄 번호, dict 또는 파싱 에러) 를 한 줄씩 돌려준다
+    if fmt == "jsonl":
+        for line_no, line in enumerate(text_stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, ValueError(f"JSON 파싱 실패: {e.msg}")
+                continue
+            if not isinstance(obj, dict):
+                yield line_no, ValueError("한 줄에 JSON 객체 하나가 있어야 해")
+                continue
+            yield line_no, obj
+    else:
+        reader = csv.DictReader(text_stream)
+        header = [h.strip() for h in (reader.fieldnames or [])]
+        missing = [f for f in REQUIRED_FIELDS if f not in header]
+        if missing:
+            yield 1, ValueError(f"CSV 헤더에 {', '.join(missing)} 컬럼이 없어")
+            return
+        reader.fieldnames = header
+        for raw in reader:
+            yield reader.line_num, raw
+
+
+def _report_error(report: dict, line_no: int, message: str):
+    report["error_count"] += 1
+    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+        report["errors"].append((line_no, message))
+
+
+def iter_valid_rows(text_stream, fmt: str, report: dict):
+    # 유효한 행만 흘려보내고, 잘못된 행은 report 에 기록한다.
+    # 파일을 더 읽을 수 없으면(인코딩) 거기서 멈추고 report["stopped"] 에 남긴다.
+    # 그 앞까지 흘려보낸 행은 저장된다 (report["inserted"])
+    line_no = 0
+    try:
+        for line_no, raw in _iter_raw(text_stream, fmt):
+            if isinstance(raw, Exception):
+                err = raw
+            else:
+                try:
+                    yield validate_row(raw)
+                    continue
+                except (ValueError, TypeError, OverflowError) as e:
+                    err = e
+            _report_error(report, line_no, str(err))
+    except UnicodeDecodeError as e:
+        report["stopped"] = True
+        _report_error(
+            report, line_no + 1, f"{e.encoding} 로 읽을 수 없는 글자가 있어서 여기서 멈췄어 (UTF-8 로 저장해서 다시 올려줘)"
+        )
+
+
+def import_logs(username, fileobj, fmt: str = None, filename: str = None,
+                batch_size: int = db.BULK_BATCH_SIZE) -> dict:
+    # 파일(텍스트 또는 바이트 스트림)을 한 줄씩 읽어 검증하면서 바로 저장.
+    # 반환: {"inserted": n, "error_count": k, "errors": [(줄 번호, 사유), ...],
+    #        "encoding": 읽은 인코딩, "stopped": 파일 끝까지 못 읽고 멈췄는지}
+    fmt = fmt or detect_format(filename or getattr(fileobj, "name", ""))
+    if isinstance(fileobj, io.TextIOBase):
+        text_stream, encoding = fileobj, fileobj.encoding
+    else:
+        encoding = detect_encoding(fileobj)
+        text_stream = io.TextIOWrapper(fileobj, encoding=encoding, newline="")
+
+    report = {"inserted": 0, "error_count": 0, "errors": [], "encoding": encoding, "stopped": False}
+    report["inserted"] = db.bulk_insert_logs(
+        username, iter_valid_rows(text_stream, fmt, report), batch_size=batch_size
+    )
+    return report
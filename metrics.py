@@ -0,0 +1,321 @@
+import bisect
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# =========================
+# 성능 계측 (단계별 시간 히스토그램 / 카운터 / 느린 쿼리 로그)
+# =========================
+# - timed(metric, **labels): 함수 데코레이터, span(metric, **labels): with 블록
+# - observe / count: 값 하나 기록
+# - 캐시 적중 / 토큰 사용량처럼 모듈들이 이미 세고 있는 값은 기록하지 않고,
+#   내보낼 때 그 모듈의 stats() 를 읽는다 (_collect_existing, 이미 import 된 모듈만)
+# - prometheus_text(): Prometheus 텍스트 형식. 파일(FITNESS_METRICS_FILE, textfile collector 용)이나
+#   HTTP(FITNESS_METRICS_PORT, /metrics)로 내보낸다 (start_exporters)
+#
+# FITNESS_METRICS=0(기본)이면 계측 지점은 전역 변수 하나만 보고 바로 원래 함수를 부른다
+# (호출당 timed 0.1us / span 0.4us 안팎, 켜면 1~3us. bench/metrics.py). set_enabled 로 실행 중에도 켜고 끌 수 있다.
+METRICS_ENABLED = os.environ.get("FITNESS_METRICS", "0") == "1"
+# 이보다 오래 걸린 db 함수는 경고 로그 + fitness_slow_queries_total
+SLOW_QUERY_MS = float(os.environ.get("FITNESS_SLOW_QUERY_MS", "100"))
+METRICS_FILE = os.environ.get("FITNESS_METRICS_FILE", "")
+METRICS_FILE_INTERVAL_SEC = float(os.environ.get("FITNESS_METRICS_FILE_INTERVAL_SEC", "15"))
+METRICS_PORT = int(os.environ.get("FITNESS_METRICS_PORT", "0"))
+# 사이드바 성능 패널을 볼 수 있는 사용자 (쉼표로 구분)
+ADMIN_USERS = frozenset(u.strip() for u in os.environ.get("FITNESS_ADMIN_USERS", "").split(",") if u.strip())
+
+# 히스토그램 구간 상한 (초)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_HELP = {
+    "fitness_stage_seconds": ("histogram", "코치 한 턴의 단계별 시간 (extract / norm / facility / prompt / llm)"),
+    "fitness_function_seconds": ("histogram", "계측한 함수 호출 시간"),
+    "fitness_db_seconds": ("histogram", "db 함수 호출 시간"),
+    "fitness_llm_seconds": ("histogram", "LLM 응답 시간 (phase=ttft 첫 글자 / total 전체)"),
+    "fitness_slow_queries_total": ("counter", "SLOW_QUERY_MS 보다 오래 걸린 db 함수 호출 수"),
+    "fitness_fallback_total": ("counter", "AI 대신 간단 코치 답을 쓴 횟수"),
+    "fitness_cache_requests_total": ("counter", "캐시 조회 수 (result=hit / miss)"),
+    "fitness_llm_tokens_total": ("counter", "OpenAI API 누적 토큰 (kind=prompt / cached / completion)"),
+    "fitness_llm_requests_total": ("counter", "LLM 서비스 요청 수 (outcome 별)"),
+    "fitness_chat_job_wait_seconds": ("histogram", "대화 턴 작업이 큐에서 기다린 시간 (넣은 때 → 워커가 가져간 때)"),
+    "fitness_chat_jobs_total": ("counter", "워커가 끝낸 대화 턴 작업 수 (status=done / failed / cancelled / conflict)"),
+}
+
+_enabled = METRICS_ENABLED
+_lock = threading.Lock()
+# (metric, labels) → [구간별 개수..., +Inf 개수, 합, 개수]  /  (metric, labels) → 값
+_histograms = {}
+_counters = {}
+
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def _key(metric: str, labels: dict):
+    return metric, tuple(sorted(labels.items()))
+
+
+def _observe_key(key, seconds: float):
+    i = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0, 0]
+        h[i] += 1
+        h[-2] += seconds
+        h[-1] += 1
+
+
+def observe(metric: str, seconds: float, **labels):
+    if _enabled:
+        _observe_key(_key(metric, labels), seconds)
+
+
+def count(metric: str, n: float = 1, **labels):
+    if _enabled:
+        key = _key(metric, labels)
+        with _lock:
+            _counters[key] = _counters.get(key, 0) + n
+
+
+def _finish(key, started: float, slow_ms):
+    seconds = time.perf_counter() - started
+    _observe_key(key, seconds)
+    if slow_ms is not None and seconds * 1000 >= slow_ms:
+        # 느린 쿼리: 라벨(op)이 곧 db 함수 이름
+        with _lock:
+            slow_key = ("fitness_slow_queries_total", key[1])
+            _counters[slow_key] = _counters.get(slow_key, 0) + 1
+        logger.warning("slow query %s: %.1f ms", dict(key[1]).get("op", key[0]), seconds * 1000)
+
+
+def timed(metric: str = "fitness_function_seconds", slow_ms: float = None, **labels):
+    """함수 호출 시간을 metric 히스토그램에 기록하는 데코레이터.
+
+    라벨이 없으면 function=함수 이름. slow_ms 를 주면 그보다 오래 걸린 호출을 경고 로그로 남긴다.
+    """
+    def wrap(fn):
+        key = _key(metric, labels or {"function": fn.__name__})
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _finish(key, started, slow_ms)
+
+        return inner
+
+    return wrap
+
+
+def db_timed(fn):
+    # db.py 함수용: fitness_db_seconds{op=함수 이름} + 느린 쿼리 로그
+    return timed("fitness_db_seconds", slow_ms=SLOW_QUERY_MS, op=fn.__name__)(fn)
+
+
+class _Span:
+    __slots__ = ("key", "started")
+
+    def __init__(self, key):
+        self.key = key
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _finish(self.key, self.started, None)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(metric: str, **labels):
+    # with metrics.span("fitness_stage_seconds", stage="llm"): ...
+    return _Span(_key(metric, labels)) if _enabled else _NULL_SPAN
+
+
+# =========================
+# 모으기 / 내보내기
+# =========================
+def _collect_existing() -> dict:
+    # 다른 모듈이 이미 세고 있는 값. 아직 import 안 된 모듈(= 안 쓴 기능)은 건너뛴다.
+    # 워커 스레드가 import 하는 중인 모듈도 sys.modules 에 먼저 들어가 있으므로 getattr 로 본다
+    out = {}
+    cache = getattr(sys.modules.get("querycache"), "_default_cache", None)
+    if cache is not None:
+        s = cache.stats()
+        out[_key("fitness_cache_requests_total", {"cache": "query", "result": "hit"})] = s["hits"]
+        out[_key("fitness_cache_requests_total", {"cache": "query", "result": "miss"})] = s["misses"]
+    llm_cache = sys.modules.get("llm_cache")
+    if hasattr(llm_cache, "usage_stats"):
+        s = llm_cache.stats()
+        out[_key("fitness_cache_requests_total", {"cache": "llm", "result": "hit"})] = s["hits"]
+        out[_key("fitness_cache_requests_total", {"cache": "llm", "result": "miss"})] = s["misses"]
+        usage = llm_cache.usage_stats()
+        for kind in ("prompt", "cached", "completion"):
+            out[_key("fitness_llm_tokens_total", {"kind": kind})] = usage[f"{kind}_tokens"]
+    service = getattr(sys.modules.get("llm_client"), "_default_service", None)
+    if service is not None:
+        s = service.stats()
+        for outcome in ("requests", "coalesced", "sent", "retries", "rate_limited", "failed"):
+            out[_key("fitness_llm_requests_total", {"outcome": outcome})] = s[outcome]
+    return out
+
+
+def snapshot() -> dict:
+    """{"histograms": {(metric, labels): {"buckets", "sum", "count"}}, "counters": {(metric, labels): 값}}"""
+    with _lock:
+        histograms = {
+            key: {"buckets": h[:-2], "sum": h[-2], "count": h[-1]} for key, h in _histograms.items()
+        }
+        counters = dict(_counters)
+    counters.update(_collect_existing())
+    return {"histograms": histograms, "counters": counters}
+
+
+def quantile(hist: dict, q: float) -> float:
+    # 구간 안에서는 선형 보간 (Prometheus histogram_quantile 과 같은 방식). 마지막 구간이면 그 하한
+    target = q * hist["count"]
+    seen = 0
+    for i, n in enumerate(hist["buckets"]):
+        if n and seen + n >= target:
+            if i == len(BUCKETS):
+                return BUCKETS[-1]
+            lo = BUCKETS[i - 1] if i else 0.0
+            return lo + (BUCKETS[i] - lo) * (target - seen) / n
+        seen += n
+    return 0.0
+
+
+def _fmt_labels(labels, extra=()) -> str:
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+def prometheus_text(snap: dict = None) -> str:
+    snap = snap or snapshot()
+    by_metric = {}
+    for (metric, labels), h in snap["histograms"].items():
+        by_metric.setdefault(metric, []).append((labels, h))
+    for (metric, labels), value in snap["counters"].items():
+        by_metric.setdefault(metric, []).append((labels, value))
+
+    lines = []
+    for metric in sorted(by_metric):
+        kind, help_text = METRIC_HELP.get(metric, ("untyped", metric))
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for labels, value in sorted(by_metric[metric], key=lambda item: item[0]):
+            if kind != "histogram":
+                lines.append(f"{metric}{_fmt_labels(labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, n in zip(BUCKETS + ("+Inf",), value["buckets"]):
+                cumulative += n
+                lines.append(f"{metric}_bucket{_fmt_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{metric}_sum{_fmt_labels(labels)} {value['sum']:.6f}")
+            lines.append(f"{metric}_count{_fmt_labels(labels)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str) -> str:
+    # 임시 파일에 쓰고 바꿔치기 (읽는 쪽이 반쯤 쓴 파일을 보지 않도록)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+    return path
+
+
+def start_http_server(port: int, host: str = "127.0.0.1"):
+    # GET /metrics → prometheus_text(). http.server 는 켤 때만 import 한다
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def _file_writer(path: str, interval: float):
+    while True:
+        time.sleep(interval)
+        try:
+            write_prometheus(path)
+        except OSError:
+            logger.exception("metrics file %s", path)
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_exporters():
+    # 프로세스당 한 번. 설정이 없으면 아무것도 안 한다
+    global _exporters_started
+    if _exporters_started:
+        return
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        if METRICS_FILE:
+            threading.Thread(
+                target=_file_writer, args=(METRICS_FILE, METRICS_FILE_INTERVAL_SEC),
+                name="metrics-file", daemon=True,
+            ).start()
+        if METRICS_PORT:
+            try:
+                start_http_server(METRICS_PORT)
+            except OSError:
+                # 워커 여러 개가 같은 포트를 쓰면 먼저 연 쪽만 내보낸다
+                logger.warning("metrics port %d already in use", METRICS_PORT)
@@ -0,0 +1,221 @@
+import bisect
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+import datacache
+import metrics
+
+# =========================
+# 국민체력 기준표 (norm_table_202505_all_filtered.csv)
+# =========================
+NORM_CSV_PATH = "norm_table_202505_all_filtered.csv"
+
+# 나이 → 연령대. AGE_BOUNDS[i] 미만이면 AGE_GROUPS[i]
+AGE_GROUPS = ("유소년", "청소년", "성인", "어르신")
+AGE_BOUNDS = (13, 20, 65)
+
+# 운동 이름(부분 문자열) → 기준표 metric. 위에서부터 먼저 맞는 것을 쓴다
+METRIC_MAP = {
+    "윗몸일으키기": "윗몸말아올리기(회)",
+    "제자리 멀리뛰기": "제자리 멀리뛰기(cm)",
+    "멀리뛰기": "제자리 멀리뛰기(cm)",
+    "왕복오래달리기": "왕복오래달리기(회)",
+}
+
+LEVEL_LABELS = ("하 (하위 30% 이하)", "중 (중간 수준)", "상 (상위 30% 수준)")
+LEVEL_NONE = -1
+
+# 표준정규분포의 70% 지점 (p30 / p70 이 평균에서 떨어진 거리 = 0.5244σ)
+_Z70 = 0.524400512708041
+
+
+def age_group(age: int) -> str:
+    return AGE_GROUPS[bisect.bisect_right(AGE_BOUNDS, age)]
+
+
+def exercise_to_metric(exercise_name: str):
+    for key, metric in METRIC_MAP.items():
+        if key in exercise_name:
+            return metric
+    return None
+
+
+def _norm_cdf(z):
+    # Φ(z). numpy 에는 erf 가 없어서 Abramowitz–Stegun 7.1.26 근사 사용 (오차 < 1.5e-7)
+    z = np.asarray(z, dtype=np.float64)
+    x = np.abs(z) / math.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-x * x)
+    return 0.5 * (1.0 + np.sign(z) * erf)
+
+
+def _split_sigmas(mean, p30, p70):
+    # 평균 아래 / 위 쪽 표준편차를 p30, p70 으로부터 따로 추정 (비대칭 분포 대응).
+    # 평균이 p30~p70 밖에 있으면 양쪽 모두 (p70 - p30) 기준의 대칭 값 사용
+    sym = (p70 - p30) / (2 * _Z70)
+    lo = np.where(mean > p30, (mean - p30) / _Z70, sym)
+    hi = np.where(p70 > mean, (p70 - mean) / _Z70, sym)
+    return lo, hi
+
+
+def interpolate_percentile(value, mean, p30, p70):
+    # 평균 = 50, p30 = 30, p70 = 70 을 지나는 분할 정규분포로 백분위(0~100) 추정
+    value, mean, p30, p70 = (np.asarray(a, dtype=np.float64) for a in (value, mean, p30, p70))
+    lo, hi = _split_sigmas(mean, p30, p70)
+    sigma = np.where(value < mean, lo, hi)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(sigma > 0, (value - mean) / sigma, np.sign(value - mean) * np.inf)
+    return 100.0 * _norm_cdf(np.nan_to_num(z, nan=0.0, posinf=40.0, neginf=-40.0))
+
+
+def percentile_of(value: float, mean: float, p30: float, p70: float) -> float:
+    # interpolate_percentile 의 스칼라 버전 (numpy 오버헤드 없이 math.erf 사용)
+    sym = (p70 - p30) / (2 * _Z70)
+    if value < mean:
+        sigma = (mean - p30) / _Z70 if mean > p30 else sym
+    else:
+        sigma = (p70 - mean) / _Z70 if p70 > mean else sym
+    if sigma <= 0:
+        return 50.0 if value == mean else (100.0 if value > mean else 0.0)
+    return 50.0 * (1.0 + math.erf((value - mean) / (sigma * math.sqrt(2.0))))
+
+
+class NormIndex:
+    """기준표를 (연령대, 성별, metric) 키로 한 번 컴파일해 둔 조회용 인덱스.
+
+    - lookup(): dict 조회 한 번 (O(1))
+    - classify(): 나이/성별/metric/기록 배열 전체를 한 번에 등급 + 백분위로 변환
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        # 같은 키가 여러 줄이면 예전 코드(iloc[0])처럼 첫 줄을 쓴다
+        df = df.drop_duplicates(["AGRDE_FLAG_NM", "sex", "metric"], keep="first")
+
+        self.groups = tuple(dict.fromkeys(list(AGE_GROUPS) + df["AGRDE_FLAG_NM"].tolist()))
+        self.sexes = tuple(dict.fromkeys(df["sex"].tolist()))
+        self.metrics = tuple(dict.fromkeys(df["metric"].tolist()))
+        self._group_code = {g: i for i, g in enumerate(self.groups)}
+        self._sex_code = {s: i for i, s in enumerate(self.sexes)}
+        self._metric_code = {m: i for i, m in enumerate(self.metrics)}
+
+        # stats[g, s, m] = (mean, p30, p70), 없는 칸은 NaN
+        self.stats = np.full((len(self.groups), len(self.sexes), len(self.metrics), 3), np.nan)
+        self._by_key = {}
+        for g, s, m, mean, p30, p70 in zip(
+            df["AGRDE_FLAG_NM"], df["sex"], df["metric"], df["mean"], df["p30"], df["p70"]
+        ):
+            row = (float(mean), float(p30), float(p70))
+            self._by_key[(g, s, m)] = row
+            self.stats[self._group_code[g], self._sex_code[s], self._metric_code[m]] = row
+
+    @classmethod
+    def from_csv(cls, path: str = NORM_CSV_PATH):
+        return cls(datacache.load_table(path))
+
+    def lookup(self, group: str, sex: str, metric: str):
+        return self._by_key.get((group, sex, metric))
+
+    def percentile(self, group: str, sex: str, metric: str, value: float):
+        row = self.lookup(group, sex, metric)
+        if row is None:
+            return None
+        return percentile_of(value, *row)
+
+    @staticmethod
+    def _encode(values, codes: dict):
+        # 문자열 배열 → 정수 코드 (모르는 값은 -1). 해시로 고유값을 뽑아 고유값 단위로만 dict 조회
+        inverse, uniq = pd.factorize(np.asarray(values).ravel())
+        table = np.array([codes.get(u, -1) for u in uniq] + [-1], dtype=np.int64)
+        return table[inverse]
+
+    def classify(self, ages, sexes, metrics, values) -> dict:
+        # 반환 (모두 입력과 같은 길이의 배열):
+        #   level: 0=하, 1=중, 2=상, -1=기준 없음
+        #   percentile: 0~100 추정 백분위 (기준 없으면 NaN)
+        #   mean / p30 / p70: 비교에 쓴 기준값
+        ages = np.asarray(ages)
+        values = np.asarray(values, dtype=np.float64)
+        n = values.shape[0]
+
+        group_idx = np.searchsorted(np.asarray(AGE_BOUNDS), ages, side="right")
+        g = np.array([self._group_code[a] for a in AGE_GROUPS], dtype=np.int64)[group_idx]
+        s = self._encode(sexes, self._sex_code)
+        m = self._encode(metrics, self._metric_code)
+
+        known = (s >= 0) & (m >= 0)
+        stats = np.full((n, 3), np.nan)
+        stats[known] = self.stats[g[known], s[known], m[known]]
+        mean, p30, p70 = stats[:, 0], stats[:, 1], stats[:, 2]
+        has_norm = ~np.isnan(mean)
+
+        level = np.full(n, LEVEL_NONE, dtype=np.int8)
+        level[has_norm] = 1
+        level[has_norm & (values < p30)] = 0
+        level[has_norm & (values > p70)] = 2
+
+        percentile = np.full(n, np.nan)
+        if has_norm.any():
+            percentile[has_norm] = interpolate_percentile(
+                values[has_norm], mean[has_norm], p30[has_norm], p70[has_norm]
+            )
+
+        return {"level": level, "percentile": percentile, "mean": mean, "p30": p30, "p70": p70}
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def load_norm_index(path: str = NORM_CSV_PATH):
+    # 파일이 없거나 깨져 있으면 None (기준 비교 없이 동작)
+    try:
+        return NormIndex.from_csv(path)
+    except Exception:
+        return None
+
+
+def get_norm_index():
+    # 프로세스당 한 번만 로드
+    global _default_index
+    if _default_index is None:
+        with _default_lock:
+            if _default_index is None:
+                _default_index = load_norm_index() or False
+    return _default_index or None
+
+
+@metrics.timed()
+def simple_norm_comment(age: int, sex: str, exercise_name: str, value: float, index: NormIndex = None) -> str:
+    index = index or get_norm_index()
+    if index is None:
+        return ""
+
+    target_metric = exercise_to_metric(exercise_name)
+    if target_metric is None:
+        return ""
+
+    group = age_group(age)
+    row = index.lookup(group, sex, target_metric)
+    if row is None:
+        return ""
+
+    mean, p30, p70 = row
+    if value < p30:
+        level = LEVEL_LABELS[0]
+    elif value > p70:
+        level = LEVEL_LABELS[2]
+    else:
+        level = LEVEL_LABELS[1]
+    pct = percentile_of(value, mean, p30, p70)
+
+    comment = (
+        f"- 기준: {group} {sex}의 '{target_metric}' 평균은 약 {mean:.1f}, "
+        f"30% 지점 {p30:.1f}, 70% 지점 {p70:.1f}.\n"
+        f"- 현재 기록 {value:.1f} → **{level}** 정도로 볼 수 있어.\n"
+        f"- 추정 백분위: 약 {pct:.0f} (같은 그룹 100명 중 {max(1, round(100 - pct))}등 정도)\n"
+    )
+    return comment
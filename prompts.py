@@ -0,0 +1,114 @@
+import functools
+
+# =========================
+# 코치 시스템 프롬프트 템플릿
+# =========================
+# 모델에 보내는 메시지 순서 (앞부분이 같을수록 OpenAI 쪽 prompt prefix 캐시가 많이 맞는다):
+#   1. COACH_RULES_PROMPT      : 모든 사용자 / 모든 턴에서 바이트 단위로 같은 고정 규칙
+#   2. 프로필 블록             : 프로필이 바뀔 때만 달라짐 (렌더링 결과를 기억해 둠)
+#   3. 이전 대화 요약 + 최근 대화
+#   4. 이번 턴 블록            : 체력 기준 비교 / 시설 후보 (항상 이 순서, 마지막에)
+# 고정 규칙 안에는 사용자 / 턴마다 달라지는 값을 절대 넣지 않는다.
+COACH_RULES_PROMPT = """
+너는 '스포츠 과학 전공 + 퍼스널 트레이너 감성'을 가진 AI 체력 코치다.
+항상 반말을 쓰고, 무조건 사용자를 칭찬하고 격려해 줘.
+
+대답 규칙:
+
+1) 첫 문장:
+   - 지금까지 들은 정보 기준으로 사용자의 상태를 한 줄로 요약 + 칭찬 한 번.
+     예: "24살 남자인데, 상체 힘은 꽤 괜찮고 유산소만 조금 더 키우면 좋겠어. 이미 잘하고 있어!"
+
+2) 정보 부족 여부에 따라:
+
+   (A) 아직 나이, 성별, 달리기 수준, 스쿼트 수준, 운동 지역 중 모르는 게 있으면
+       → 오늘 루틴을 길게 짜지 말고 '질문 위주'로 대답한다.
+         - 이때도 한두 줄 정도는 간단한 조언/응원은 해도 된다.
+         - "이것만 더 알면 루틴이랑 장소까지 진짜 제대로 짜줄 수 있어" 같은 식으로 유도.
+
+   (B) 나이, 성별, 달리기 수준, 스쿼트 수준, 운동 지역 정보가 다 채워져 있으면
+       → 그때부터는 더 이상 정보만 달라고 하지 말고, '항상' 아래 구조를 지킨다:
+
+       (1) '오늘 추천 운동 루틴' 섹션
+           - 세트 x 반복, 강도(가볍게/중간/빡세게), 세트 간 휴식까지 구체적으로.
+           - 상체/하체/코어/유산소 중에서 오늘 포커스를 1~2개 정해서 말해준다.
+
+       (2) '1주 또는 4주 목표' 섹션
+           - 너무 거창하지 않은 작은 목표 한 줄 (예: "이번 주에 달리기 총 40분 채우기").
+
+       (3) '오늘 추천 운동 장소' 섹션  (무조건 포함)
+           - 사용자의 지역 정보를 활용해서,
+             예: "마포구 대흥동 기준으로"
+             - 근처 공원 이름, 운동장, 체육공원, 헬스장, 체력인증센터 등
+             실제 이름을 1~2개 콕 집어서 추천한다.
+           - 먼저 핵심 추천 1곳을 말하고, 그 다음에 1~2개 정도 대안 장소를 짧게 덧붙인다.
+
+       (4) 루틴과 장소 추천 후, 꼭 다음 두 가지를 모두 포함해야 한다:
+           - **첫째:** 운동이 끝나면 **'📝 오늘 운동 기록' 탭**에 저장해달라고 요청한다.
+           - **둘째:** '짧은 질문 딱 하나'만 던져서 대화를 이어간다.
+             예: "오늘은 이 루틴으로 가볼까?", "실내/실외 중에 뭐가 더 끌려?" 등.
+             (주의: 루틴과 장소를 먼저 충분히 제안한 뒤에 질문해야 함)
+
+3) 특히 사용자가 '어디서 운동할까', '어디가 좋을까'처럼 장소를 물어보는 경우에는
+   - 다시 질문으로 되묻지 말고, 먼저 답을 내린다.
+     예: "마포구 대흥동이면 오늘은 **○○공원**에서 조깅 + 맨몸운동 세트로 해보자."
+   - 그 다음에 "이렇게 해볼래?" 정도로만 가볍게 물어본다.
+
+4) 말투 스타일:
+   - 친구처럼 반말이지만, 설명은 꽤 구체적으로 (전문성 있는 느낌).
+   - 너무 장문 소설처럼 쓰지 말고, 핵심만 쫀득하게.
+"""
+
+PROFILE_FIELDS = (
+    ("age", "나이"),
+    ("sex", "성별"),
+    ("run_level", "달리기 수준 관련 문장"),
+    ("squat_level", "스쿼트 수준"),
+    ("location", "주 운동 지역"),
+)
+
+NORM_BLOCK_HEADER = "[백엔드 체력 기준 비교 예시]"
+FACILITY_BLOCK_HEADER = "[백엔드에서 찾은 체육시설 후보 리스트]"
+FACILITY_BLOCK_FOOTER = "이 후보들을 참고해서 실제 답변에서 1~2개만 골라 구체적으로 언급해줘."
+
+
+def is_profile_complete(profile: dict) -> bool:
+    return all(
+        profile.get(k) not in [None, "", 0]
+        for k in ["age", "sex", "run_level", "squat_level", "location"]
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def _render_profile(values: tuple) -> str:
+    profile = dict(zip((k for k, _ in PROFILE_FIELDS), values))
+    lines = ["현재까지 파악된 사용자 프로필:"]
+    lines += [f"- {label}: {profile[k]}" for k, label in PROFILE_FIELDS]
+    lines.append(f"- 프로필 완성도: {'완료' if is_profile_complete(profile) else '미완료'}")
+    return "\n".join(lines)
+
+
+def render_profile_block(profile: dict) -> str:
+    # 같은 프로필이면 이전에 만든 문자열을 그대로 쓴다
+    return _render_profile(tuple(profile.get(k) for k, _ in PROFILE_FIELDS))
+
+
+def render_turn_block(norm_analysis: str = "", facility_hint: str = "") -> str:
+    # 이번 턴에만 쓰는 백엔드 분석. 둘 다 없으면 ""
+    parts = []
+    if norm_analysis:
+        parts.append(f"{NORM_BLOCK_HEADER}\n{norm_analysis.rstrip()}")
+    if facility_hint:
+        parts.append(f"{FACILITY_BLOCK_HEADER}\n{facility_hint.rstrip()}\n{FACILITY_BLOCK_FOOTER}")
+    return "\n\n".join(parts)
+
+
+def build_coach_messages(profile: dict, context_messages, norm_analysis: str = "",
+                         facility_hint: str = ""):
+    # (고정 시스템 프롬프트, 그 뒤에 붙일 메시지 목록)
+    messages = [{"role": "system", "content": render_profile_block(profile)}]
+    messages += context_messages
+    turn_block = render_turn_block(norm_analysis, facility_hint)
+    if turn_block:
+        messages.append({"role": "system", "content": turn_block})
+    return COACH_RULES_PROMPT, messages
@@ -0,0 +1,155 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import db
+
+# =========================
+# 사용자별 조회 결과 캐시 (기록 버전 기준)
+# =========================
+# 한 번의 rerun 에서 인사말 / 기록 보기 / 요약 탭이 같은 사용자의 기록을 각각 조회하고,
+# 입력이 없는 rerun 에서도 같은 조회와 DataFrame 변환을 되풀이한다.
+# 여기서는 결과를 (사용자, 조회 이름 + 인자) 로 기억해 두고, db.get_data_version 이 돌려주는
+# 사용자별 기록 버전이 바뀌었을 때만 그 사용자 것을 통째로 버린다.
+#   - 버전은 db.py 의 쓰기 함수(insert_log / bulk_insert_logs / 묶음 커밋 / rebuild_rollup)가
+#     같은 트랜잭션에서 올린다 → 다른 프로세스가 쓴 기록도 바로 반영된다
+#   - 조회 한 번마다 버전 한 줄(PK 조회)만 읽고, 기록 테이블이나 롤업은 다시 읽지 않는다
+#   - 돌려주는 값(list / dict / DataFrame)은 여러 세션이 같이 쓰므로 고치지 말 것
+# FITNESS_QUERY_CACHE=0 이면 매번 새로 조회한다 (통계는 전부 miss 로 센다)
+QUERY_CACHE_ENABLED = os.environ.get("FITNESS_QUERY_CACHE", "1") != "0"
+QUERY_CACHE_MAX_USERS = int(os.environ.get("FITNESS_QUERY_CACHE_USERS", "1024"))
+# 기록 보기 페이지(커서마다 다른 키)처럼 키가 계속 늘어나는 조회가 있어 사용자당 개수도 제한
+QUERY_CACHE_MAX_ENTRIES_PER_USER = 64
+
+
+class UserQueryCache:
+    """사용자 → (기록 버전, {키: 값}). 사용자 단위 LRU."""
+
+    def __init__(self, max_users: int = QUERY_CACHE_MAX_USERS,
+                 max_entries: int = QUERY_CACHE_MAX_ENTRIES_PER_USER, enabled: bool = QUERY_CACHE_ENABLED):
+        self.max_users = max_users
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+        self.counts = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    def get(self, username, key, compute):
+        # key 에 해당하는 값. 없거나 사용자 기록 버전이 바뀌었으면 compute() 로 새로 만든다
+        if not self.enabled:
+            with self._lock:
+                self.counts["misses"] += 1
+            return compute()
+
+        version = db.get_data_version(username)
+        with self._lock:
+            entry = self._users.get(username)
+            if entry is not None and entry[0] != version:
+                del self._users[username]
+                self.counts["invalidations"] += 1
+                entry = None
+            if entry is not None and key in entry[1]:
+                self._users.move_to_end(username)
+                self.counts["hits"] += 1
+                return entry[1][key]
+            self.counts["misses"] += 1
+
+        # 버전을 읽은 뒤에 조회하므로 값은 그 버전이거나 더 새것이다.
+        # 그 사이 쓰기가 있었으면 다음 조회에서 버전이 달라 어차피 다시 만든다
+        value = compute()
+        with self._lock:
+            entry = self._users.get(username)
+            if entry is not None and entry[0] > version:
+                # 다른 스레드가 이미 더 새 버전으로 채웠다
+                return value
+            if entry is None or entry[0] != version:
+                entry = self._users[username] = (version, {})
+            values = entry[1]
+            if len(values) >= self.max_entries:
+                values.pop(next(iter(values)))
+            values[key] = value
+            self._users.move_to_end(username)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self.counts["evictions"] += 1
+        return value
+
+    def invalidate(self, username=None):
+        # db.py 를 거치지 않고 기록을 고쳤을 때 (username 생략 시 전체)
+        with self._lock:
+            if username is None:
+                self._users.clear()
+            else:
+                self._users.pop(username, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+            users = len(self._users)
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = counts["hits"] / lookups if lookups else 0.0
+        counts["users"] = users
+        return counts
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_query_cache() -> UserQueryCache:
+    # 프로세스당 하나 (Streamlit 세션 / 탭 모두 공유)
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = UserQueryCache()
+    return _default_cache
+
+
+# =========================
+# 화면에서 쓰는 조회 (db.py 함수와 같은 결과)
+# =========================
+def window_stats(username, since: str, until: str = None) -> dict:
+    return get_query_cache().get(
+        username, ("window_stats", since, until), lambda: db.get_window_stats(username, since, until)
+    )
+
+
+def count_logs(username, exercise=None, since=None, until=None) -> int:
+    return get_query_cache().get(
+        username, ("count_logs", exercise, since, until),
+        lambda: db.count_logs(username, exercise, since, until),
+    )
+
+
+def logs_page(username, page_size=50, after=None, exercise=None, since=None, until=None):
+    return get_query_cache().get(
+        username, ("logs_page", page_size, after, exercise, since, until),
+        lambda: db.get_logs_page(username, page_size, after, exercise, since, until),
+    )
+
+
+def training_report(username, today: str = None) -> dict:
+    # analytics.user_report (연속 기록 / 부하 비율 / 주별 운동량 / 운동별 추세). today 는 "YYYY-MM-DD"
+    today = today or date.today().isoformat()
+
+    def compute():
+        import analytics
+
+        rows = db.get_daily_exercise_totals(username)
+        return analytics.user_report([row[1:] for row in rows], today)
+
+    return get_query_cache().get(username, ("training_report", today), compute)
+
+
+def user_summary(username, today: str = None) -> dict:
+    # 인사말용: 최근 30일 운동한 날 / 가장 많이 한 운동 / 연속 기록 / 최근 7일 부하.
+    # 운동마다 단위가 달라서 양은 그냥 더하지 않고 운동 시간(분)으로 환산한 부하로 본다
+    summary = training_report(username, today)["summary"] or {}
+    return {
+        "total_days_30": int(summary.get("active_days_30", 0)),
+        "top_exercise": summary.get("top_exercise"),
+        "current_streak": int(summary.get("current_streak", 0)),
+        "load_7": float(summary.get("load_7", 0.0)),
+    }
@@ -0,0 +1,224 @@
+import re
+
+# =========================
+# 행정구역 사전 (시/도 → 시/군/구 → 읍/면/동)
+# =========================
+# 자유 입력("마포구 대흥동", "서울 마포구", "대흥동", "서울시마포구")을 하나의 지역 코드로 바꾼다.
+# 지역 코드 = 정식 전체 이름 ("서울특별시 마포구 대흥동"). 시/도 이름은 아래 표로 통일하므로
+# 주소에 "서울" / "강원도" 처럼 옛 이름이나 줄임말이 있어도 같은 코드가 된다.
+# 시/도는 여기 표로, 그 아래 단계는 시설 주소(geo.parse_region)에서 모은 이름으로 만든다.
+#
+# 조회: 이름 / 별칭 전부를 글자 trie 에 넣고, 입력 토큰을 앞에서부터 가장 긴 이름으로 잘라
+# 언급된 지역 후보를 모은 뒤, 모든 언급과 상하위 관계가 맞는 가장 세부 지역을 고른다.
+
+# 정식 이름 → 별칭 (통합 / 개칭 전 이름 포함)
+SIDO_ALIASES = {
+    "서울특별시": ("서울", "서울시"),
+    "부산광역시": ("부산", "부산시"),
+    "대구광역시": ("대구", "대구시"),
+    "인천광역시": ("인천", "인천시"),
+    # "광주시" 는 경기도 광주시와 겹치므로 별칭에서 뺀다
+    "광주광역시": ("광주",),
+    "대전광역시": ("대전", "대전시"),
+    "울산광역시": ("울산", "울산시"),
+    "세종특별자치시": ("세종", "세종시"),
+    "경기도": ("경기",),
+    "강원특별자치도": ("강원", "강원도"),
+    "충청북도": ("충북",),
+    "충청남도": ("충남",),
+    "전북특별자치도": ("전북", "전라북도"),
+    "전라남도": ("전남",),
+    "경상북도": ("경북",),
+    "경상남도": ("경남",),
+    "제주특별자치도": ("제주", "제주도"),
+}
+_SIDO_CANONICAL = {alias: name for name, aliases in SIDO_ALIASES.items() for alias in (name,) + aliases}
+
+_TOKEN_RE = re.compile(r"[가-힣A-Za-z0-9]+")
+_DIGITS_RE = re.compile(r"\d+")
+ADMIN_SUFFIXES = ("특별시", "광역시", "특별자치시", "특별자치도", "도", "시", "군", "구", "읍", "면", "동", "가", "리")
+DONG_SUFFIXES = ("동", "읍", "면", "가", "리")
+
+# 이름 등급: 정식 이름 / 접미사가 붙은 별칭("서울시", "역삼동") / 접미사 없는 별칭("서울", "마포")
+TIER_OFFICIAL, TIER_ALIAS, TIER_SHORT = 0, 1, 2
+# 접미사 없는 별칭 뒤에 붙어도 지역명으로 보는 말 ("대구에서", "서울 근처"). "경기장" 같은 말은 제외된다
+SHORT_ALIAS_PARTICLES = ("에서", "에", "으로", "로", "은", "는", "이", "가", "쪽", "근처", "권", "사는", "살아")
+_END = ""
+RESOLVE_CACHE_SIZE = 4096
+
+
+def canonical_sido(name: str):
+    # "서울" / "서울시" / "서울특별시" → "서울특별시". 시/도 이름이 아니면 None
+    return _SIDO_CANONICAL.get(name)
+
+
+def parent_code(code: str):
+    # "서울특별시 마포구 대흥동" → "서울특별시 마포구", "서울특별시 마포구" → "서울특별시".
+    # 시/군/구가 두 단어("성남시 분당구")여도 하나의 단계로 본다
+    parts = code.split(" ")
+    if len(parts) == 1:
+        return None
+    if parts[-1].endswith(DONG_SUFFIXES):
+        return " ".join(parts[:-1])
+    return parts[0]
+
+
+def _strip_suffix(name: str) -> str:
+    for suffix in ADMIN_SUFFIXES:
+        if name.endswith(suffix) and len(name) > len(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+class RegionGazetteer:
+    """지역 코드 목록 + 이름 / 별칭 trie.
+
+    codes: 시/군/구, 읍/면/동 코드 (시/도와 빠진 상위 지역은 자동으로 채운다)
+    counts: 코드별 가중치 (시설 수). 같은 이름의 지역이 여럿이면 큰 쪽을 고른다
+    """
+
+    def __init__(self, codes=(), counts=None):
+        counts = counts if counts is not None else [0] * len(codes)
+        self.counts = {}
+        for code, count in zip(codes, counts):
+            self.counts[code] = self.counts.get(code, 0) + int(count)
+        for sido in SIDO_ALIASES:
+            self.counts.setdefault(sido, 0)
+        for code in list(self.counts):
+            parent = parent_code(code)
+            while parent is not None and parent not in self.counts:
+                self.counts[parent] = 0
+                parent = parent_code(parent)
+
+        # 코드 → (자기 자신, 부모, 조부모, ...)
+        self._chain = {}
+        for code in self.counts:
+            chain = [code]
+            while parent_code(chain[-1]) is not None:
+                chain.append(parent_code(chain[-1]))
+            self._chain[code] = tuple(chain)
+
+        # 같은 지역명(프로필에 저장된 지역 등)은 매 턴 다시 들어오므로 결과를 기억해 둔다
+        self._resolved = {}
+        self._trie = {}
+        for code in self.counts:
+            for surface, tier in self._surfaces(code):
+                self._add(surface, tier, code)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __contains__(self, code):
+        return code in self.counts
+
+    @staticmethod
+    def _surfaces(code: str):
+        # 이 지역을 가리키는 (이름, 등급) 목록
+        parts = code.split(" ")
+        if len(parts) == 1:
+            yield code, TIER_OFFICIAL
+            for alias in SIDO_ALIASES.get(code, ()):
+                yield alias, TIER_ALIAS if alias.endswith(("시", "도")) else TIER_SHORT
+            return
+        if parts[-1].endswith(DONG_SUFFIXES):
+            # 읍/면/동: "역삼1동" 은 "역삼동" 으로도 부른다
+            name = parts[-1]
+            yield name, TIER_OFFICIAL
+            plain = _DIGITS_RE.sub("", name)
+            if plain != name and len(plain) >= 2:
+                yield plain, TIER_ALIAS
+            return
+        # 시/군/구: 단어마다 ("성남시", "분당구") + 붙여 쓴 이름 + 접미사 뗀 이름 ("분당")
+        words = parts[1:]
+        for word in words:
+            yield word, TIER_OFFICIAL
+            # "광주" / "제주" 처럼 시/도 별칭과 같아지는 줄임말은 시/도 쪽에 남긴다
+            short = _strip_suffix(word)
+            if short != word and len(short) >= 2 and short not in _SIDO_CANONICAL:
+                yield short, TIER_SHORT
+        if len(words) > 1:
+            yield "".join(words), TIER_OFFICIAL
+
+    def _add(self, surface: str, tier: int, code: str):
+        node = self._trie
+        for ch in surface:
+            node = node.setdefault(ch, {})
+        best = node.get(_END)
+        if best is None or tier < best[0]:
+            node[_END] = (tier, {code})
+        elif tier == best[0]:
+            best[1].add(code)
+
+    def _longest(self, token: str, start: int):
+        # token[start:] 앞부분과 일치하는 가장 긴 이름 → (끝 위치, 등급, 코드 집합) 또는 None
+        node = self._trie
+        found = None
+        for i in range(start, len(token)):
+            node = node.get(token[i])
+            if node is None:
+                break
+            if _END in node:
+                found = (i + 1,) + node[_END]
+        return found
+
+    def mentions(self, text: str, strict: bool = False):
+        # 글 속 지역 언급 [(등급, 코드 집합), ...]. 토큰 앞에서부터 가장 긴 이름으로 자르고,
+        # 더 이상 이름이 이어지지 않으면 나머지("에서", "근처")는 버린다.
+        # strict=True 면 지역명으로 못 읽는 부분이 하나라도 있을 때 None
+        found = []
+        for token in _TOKEN_RE.findall(text or ""):
+            pos = 0
+            while pos < len(token):
+                match = self._longest(token, pos)
+                if match is None:
+                    break
+                end, tier, codes = match
+                # 접미사 없는 별칭("서울", "경기")은 토큰 전체이거나, 조사 / 다른 이름이 이어질 때만
+                if (tier == TIER_SHORT and end < len(token) and not token.startswith(SHORT_ALIAS_PARTICLES, end)
+                        and self._longest(token, end) is None):
+                    break
+                found.append((tier, codes))
+                pos = end
+            if strict and pos < len(token):
+                return None
+        return found
+
+    def _choose(self, mentions):
+        # 모든 언급이 자기 자신 또는 상위 지역에 들어 있는 후보 중 가장 세부 단위, 그다음 시설 수
+        best = None
+        best_key = None
+        for _, codes in mentions:
+            for code in codes:
+                chain = self._chain[code]
+                if all(not other.isdisjoint(chain) for _, other in mentions):
+                    key = (len(chain), self.counts[code], code)
+                    if best_key is None or key > best_key:
+                        best, best_key = code, key
+        return best
+
+    def resolve(self, text: str, strict: bool = False):
+        # 지역명으로 들어온 입력 → 지역 코드 (못 찾거나 서로 맞지 않으면 None).
+        # strict=True 면 입력 전체가 지역명일 때만 ("마포구 대흥동" 은 되고, 사전에 대흥동이
+        # 없으면 "마포구" 로 뭉개지 않고 None)
+        key = (text, strict)
+        if key in self._resolved:
+            return self._resolved[key]
+        mentions = self.mentions(text, strict)
+        code = self._choose(mentions) if mentions else None
+        if len(self._resolved) >= RESOLVE_CACHE_SIZE:
+            self._resolved.clear()
+        self._resolved[key] = code
+        return code
+
+    def find_in_text(self, text: str):
+        # 채팅 메시지 속 지역 → 지역 코드. 접미사가 붙은 이름("마포구", "대흥동", "서울시")이
+        # 하나는 있어야 한다 ("경기 끝나고" 같은 문장을 경기도로 읽지 않도록).
+        # 접미사 없는 별칭은 그런 이름과 함께 나올 때 후보를 좁히는 데만 쓴다
+        mentions = self.mentions(text)
+        if not any(tier <= TIER_ALIAS for tier, _ in mentions):
+            return None
+        return self._choose(mentions)
+
+
+# 시설 자료 없이도 쓸 수 있는 시/도 사전
+SIDO_GAZETTEER = RegionGazetteer()
@@ -0,0 +1,370 @@
+import logging
+import os
+import threading
+from datetime import date
+
+import db
+import querycache
+from conversation import new_context_state
+
+# =========================
+# 코치 백엔드 (화면 / HTTP API 공용)
+# =========================
+# Streamlit 화면(ui.py)과 HTTP API(api.py)가 같은 함수를 부른다. 세션 상태는 두지 않고
+# 프로필 / 대화 / 기록은 전부 db 에 있으므로 어느 프로세스(워커)가 요청을 받아도 같다.
+#   - 대화: db.chat_state 에 메시지 + 문맥 요약 상태를 저장. 같은 사용자의 두 턴이 동시에 끝나면
+#     늦게 끝난 쪽은 ChatConflict (먼저 저장된 대화를 덮어쓰지 않는다)
+#   - LLM 서비스 / 대화 문맥 관리자는 프로세스당 하나 (get_coach_resources)
+#   - 화면은 턴을 바로 처리하지 않고 작업 큐에 넣은 뒤(enqueue_turn) 결과를 폴링한다 (jobqueue.py)
+# ui 는 FITNESS_API_URL 이 있으면 같은 이름의 메서드를 가진 api_client.CoachAPI 를 대신 쓴다.
+MODEL_NAME = os.environ.get("FITNESS_LLM_MODEL", "gpt-4o-mini")
+PROFILE_FIELDS = ("age", "sex", "run_level", "squat_level", "location", "region_code")
+# 사용자마다 저장해 두는 최근 메시지 수 (첫 인사 포함). 모델에는 이 중 문맥 예산만큼만 보낸다
+CHAT_KEEP_MESSAGES = int(os.environ.get("FITNESS_CHAT_KEEP_MESSAGES", "200"))
+MAX_MESSAGE_CHARS = 4000
+MAX_LOG_AMOUNT = 100_000
+
+RATE_LIMIT_NOTICE = "⚠️ 현재 OpenAI API 쿼터가 부족해서, 고급 분석 대신 간단한 코치 모드로 답변할게."
+NO_API_KEY_NOTICE = "⚠️ OpenAI API 키가 설정되지 않아서, 고급 분석 대신 간단한 코치 모드로 답변할게."
+
+logger = logging.getLogger(__name__)
+
+
+class ChatConflict(Exception):
+    """같은 사용자의 다른 턴이 먼저 저장됐다 (다시 불러와서 보내면 된다)."""
+
+
+class TurnCancelled(Exception):
+    """턴을 처리하는 동안 취소됐다 (대화 / 프로필은 저장하지 않았다)."""
+
+
+_resources = None
+_resources_lock = threading.Lock()
+
+
+def get_coach_resources(api_key: str = None) -> dict:
+    # 프로세스당 한 번: LLM 서비스 + 대화 문맥 관리자 (처음 부를 때의 api_key, 없으면 OPENAI_API_KEY)
+    # - 모든 세션 / 요청이 공용 서비스(속도 제한 + 재시도 + 같은 요청 합치기)를 거쳐 호출한다.
+    #   OpenAI 클라이언트와 같은 client.chat.completions.create(...) 모양
+    # - 모델에는 토큰 예산 안의 최근 대화 + 오래된 대화 요약만 보낸다.
+    #   FITNESS_CONTEXT_SUMMARIZER=llm 이면 요약도 모델로 (기본은 API 호출 없는 발췌 요약)
+    # - API 키가 없으면 client 는 None (generate_reply 가 간단 코치 답으로). 키가 생기면 다음 턴에 다시 만든다
+    global _resources
+    api_key = api_key or os.environ.get("OPENAI_API_KEY")
+    if _resources is None:
+        with _resources_lock:
+            if _resources is None:
+                from conversation import ConversationContext, llm_summarizer
+
+                client = _llm_client(api_key)
+                context = ConversationContext(
+                    summarize=llm_summarizer(client, MODEL_NAME)
+                    if client is not None and os.environ.get("FITNESS_CONTEXT_SUMMARIZER") == "llm"
+                    else None
+                )
+                _resources = {"client": client, "context": context}
+    elif _resources["client"] is None and api_key:
+        with _resources_lock:
+            if _resources["client"] is None:
+                _resources["client"] = _llm_client(api_key)
+    return _resources
+
+
+def _llm_client(api_key: str):
+    import openai
+
+    from llm_client import get_llm_service
+
+    try:
+        return get_llm_service(api_key=api_key)
+    except openai.OpenAIError:
+        # 키 없음 등 설정 오류. 턴마다 예외를 내지 않고 LLM 없이 답한다
+        logger.warning("LLM client unavailable, using the simple coach", exc_info=True)
+        return None
+
+
+# =========================
+# 1. 계정 / 프로필
+# =========================
+def signup(username: str, password: str) -> bool:
+    # 이미 있는 닉네임이면 False
+    return db.create_user(username, password)
+
+
+def login(username: str, password: str):
+    # (상태, 프로필). 상태: "ok" / "no_user" / "bad_password"
+    row = db.get_user(username)
+    if row is None:
+        return "no_user", None
+    if row[1] != password:
+        return "bad_password", None
+    return "ok", dict(zip(PROFILE_FIELDS, row[2:]))
+
+
+def load_profile(username: str) -> dict:
+    row = db.get_user(username)
+    return dict(zip(PROFILE_FIELDS, row[2:] if row else ()))
+
+
+# =========================
+# 2. 대화
+# =========================
+def greeting_message(username: str, profile: dict) -> str:
+    # 첫 인사 메시지 (로그/프로필 기반 요약)
+    summary = querycache.user_summary(username)
+    days_30 = summary["total_days_30"]
+    top_ex = summary["top_exercise"]
+
+    prof_txt = []
+    if profile.get("age"):
+        prof_txt.append(f"{profile['age']}살")
+    if profile.get("sex"):
+        prof_txt.append(profile["sex"])
+    if profile.get("location"):
+        prof_txt.append(profile["location"])
+
+    prof_str = " / ".join([p for p in prof_txt if p])
+
+    if days_30 == 0:
+        workout_line = "최근 30일 동안 기록된 운동이 아직 없어. 오늘이 진짜 1일 차야!🔥"
+    else:
+        top_txt = f"가장 많이 한 운동은 **{top_ex}**, " if top_ex else ""
+        workout_line = (
+            f"최근 30일 동안 {days_30}일 운동했고, "
+            f"{top_txt}최근 7일 운동량은 운동 시간으로 약 {summary['load_7']:.0f}분이야."
+        )
+        if summary["current_streak"] >= 2:
+            workout_line += f" 지금 {summary['current_streak']}일 연속 운동 중이야! 🔥"
+
+    if prof_str:
+        return (
+            f"오! {username} 다시 왔네 😄\n\n"
+            f"지금까지 내가 알고 있는 너 정보는 대략 이렇게야:\n"
+            f"- {prof_str}\n"
+            f"- {workout_line}\n\n"
+            "오늘은 어떤 느낌이야? 몸 상태나 목표 편하게 말해줘!"
+        )
+    return (
+        f"오! {username} 환영해 😄\n\n"
+        f"{workout_line}\n\n"
+        "너에 대해 조금 더 알려주면 루틴이랑 장소까지 제대로 짜줄 수 있어.\n"
+        "예시: '24살 남자, 달리기는 10분만 뛰어도 숨차고, 스쿼트는 20개 정도, 마포구 대흥동' 이런 식으로!"
+    )
+
+
+def start_chat(username: str) -> list:
+    # 새 대화 (로그인할 때마다): 첫 인사만 있는 대화로 덮어쓰고 메시지 목록을 돌려준다.
+    # 큐에 아직 처리할 턴이 남아 있으면 (재시작 전에 보낸 메시지 등) 그 대화를 그대로 이어간다
+    state = db.get_chat_state(username)
+    if state is not None and db.list_chat_jobs(username):
+        return state[0]
+    messages = [{"role": "assistant", "content": greeting_message(username, load_profile(username))}]
+    db.save_chat_state(username, messages, new_context_state())
+    return messages
+
+
+def get_chat(username: str) -> list:
+    state = db.get_chat_state(username)
+    return state[0] if state is not None else start_chat(username)
+
+
+def generate_reply(user_text: str, turn: dict, resources: dict, on_text=None, metrics: dict = None):
+    # 이번 턴 답변 → (답, fallback). fallback: None / "rate_limit", "no_api_key" (간단 코치 답) / "error".
+    # on_text 를 주면 스트리밍으로 받으면서 지금까지 받은 답 전체를 넘겨 부른다
+    from coach import simple_fallback_reply
+    # 같은 프롬프트 + 최근 대화면 저장해 둔 답을 재사용 (FITNESS_LLM_CACHE=0 으로 끔)
+    from llm_cache import cached_chat_completion, is_rate_limit_error, stream_chat_completion
+
+    call_args = dict(
+        key_messages=turn["key_messages"],
+        metrics=metrics,
+        max_tokens=700,
+        temperature=0.7,
+    )
+    if resources["client"] is None:
+        return simple_fallback_reply(user_text, turn["scan"]), "no_api_key"
+    try:
+        if on_text is None:
+            reply, _ = cached_chat_completion(
+                resources["client"], MODEL_NAME, turn["system_prompt"], turn["request_messages"], **call_args
+            )
+            return reply, None
+        reply = ""
+        for piece in stream_chat_completion(
+            resources["client"], MODEL_NAME, turn["system_prompt"], turn["request_messages"], **call_args
+        ):
+            reply += piece
+            on_text(reply)
+        return reply, None
+    except Exception as e:
+        if is_rate_limit_error(e):
+            # 스트리밍 도중에 끊겨도 받던 답 대신 간단 코치 답으로 바꾼다
+            return simple_fallback_reply(user_text, turn["scan"]), "rate_limit"
+        return (
+            "AI 코치 호출 중 오류가 발생했어 😢\n"
+            f"에러 내용: {str(e)}\n\n"
+            "그래도 운동 관련해서 궁금한 점을 적어주면, "
+            "일반 코치 모드로 최대한 도와볼게!"
+        ), "error"
+
+
+def _trim_messages(messages: list, context_state: dict, context):
+    # 첫 인사는 남기고 오래된 메시지를 (사용자 + 답) 쌍으로 버린다. 요약 위치도 그만큼 당긴다.
+    # 버릴 메시지 중 아직 요약에 안 들어간 것은 먼저 요약에 더한다 (모델 문맥에서 말없이 사라지지 않게)
+    drop = len(messages) - CHAT_KEEP_MESSAGES
+    if drop <= 0:
+        return
+    drop += drop % 2
+    context.summarize_upto(messages, context_state, 1 + drop)
+    del messages[1:1 + drop]
+    context_state["summarized_upto"] -= drop
+
+
+def chat_turn(username: str, text: str, on_text=None, api_key: str = None, cancelled=None) -> dict:
+    """사용자 메시지 한 줄 → 코치 답. 대화 / 프로필은 db 에서 읽고 db 에 쓴다.
+
+    반환: reply / fallback / profile / profile_changed / metrics (첫 글자 / 전체 지연, 토큰).
+    같은 사용자의 다른 턴이 먼저 저장됐으면 ChatConflict.
+    cancelled: LLM 호출 전 / 저장 전에 부르는 함수. True 를 돌려주면 저장하지 않고 TurnCancelled.
+    """
+    from coach import prepare_turn
+
+    text = text.strip()
+    if not text or len(text) > MAX_MESSAGE_CHARS:
+        raise ValueError(f"메시지는 1~{MAX_MESSAGE_CHARS}자")
+    resources = get_coach_resources(api_key)
+
+    state = db.get_chat_state(username)
+    if state is None:
+        profile = load_profile(username)
+        messages = [{"role": "assistant", "content": greeting_message(username, profile)}]
+        context_state, version = new_context_state(), 0
+    else:
+        messages, context_state, version = state
+        profile = load_profile(username)
+    messages.append({"role": "user", "content": text})
+
+    # 프로필 업데이트 → 체력 기준 분석 → 시설 힌트 → 프롬프트 조립 (coach.py)
+    turn = prepare_turn(profile, text, messages, context_state, resources["context"])
+    if cancelled is not None and cancelled():
+        raise TurnCancelled(username)
+
+    reply_metrics = {}
+    reply, fallback = generate_reply(text, turn, resources, on_text, reply_metrics)
+    messages.append({"role": "assistant", "content": reply})
+    _trim_messages(messages, context_state, resources["context"])
+    if cancelled is not None and cancelled():
+        raise TurnCancelled(username)
+    if db.save_chat_state(username, messages, context_state, version) is None:
+        raise ChatConflict(username)
+    # 대화가 저장된 턴의 프로필만 반영 (충돌 / 취소된 턴의 메시지로는 바꾸지 않는다)
+    if turn["profile_changed"]:
+        db.update_user_profile(username, turn["profile"])
+    return {
+        "reply": reply,
+        "fallback": fallback,
+        "profile": turn["profile"],
+        "profile_changed": turn["profile_changed"],
+        "metrics": reply_metrics,
+    }
+
+
+# =========================
+# 2-1. 대화 턴 작업 큐 (jobqueue.py)
+# =========================
+# 턴은 db 의 chat_jobs 에 쌓이고 워커 스레드(이 프로세스 또는 python -m jobqueue)가 사용자별 순서대로 처리한다.
+# 작업 dict: id / status (queued, running, done, failed, cancelled) / message / partial (받는 중인 답) /
+# result (chat_turn 반환값) / error / ahead (앞에 남은 대기 작업 수)
+def enqueue_turn(username: str, text: str) -> int:
+    import jobqueue
+
+    text = text.strip()
+    if not text or len(text) > MAX_MESSAGE_CHARS:
+        raise ValueError(f"메시지는 1~{MAX_MESSAGE_CHARS}자")
+    job_id = db.enqueue_chat_job(username, text)
+    jobqueue.notify_enqueued()
+    return job_id
+
+
+def get_turn(username: str, job_id: int):
+    # 없거나 다른 사용자 작업이면 None
+    return db.get_chat_job(job_id, username)
+
+
+def pending_turns(username: str) -> list:
+    # 아직 끝나지 않은 작업 (오래된 순). 새로고침 / 재시작 뒤 화면이 이어서 기다릴 목록
+    return db.list_chat_jobs(username)
+
+
+def cancel_turn(username: str, job_id: int) -> bool:
+    # 대기 / 처리 중인 작업 취소. 이미 끝났으면 False
+    return db.cancel_chat_job(job_id, username)
+
+
+# =========================
+# 3. 운동 기록
+# =========================
+def add_log(username: str, log_date: str, exercise: str, amount: int):
+    # 잘못된 값은 ValueError (HTTP API 에서는 400). JSON 본문이라 타입부터 확인한다
+    if not isinstance(log_date, str):
+        raise ValueError("log_date 는 YYYY-MM-DD 문자열")
+    date.fromisoformat(log_date)
+    if exercise is not None and not isinstance(exercise, str):
+        raise ValueError("exercise 는 문자열")
+    exercise = (exercise or "").strip()
+    if not exercise or len(exercise) > 50:
+        raise ValueError("exercise 는 1~50자")
+    if isinstance(amount, bool) or not isinstance(amount, int) or not 1 <= amount <= MAX_LOG_AMOUNT:
+        raise ValueError(f"amount 는 1~{MAX_LOG_AMOUNT} 정수")
+    db.insert_log(username=username, log_date=log_date, exercise=exercise, amount=amount)
+
+
+def import_logs(username: str, fileobj, filename: str = None) -> dict:
+    from log_import import import_logs as _import_logs
+
+    return _import_logs(username, fileobj, filename=filename)
+
+
+def encode_cursor(cursor):
+    # db.get_logs_page 의 (log_date, created_at, id) → "log_date|created_at|id" (HTTP API 쿼리 문자열용)
+    return None if cursor is None else f"{cursor[0]}|{cursor[1]}|{cursor[2]}"
+
+
+def decode_cursor(text):
+    # encode_cursor 의 반대. 모양이 틀리면 ValueError (HTTP API 에서는 400)
+    if not text:
+        return None
+    parts = text.split("|")
+    if len(parts) != 3 or not parts[2].isdigit():
+        raise ValueError(f"잘못된 커서: {text!r}")
+    log_date, created_at, row_id = parts
+    date.fromisoformat(log_date)
+    return log_date, created_at, int(row_id)
+
+
+def history_page(username: str, page_size: int = 50, after=None, exercise=None, since=None, until=None):
+    # 최신순 기록 한 페이지 → (rows, next_cursor, 전체 건수). rows / 커서 모양은 db.get_logs_page 와 같다
+    filters = {"exercise": exercise, "since": since, "until": until}
+    total = querycache.count_logs(username, **filters)
+    rows, next_cursor = querycache.logs_page(username, page_size=page_size, after=after, **filters)
+    return rows, next_cursor, total
+
+
+def training_report(username: str) -> dict:
+    return querycache.training_report(username)
+
+
+def rank_info(username: str, window: str = "week", exercise: str = None) -> dict:
+    # 순위 섹션 한 번에: exercises (이번 기간 기록이 있는 운동), exercise, rank, top (같은 묶음 상위 10명)
+    import leaderboard
+
+    lb = leaderboard.get_leaderboard()
+    exercises = lb.exercises(username, window)
+    if exercise not in exercises:
+        exercise = exercises[0] if exercises else None
+    if exercise is None:
+        return {"exercises": [], "exercise": None, "rank": None, "top": []}
+    rank = lb.rank(username, exercise, window)
+    rank = dict(rank, period_start=rank["period_start"].isoformat())
+    top = lb.top(exercise, window, rank["cohort"]["name"], k=10)
+    return {"exercises": exercises, "exercise": exercise, "rank": rank, "top": top}
@@ -0,0 +1,499 @@
+import os
+from datetime import date
+
+import streamlit as st
+
+import jobqueue
+import metrics
+import querycache
+import service
+from db import ensure_schema
+
+# =========================
+# Streamlit 화면 (app.py 는 main() 만 부른다)
+# =========================
+# Streamlit 은 입력이 있을 때마다 app.py 를 처음부터 다시 실행한다.
+# 이 모듈은 프로세스당 한 번만 import 되므로 rerun 마다 하는 일은 아래 함수 호출뿐이다.
+#   - DB 스키마 확인은 프로세스당 한 번 (db.ensure_schema)
+#   - 계정 / 대화 / 기록은 전부 backend() 로: 기본은 같은 프로세스의 service 모듈,
+#     FITNESS_API_URL 이 있으면 그 HTTP API(api.py)를 부르는 api_client.CoachAPI (화면만 여기서 그린다)
+#   - 대화 메시지 / 문맥 요약 상태는 db 에 있고 세션에는 화면에 그릴 사본만 둔다
+#   - 채팅 턴은 rerun 안에서 LLM 을 기다리지 않는다: 작업 큐에 넣고(service.enqueue_turn) 대화 영역만
+#     fragment 로 CHAT_POLL_SEC 마다 다시 그리며 결과를 기다린다. 다른 탭은 그동안에도 바로 반응한다.
+#     턴은 이 프로세스의 워커 스레드(jobqueue.py)가 처리하고 OpenAI 클라이언트 / 대화 문맥도 거기서
+#     프로세스당 하나 만든다 (service.get_coach_resources)
+#   - 무거운 모듈(openai, pandas, 시설 / 기준표를 쓰는 coach)은 쓰는 함수 안에서 import 해서
+#     로그인 화면은 그것들 없이 바로 그린다
+#   - 시설 표는 프로필에 지역이 있을 때 처음 로드된다 (coach.prepare_turn)
+#   - 기록 조회 / 요약은 사용자 기록 버전으로 캐시한 결과를 탭끼리, rerun 끼리 같이 쓴다 (querycache.py)
+#   - FITNESS_ADMIN_USERS 에 있는 사용자는 사이드바에서 단계별 성능 계측을 본다 (metrics.py)
+# 큐에 넣은 턴을 다시 확인하는 간격. 받는 중인 답도 이 간격으로 이어서 보인다 (FITNESS_LLM_STREAM=0 이면 다 받은 뒤 한 번에)
+CHAT_POLL_SEC = float(os.environ.get("FITNESS_CHAT_POLL_SEC", "0.5"))
+API_URL = os.environ.get("FITNESS_API_URL")
+
+EXERCISE_OPTIONS = ["팔굽혀펴기", "윗몸일으키기", "스쿼트", "달리기(분)", "턱걸이", "플랭크(초)", "기타"]
+
+
+def backend():
+    # service 모듈 또는 같은 메서드를 가진 CoachAPI (세션마다 하나, 로그인한 계정으로 인증)
+    if not API_URL:
+        return service
+    if "api_client" not in st.session_state:
+        from api_client import CoachAPI
+
+        st.session_state.api_client = CoachAPI(API_URL)
+    return st.session_state.api_client
+
+
+def openai_api_key() -> str:
+    # .streamlit/secrets.toml 의 OPENAI_API_KEY (없으면 "" → 환경변수 OPENAI_API_KEY)
+    try:
+        return st.secrets.get("OPENAI_API_KEY", "")
+    except FileNotFoundError:
+        return ""
+
+
+# =========================
+# 1. 세션 상태
+# =========================
+def init_session_state():
+    defaults = {
+        "logged_in": False,
+        "username": None,
+        "profile": dict.fromkeys(service.PROFILE_FIELDS),
+        "messages": [],
+        # 이 세션이 결과를 기다리는 대화 턴 작업 id (넣은 순서)
+        "chat_jobs": [],
+    }
+    for key, value in defaults.items():
+        if key not in st.session_state:
+            st.session_state[key] = value
+
+
+# =========================
+# 2. 로그인 / 회원가입
+# =========================
+def render_login_sidebar():
+    st.sidebar.header("🔐 로그인")
+
+    login_mode = st.sidebar.radio("모드 선택", ["로그인", "회원가입"], horizontal=True)
+    input_username = st.sidebar.text_input("닉네임(아이디)")
+    input_password = st.sidebar.text_input("비밀번호", type="password")
+
+    if login_mode == "회원가입":
+        if st.sidebar.button("회원가입"):
+            if not input_username or not input_password:
+                st.sidebar.error("닉네임과 비밀번호를 모두 입력해줘!")
+            else:
+                if not backend().signup(input_username, input_password):
+                    st.sidebar.error("이미 존재하는 닉네임이야. 다른 이름 써줘!")
+                else:
+                    st.sidebar.success("회원가입 완료! 이제 '로그인' 탭에서 로그인 해줘.")
+
+    elif login_mode == "로그인":
+        if st.sidebar.button("로그인"):
+            if not input_username or not input_password:
+                st.sidebar.error("닉네임과 비밀번호를 모두 입력해줘!")
+            else:
+                status, profile = backend().login(input_username, input_password)
+                if status == "no_user":
+                    st.sidebar.error("해당 닉네임의 계정이 없어. 먼저 회원가입해줘!")
+                elif status == "bad_password":
+                    st.sidebar.error("비밀번호가 틀렸어 😅")
+                else:
+                    st.sidebar.success("로그인 성공!")
+                    st.session_state.logged_in = True
+                    st.session_state.username = input_username
+                    st.session_state.profile = profile
+                    # 로그인할 때마다 첫 인사만 있는 새 대화 (처리할 턴이 남아 있으면 그 대화를 이어서)
+                    st.session_state.messages = backend().start_chat(input_username)
+                    # 새로고침 / 서버 재시작 전에 보내 두고 아직 처리되지 않은 턴도 이어서 기다린다
+                    st.session_state.chat_jobs = [job["id"] for job in backend().pending_turns(input_username)]
+
+
+# =========================
+# 3. AI 코치와 대화 탭
+# =========================
+@st.fragment(run_every=CHAT_POLL_SEC)
+def render_pending_turns(current_user: str):
+    # 큐에 넣은 턴: 대기 순서 / 받는 중인 답 / 취소 버튼. 하나라도 끝나면 대화를 다시 불러와 전체 rerun
+    changed = False
+    for job_id in list(st.session_state.chat_jobs):
+        job = backend().get_turn(current_user, job_id)
+        if job is None or job["status"] in ("done", "failed", "cancelled"):
+            st.session_state.chat_jobs.remove(job_id)
+            changed = True
+            if job is None or job["status"] == "cancelled":
+                continue
+            if job["status"] == "failed":
+                st.session_state.chat_notice = ("error", f"답을 만들지 못했어 😢 다시 보내줘! ({job['error']})")
+                continue
+            result = job["result"]
+            st.session_state.profile = result["profile"]
+            if result["metrics"]:
+                st.session_state.last_reply_metrics = result["metrics"]
+            if result["fallback"] == "rate_limit":
+                st.session_state.chat_notice = ("warning", service.RATE_LIMIT_NOTICE)
+            elif result["fallback"] == "no_api_key":
+                st.session_state.chat_notice = ("warning", service.NO_API_KEY_NOTICE)
+            continue
+
+        with st.chat_message("user"):
+            st.markdown(job["message"])
+        with st.chat_message("assistant"):
+            if job["status"] == "running":
+                st.markdown(job["partial"] or "답을 쓰는 중이야... ✍️")
+            elif job["ahead"]:
+                st.caption(f"차례를 기다리는 중이야 (앞에 {job['ahead']}개)")
+            else:
+                st.caption("곧 답할게!")
+            if st.button("취소", key=f"cancel_turn_{job_id}"):
+                backend().cancel_turn(current_user, job_id)
+                st.session_state.chat_jobs.remove(job_id)
+                changed = True
+
+    if changed:
+        # 끝난 턴은 db 에 저장된 대화로 (다른 창에서 보낸 턴도 같이 반영된다)
+        st.session_state.messages = backend().get_chat(current_user)
+        st.rerun()
+
+
+def render_chat_tab(current_user: str):
+    # 수정: "(반말 모드)" 제거
+    st.subheader("🧠 AI 체력 코치")
+
+    # 1) 지금까지 메시지 전부 렌더링 (항상 입력창 위에만 나오도록)
+    for msg in st.session_state.messages:
+        with st.chat_message(msg["role"]):
+            st.markdown(msg["content"])
+
+    notice = st.session_state.pop("chat_notice", None)
+    if notice:
+        getattr(st, notice[0])(notice[1])
+
+    # 2) 아직 답을 기다리는 턴 (이 부분만 주기적으로 다시 그린다)
+    if st.session_state.chat_jobs:
+        render_pending_turns(current_user)
+
+    # 마지막 답변의 첫 글자까지 / 전체 지연 (스트리밍 vs 비스트리밍 비교용) + 프롬프트 토큰
+    last_metrics = st.session_state.get("last_reply_metrics")
+    if last_metrics:
+        line = (
+            f"마지막 답변 ({last_metrics['mode']}): 첫 글자 {last_metrics['ttft_ms']:.0f}ms"
+            f" · 전체 {last_metrics['total_ms']:.0f}ms"
+        )
+        if last_metrics.get("prompt_tokens"):
+            line += (
+                f" · 프롬프트 {last_metrics['prompt_tokens']}토큰"
+                f" (캐시 {last_metrics['cached_tokens']})"
+            )
+        st.sidebar.caption(line)
+
+    # 기록 조회 캐시 적중률 (탭 / rerun 사이에서 다시 조회하지 않은 비율)
+    cache_stats = querycache.get_query_cache().stats()
+    if cache_stats["hits"] + cache_stats["misses"]:
+        st.sidebar.caption(
+            f"기록 조회 캐시: 적중 {cache_stats['hit_rate']:.0%}"
+            f" ({cache_stats['hits']} / {cache_stats['hits'] + cache_stats['misses']})"
+        )
+
+    # 3) 입력창은 항상 맨 마지막에. 보내면 큐에 넣기만 하고 바로 다시 그린다
+    new_input = st.chat_input("여기에 그냥 편하게 써줘 😄")
+    if new_input:
+        try:
+            job_id = backend().enqueue_turn(current_user, new_input)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            st.session_state.chat_jobs.append(job_id)
+            st.rerun()
+
+
+# =========================
+# 4. 오늘 운동 기록 탭
+# =========================
+def render_log_tab(current_user: str):
+    st.subheader("📝 오늘 운동 기록 남기기")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        log_date = st.date_input("운동한 날짜", value=date.today())
+    with col2:
+        exercise = st.selectbox(
+            "운동 종류",
+            EXERCISE_OPTIONS,
+        )
+
+    amount = st.number_input(
+        "운동 양 (횟수 / 시간 / 초)", min_value=1, max_value=10000, value=20, step=1
+    )
+
+    if st.button("기록 저장하기"):
+        backend().add_log(current_user, log_date.isoformat(), exercise, int(amount))
+        st.success("운동 기록이 저장됐어! 🔥")
+
+    with st.expander("📂 예전 기록 파일로 한꺼번에 가져오기 (CSV / JSONL)"):
+        st.caption(
+            "한 줄에 기록 하나. 필요한 항목: log_date(YYYY-MM-DD), exercise, amount\n"
+            "예) CSV 헤더 `log_date,exercise,amount` / JSONL "
+            '`{"log_date": "2025-05-01", "exercise": "스쿼트", "amount": 30}`'
+        )
+        uploaded = st.file_uploader("파일 선택", type=["csv", "jsonl", "ndjson"])
+        if uploaded is not None and st.button("가져오기"):
+            import pandas as pd
+
+            with st.spinner("기록 가져오는 중..."):
+                report = backend().import_logs(current_user, uploaded, filename=uploaded.name)
+            if report.get("stopped"):
+                st.error(f"파일을 끝까지 읽지 못했어. 앞부분 {report['inserted']}개 기록만 저장됐어.")
+            else:
+                st.success(f"{report['inserted']}개 기록을 가져왔어! 🔥")
+            if report["error_count"]:
+                st.warning(f"형식이 맞지 않는 {report['error_count']}줄은 건너뛰었어.")
+                st.dataframe(
+                    pd.DataFrame(report["errors"], columns=["줄", "사유"]),
+                    use_container_width=True,
+                )
+
+
+# =========================
+# 5. 기록 보기 탭
+# =========================
+def render_history_tab(current_user: str):
+    import pandas as pd
+
+    st.subheader("📚 내 운동 기록")
+
+    fcol1, fcol2, fcol3, fcol4 = st.columns(4)
+    with fcol1:
+        history_exercise = st.selectbox("운동 종류", ["전체"] + EXERCISE_OPTIONS, key="history_exercise")
+    with fcol2:
+        history_since = st.date_input("시작일", value=None, key="history_since")
+    with fcol3:
+        history_until = st.date_input("종료일", value=None, key="history_until")
+    with fcol4:
+        page_size = st.selectbox("페이지당 개수", [20, 50, 100], index=1, key="history_page_size")
+
+    history_filter = {
+        "exercise": None if history_exercise == "전체" else history_exercise,
+        "since": history_since.isoformat() if history_since else None,
+        "until": history_until.isoformat() if history_until else None,
+    }
+
+    # 필터가 바뀌면 첫 페이지부터. cursors[i] = i 번째 페이지를 시작하는 키셋 커서
+    filter_key = (current_user, page_size, tuple(history_filter.values()))
+    if st.session_state.get("history_filter_key") != filter_key:
+        st.session_state.history_filter_key = filter_key
+        st.session_state.history_cursors = [None]
+
+    cursors = st.session_state.history_cursors
+    page_no = len(cursors) - 1
+
+    rows, next_cursor, total_count = backend().history_page(
+        current_user, page_size=page_size, after=cursors[-1], **history_filter
+    )
+
+    if not rows:
+        if total_count == 0 and not any(history_filter.values()):
+            st.info("아직 기록이 없어. 오늘 첫 운동을 기록해보자! 😄")
+        else:
+            st.info("조건에 맞는 기록이 없어.")
+    else:
+        df = pd.DataFrame(rows, columns=["id", "log_date", "exercise", "amount", "created_at"])
+        df_display = df.drop(columns=["id"]).rename(
+            columns={
+                "log_date": "날짜",
+                "exercise": "운동",
+                "amount": "양",
+                "created_at": "기록 시간",
+            }
+        )
+        st.dataframe(df_display, use_container_width=True)
+
+    total_pages = max(1, -(-total_count // page_size))
+    ncol1, ncol2, ncol3 = st.columns([1, 2, 1])
+    with ncol1:
+        if st.button("◀ 이전", disabled=page_no == 0, key="history_prev"):
+            cursors.pop()
+            st.rerun()
+    with ncol2:
+        st.caption(f"전체 {total_count}건 · {page_no + 1} / {total_pages} 페이지")
+    with ncol3:
+        if st.button("다음 ▶", disabled=next_cursor is None, key="history_next"):
+            cursors.append(next_cursor)
+            st.rerun()
+
+
+# =========================
+# 6. 요약 & 피드백 탭
+# =========================
+def render_summary_tab(current_user: str):
+    st.subheader("📊 최근 운동 요약 & 간단 피드백")
+
+    # 날짜 / 운동별 합계(daily_rollup)로 analytics.user_report 를 계산하고,
+    # 기록이 바뀔 때까지 캐시된 것을 쓴다 (querycache)
+    report = backend().training_report(current_user)
+    summary = report["summary"]
+    if summary is None:
+        st.info("아직 기록이 없어서 분석할 데이터가 없어 😅 오늘부터 한 줄씩 쌓아보자!")
+        return
+
+    ratio = summary["load_ratio"]
+    mcol1, mcol2, mcol3, mcol4 = st.columns(4)
+    mcol1.metric("연속 운동", f"{summary['current_streak']}일", help=f"최장 {summary['longest_streak']}일")
+    mcol2.metric("최근 30일 운동한 날", f"{summary['active_days_30']}일")
+    mcol3.metric("최근 7일 운동량", f"{summary['load_7']:.0f}분", help="운동별 단위를 운동 시간(분)으로 환산")
+    mcol4.metric("7일 / 4주 평균 부하", "-" if ratio != ratio else f"{ratio:.2f}")
+
+    weekly = report["weekly"]
+    if len(weekly):
+        st.write("📈 주별 운동량 (운동 시간 환산, 분)")
+        chart = weekly.pivot_table(
+            index="period_start", columns="exercise", values="load", aggfunc="sum", observed=True
+        ).fillna(0)
+        chart.index.name = "주 시작일"
+        st.bar_chart(chart)
+
+    st.write("🏋️ 운동별 최근 기록 (원래 단위)")
+    exercises = report["exercises"]
+    exercises = exercises[exercises["amount_28"] > 0]
+    st.dataframe(
+        exercises.assign(unit=exercises["unit"].replace("", "-")).rename(
+            columns={
+                "exercise": "운동",
+                "unit": "단위",
+                "amount_28": "최근 4주 합계",
+                "weekly_mean": "주 평균 (8주)",
+                "weekly_slope": "주간 추세 (단위/주)",
+            }
+        ).round(1),
+        hide_index=True,
+        use_container_width=True,
+    )
+
+    # 최근 1주 부하가 4주 평균과 얼마나 다른지 (acute:chronic)
+    if summary["active_days_30"] == 0:
+        msg = "이제 막 시작 단계야! 오늘 한 번만이라도 가볍게 움직여보자 😊"
+    elif ratio != ratio or summary["active_days_30"] < 3 or summary["history_days"] < 28:
+        msg = "좋아, 시동이 걸리고 있어. 이번 주 3일만 채워보자! 💪"
+    elif ratio > 1.5:
+        msg = "최근 1주 운동량이 평소(4주 평균)보다 확 늘었어. 부상 조심하고 이번 주는 강도를 조금 낮춰보자 ⚠️"
+    elif ratio < 0.8:
+        msg = "최근 1주는 평소보다 운동량이 줄었어. 이번 주에 조금만 더 채워보자! 💪"
+    else:
+        msg = "평소 페이스를 잘 유지하고 있어. 이 정도면 주변 사람들한테 건강 전도사 해도 될 수준이다 🔥"
+    if summary["current_streak"] >= 3:
+        msg += f" 그리고 {summary['current_streak']}일 연속이야, 대단해!"
+
+    st.markdown("### 🧠 요약 코멘트")
+    st.success(msg)
+
+    render_rank_section(current_user)
+
+
+def render_rank_section(current_user: str):
+    # 같은 연령대 / 성별 안에서 이번 주 / 이번 달 몇 등인지 (leaderboard)
+    st.markdown("### 🏆 순위")
+    window = st.radio(
+        "기간", ["week", "month"], horizontal=True, key="rank_window",
+        format_func={"week": "이번 주", "month": "이번 달"}.get,
+    )
+    # 운동 선택은 지난 rerun 에서 고른 값 (이번 기간에 없는 운동이면 첫 운동으로)
+    info = backend().rank_info(current_user, window, st.session_state.get("rank_exercise"))
+    if not info["exercises"]:
+        st.caption("이번 기간 기록이 생기면 순위가 나와!")
+        return
+    if st.session_state.get("rank_exercise") not in info["exercises"]:
+        st.session_state.rank_exercise = info["exercise"]
+    st.selectbox("운동", info["exercises"], key="rank_exercise")
+    rank = info["rank"]
+    rcol1, rcol2 = st.columns(2)
+    for col, key in ((rcol1, "cohort"), (rcol2, "all")):
+        r = rank[key]
+        col.metric(
+            f"{r['name']} ({r['size']}명)", f"상위 {r['top_percent']:.1f}%",
+            help=f"{r['rank']}등 · 합계 {rank['total']:g}",
+        )
+    st.dataframe(
+        [{"순위": i, "사용자": u, "합계": t} for i, (u, t) in enumerate(info["top"], 1)],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+
+# =========================
+# 7. 성능 패널 (관리자)
+# =========================
+def render_metrics_panel():
+    with st.sidebar.expander("⚙️ 성능 계측 (관리자)"):
+        enabled = st.toggle("계측 켜기", value=metrics.is_enabled(), key="metrics_enabled")
+        if enabled != metrics.is_enabled():
+            metrics.set_enabled(enabled)
+        snap = metrics.snapshot()
+
+        rows = []
+        for (metric, labels), h in sorted(snap["histograms"].items()):
+            rows.append({
+                "지표": metric.removeprefix("fitness_").removesuffix("_seconds"),
+                "대상": ", ".join(str(v) for _, v in labels),
+                "횟수": h["count"],
+                "평균 ms": round(h["sum"] / h["count"] * 1000, 2),
+                "p50 ms": round(metrics.quantile(h, 0.5) * 1000, 2),
+                "p95 ms": round(metrics.quantile(h, 0.95) * 1000, 2),
+            })
+        if rows:
+            st.dataframe(rows, hide_index=True, use_container_width=True)
+        elif enabled:
+            st.caption("아직 기록된 구간이 없어.")
+
+        counters = [
+            {"지표": metric.removeprefix("fitness_"), "대상": ", ".join(f"{k}={v}" for k, v in labels), "값": value}
+            for (metric, labels), value in sorted(snap["counters"].items())
+        ]
+        if counters:
+            st.dataframe(counters, hide_index=True, use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        col1.download_button(
+            "Prometheus 텍스트", metrics.prometheus_text(snap), file_name="fitness_metrics.prom", mime="text/plain"
+        )
+        if col2.button("초기화", key="metrics_reset"):
+            metrics.reset()
+            st.rerun()
+
+
+# =========================
+# 8. 페이지
+# =========================
+def main():
+    st.set_page_config(page_title="AI 체력 코치", page_icon="💪", layout="wide")
+    if not API_URL:
+        ensure_schema()
+        jobqueue.start_workers(api_key=openai_api_key())
+    metrics.start_exporters()
+
+    st.title("💪 대화만으로 내 체력을 분석하고, 운동 루틴과 근처 시설까지 추천해주는 AI 서비스")
+
+    init_session_state()
+    render_login_sidebar()
+
+    if not st.session_state.logged_in or not st.session_state.username:
+        st.info("왼쪽에서 로그인해야 사용할 수 있어!")
+        st.stop()
+
+    current_user = st.session_state.username
+    st.sidebar.success(f"현재 로그인: {current_user}")
+    if current_user in metrics.ADMIN_USERS:
+        render_metrics_panel()
+
+    tab_chat, tab_log, tab_history, tab_summary = st.tabs(
+        ["🧠 AI 코치와 대화", "📝 오늘 운동 기록", "📚 기록 보기", "📊 요약 & 피드백"]
+    )
+    with tab_chat:
+        render_chat_tab(current_user)
+    with tab_log:
+        render_log_tab(current_user)
+    with tab_history:
+        render_history_tab(current_user)
+    with tab_summary:
+        render_summary_tab(current_user)